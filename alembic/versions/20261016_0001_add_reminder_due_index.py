@@ -0,0 +1,44 @@
+"""add partial index for due reminders
+
+Revision ID: 20261016_0001
+Revises: 
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261016_0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции.
+    # Индекс объявлен и в модели Reminder, поэтому на базе, созданной через
+    # init_db()/create_all, он уже есть - IF NOT EXISTS
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_reminder_due',
+            'reminders',
+            ['scheduled_time'],
+            if_not_exists=True,
+            postgresql_where=sa.text("status = 'ACTIVE' AND is_enabled = true"),
+            postgresql_concurrently=True,
+            sqlite_where=sa.text("status = 'ACTIVE' AND is_enabled = 1"),
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_reminder_due',
+            table_name='reminders',
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
@@ -11,6 +11,8 @@ from pathlib import Path
 # Добавляем путь к src для импортов
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from sqlalchemy.orm import joinedload
+
 from detoxbuddy.database.database import SessionLocal
 from detoxbuddy.database.models.reminder import Reminder, ReminderStatus
 from detoxbuddy.database.models.user import User
@@ -23,7 +25,7 @@ def check_reminders():
     try:
         with SessionLocal() as db:
             # Получаем все напоминания
-            reminders = db.query(Reminder).order_by(Reminder.id.desc()).limit(10).all()
+            reminders = db.query(Reminder).options(joinedload(Reminder.user)).order_by(Reminder.id.desc()).limit(10).all()
             
             if not reminders:
                 print("❌ Напоминаний не найдено")
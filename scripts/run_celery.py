@@ -55,7 +55,6 @@ def main():
         celery_app.worker_main([
             'worker',
             '--loglevel=info',
-            '--concurrency=2',
             '--pool=prefork'
         ])
         
@@ -13,12 +13,14 @@ setup(
     package_dir={"": "src"},
     python_requires=">=3.8",
     install_requires=[
-        "python-telegram-bot==20.7",
+        "python-telegram-bot[rate-limiter]==20.7",
+        "orjson==3.8.3",
         "sqlalchemy==2.0.27",
         "alembic==1.13.1",
         "psycopg2-binary==2.9.9",
         "redis==5.0.1",
         "celery==5.3.4",
+        "msgpack==1.0.7",
         "pillow==10.2.0",
         "opencv-python==4.9.0.80",
         "pandas==2.2.0",
@@ -32,7 +32,10 @@ celery_app = Celery(
     "detoxbuddy",
     broker=broker_url,
     backend=result_backend,
-    include=["src.detoxbuddy.tasks.reminder_tasks"]
+    include=[
+        "src.detoxbuddy.tasks.reminder_tasks",
+        "src.detoxbuddy.tasks.achievement_tasks",
+    ]
 )
 
 # Конфигурация Celery
@@ -45,17 +48,30 @@ celery_app.conf.update(
     task_track_started=settings.CELERY_TASK_TRACK_STARTED,
     task_time_limit=settings.CELERY_TASK_TIME_LIMIT,
     task_soft_time_limit=settings.CELERY_TASK_SOFT_TIME_LIMIT,
+    # Число процессов воркера: по нему делится лимит отправок без общего счетчика в Redis
+    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
     
     # Расписание задач
     beat_schedule={
+        'dispatch-queued-reminders': {
+            'task': 'app.tasks.reminder_tasks.dispatch_queued_reminders',
+            'schedule': 5.0,  # очередь в Redis, без обращения к БД
+        },
         'check-reminders': {
-            'task': 'src.detoxbuddy.tasks.reminder_tasks.check_due_reminders',
-            'schedule': 60.0,  # каждую минуту
+            'task': 'app.tasks.reminder_tasks.check_due_reminders',
+            # Сканирование БД страхует очередь: напоминания, которые не попали в Redis
+            # (сбой при добавлении, Redis недоступен), уходят не позже, чем без очереди
+            'schedule': 60.0,
         },
         'cleanup-expired-reminders': {
-            'task': 'src.detoxbuddy.tasks.reminder_tasks.cleanup_expired_reminders',
+            'task': 'app.tasks.reminder_tasks.cleanup_expired_reminders',
             'schedule': 3600.0,  # каждый час
         },
+        'recheck-achievements': {
+            'task': 'app.tasks.achievement_tasks.recheck_achievements',
+            # Прогресс считается событиями; раз в сутки сверяем его с таблицами
+            'schedule': 86400.0,
+        },
     }
 )
 
@@ -22,9 +22,9 @@ celery_app = Celery(
 
 # Конфигурация Celery
 celery_app.conf.update(
-    task_serializer="json",
-    result_serializer="json",
-    accept_content=["json"],
+    task_serializer="msgpack",
+    result_serializer="msgpack",
+    accept_content=["msgpack", "json"],
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
@@ -54,14 +54,15 @@ class Settings(BaseSettings):
     # Celery настройки
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
-    CELERY_TASK_SERIALIZER: str = "json"
-    CELERY_RESULT_SERIALIZER: str = "json"
-    CELERY_ACCEPT_CONTENT: list = ["json"]
+    CELERY_TASK_SERIALIZER: str = "msgpack"
+    CELERY_RESULT_SERIALIZER: str = "msgpack"
+    CELERY_ACCEPT_CONTENT: list = ["msgpack", "json"]
     CELERY_TIMEZONE: str = "UTC"
     CELERY_ENABLE_UTC: bool = True
     CELERY_TASK_TRACK_STARTED: bool = True
     CELERY_TASK_TIME_LIMIT: int = 30 * 60  # 30 минут
     CELERY_TASK_SOFT_TIME_LIMIT: int = 25 * 60  # 25 минут
+    CELERY_WORKER_CONCURRENCY: int = 2  # процессов воркера (prefork)
     
     class Config:
         env_file = ".env"
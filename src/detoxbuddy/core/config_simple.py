@@ -48,14 +48,15 @@ class Settings:
         # Celery настройки
         self.CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
         self.CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
-        self.CELERY_TASK_SERIALIZER = "json"
-        self.CELERY_RESULT_SERIALIZER = "json"
-        self.CELERY_ACCEPT_CONTENT = ["json"]
+        self.CELERY_TASK_SERIALIZER = "msgpack"
+        self.CELERY_RESULT_SERIALIZER = "msgpack"
+        self.CELERY_ACCEPT_CONTENT = ["msgpack", "json"]
         self.CELERY_TIMEZONE = "UTC"
         self.CELERY_ENABLE_UTC = True
         self.CELERY_TASK_TRACK_STARTED = True
         self.CELERY_TASK_TIME_LIMIT = 30 * 60
         self.CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60
+        self.CELERY_WORKER_CONCURRENCY = int(os.getenv("CELERY_WORKER_CONCURRENCY", "2"))
 
 
 # Создаем экземпляр настроек
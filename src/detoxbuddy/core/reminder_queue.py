@@ -0,0 +1,148 @@
+"""
+@file: reminder_queue.py
+@description: Очередь запланированных напоминаний в Redis (ZSET по времени отправки)
+@dependencies: redis, sqlalchemy, config_simple, models
+@created: 2026-10-16
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from detoxbuddy.core.config_simple import settings
+from detoxbuddy.database.models.reminder import Reminder, ReminderStatus
+
+try:
+    from redis import Redis
+    from redis.exceptions import RedisError
+except ImportError:  # redis не входит в минимальные зависимости бота
+    Redis = None
+    RedisError = Exception
+
+logger = logging.getLogger(__name__)
+
+# Ключ ZSET: member - id напоминания, score - время отправки (epoch, UTC)
+REMINDER_QUEUE_KEY = "detox:reminders"
+
+# Ключ в Session.info для записей, ожидающих коммита
+_PENDING_KEY = "reminder_queue_pending"
+
+# Атомарно забирает из очереди до ARGV[2] напоминаний со временем <= ARGV[1]
+_POP_DUE_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #ids > 0 then
+    redis.call('ZREM', KEYS[1], unpack(ids))
+end
+return ids
+"""
+
+# Через сколько секунд повторять подключение к Redis после ошибки
+RECONNECT_BACKOFF = 30.0
+
+_client = None
+# Момент (time.monotonic), раньше которого не пытаемся подключиться снова
+_retry_at = 0.0
+
+
+def get_queue_client() -> Optional["Redis"]:
+    """
+    Возвращает клиент Redis для очереди или None, если Redis недоступен.
+    После ошибки подключение повторяется не чаще раза в RECONNECT_BACKOFF секунд,
+    так что кратковременный сбой Redis не отключает очередь до перезапуска процесса.
+    """
+    global _client
+    if _client is None and Redis is not None and time.monotonic() >= _retry_at:
+        try:
+            client = Redis.from_url(settings.redis_url, socket_timeout=1)
+            client.ping()
+            _client = client
+        except RedisError as e:
+            mark_unavailable(e)
+    return _client
+
+
+def mark_unavailable(error: Exception) -> None:
+    """Сбрасывает клиент после ошибки Redis; следующее подключение - после паузы"""
+    global _client, _retry_at
+    _client = None
+    _retry_at = time.monotonic() + RECONNECT_BACKOFF
+    logger.warning(f"Очередь напоминаний в Redis недоступна: {error}")
+
+
+def _score(moment: datetime) -> float:
+    """Переводит наивное UTC-время в epoch"""
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+def enqueue(schedule: Dict[int, datetime]) -> bool:
+    """
+    Добавляет напоминания в очередь (или обновляет их время).
+    Возвращает False, если очередь недоступна.
+    """
+    client = get_queue_client()
+    if client is None or not schedule:
+        return False
+
+    try:
+        client.zadd(
+            REMINDER_QUEUE_KEY,
+            {str(reminder_id): _score(moment) for reminder_id, moment in schedule.items()}
+        )
+        return True
+    except RedisError as e:
+        # Потерянные записи подберет сканирование БД check_due_reminders
+        mark_unavailable(e)
+        return False
+
+
+def defer(db: Session, schedule: Dict[int, datetime]) -> None:
+    """
+    Откладывает добавление напоминаний в очередь до коммита сессии
+    """
+    db.info.setdefault(_PENDING_KEY, {}).update(schedule)
+
+
+def pop_due(now: datetime, limit: int) -> List[int]:
+    """
+    Забирает из очереди id напоминаний, время которых наступило
+    """
+    client = get_queue_client()
+    if client is None:
+        return []
+
+    try:
+        ids = client.eval(_POP_DUE_SCRIPT, 1, REMINDER_QUEUE_KEY, _score(now), limit)
+    except RedisError as e:
+        mark_unavailable(e)
+        return []
+
+    return [int(reminder_id) for reminder_id in ids]
+
+
+@event.listens_for(Reminder, "after_insert")
+@event.listens_for(Reminder, "after_update")
+def _track_reminder(mapper, connection, target: Reminder) -> None:
+    """Запоминает активные напоминания для добавления в очередь после коммита"""
+    if target.status == ReminderStatus.ACTIVE and target.is_enabled:
+        session = inspect(target).session
+        if session is not None:
+            defer(session, {target.id: target.scheduled_time})
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_pending(session: Session) -> None:
+    """Отправляет накопленные напоминания в очередь после коммита"""
+    schedule = session.info.pop(_PENDING_KEY, None)
+    if schedule and not enqueue(schedule):
+        # Напоминания остаются ACTIVE в БД и уйдут по сканированию check_due_reminders
+        logger.info(f"{len(schedule)} напоминаний не добавлены в очередь, отправка по сканированию БД")
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    """Отбрасывает накопленные напоминания при откате"""
+    session.info.pop(_PENDING_KEY, None)
@@ -18,10 +18,11 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from detoxbuddy.database.database import SessionLocal, engine
 from detoxbuddy.database.crud.reminder import reminder_crud
+from detoxbuddy.database.crud.achievement import achievement_service
 from detoxbuddy.database.models.reminder import Reminder, ReminderStatus, ReminderType
 from detoxbuddy.core.config_simple import settings
 
@@ -115,14 +116,10 @@ class ReminderScheduler:
     def _schedule_reminder(self, reminder: Reminder):
         """Планирует напоминание в APScheduler"""
         try:
+            # Существующая задача заменяется в add_job (replace_existing=True)
+            # без отдельного удаления из хранилища заданий
             job_id = f"reminder_{reminder.id}"
             
-            # Удаляем существующую задачу если есть
-            try:
-                self.scheduler.remove_job(job_id)
-            except:
-                pass
-            
             if reminder.is_recurring and reminder.repeat_interval:
                 # Повторяющееся напоминание
                 trigger = IntervalTrigger(
@@ -171,7 +168,12 @@ class ReminderScheduler:
         """Задача для отправки напоминания (вызывается APScheduler)"""
         try:
             with SessionLocal() as db:
-                reminder = reminder_crud.get(db, reminder_id)
+                reminder = (
+                    db.query(Reminder)
+                    .options(joinedload(Reminder.user))
+                    .filter(Reminder.id == reminder_id)
+                    .first()
+                )
                 if not reminder:
                     logger.warning(f"Напоминание {reminder_id} не найдено")
                     return
@@ -181,11 +183,27 @@ class ReminderScheduler:
                     return
                 
                 # Отправляем напоминание
+                was_sent = reminder.status == ReminderStatus.SENT
                 self._send_reminder(reminder, db)
                 
                 # Если это повторяющееся напоминание, планируем следующее
+                next_reminder = None
                 if reminder.is_recurring and reminder.repeat_interval:
-                    self._schedule_next_recurring_reminder(reminder, db)
+                    next_reminder = self._schedule_next_recurring_reminder(reminder, db)
+                
+                # Статус отправки и следующее напоминание фиксируются одним коммитом
+                db.commit()
+                
+                # Достижения за напоминания считаются по событию отправки
+                if not was_sent and reminder.status == ReminderStatus.SENT:
+                    try:
+                        achievement_service.record_reminder_sent(db, reminder.user_id)
+                    except Exception as e:
+                        logger.error(f"Ошибка обновления достижений для напоминания {reminder.id}: {e}")
+                
+                if next_reminder:
+                    self._schedule_reminder(next_reminder)
+                    logger.info(f"Запланировано следующее напоминание {next_reminder.id} на {next_reminder.scheduled_time}")
                 
         except Exception as e:
             logger.error(f"Ошибка в задаче отправки напоминания {reminder_id}: {e}")
@@ -205,8 +223,10 @@ class ReminderScheduler:
             try:
                 loop.run_until_complete(self._send_telegram_reminder(reminder, user.telegram_id))
                 
-                # Помечаем как отправленное
-                reminder_crud.mark_as_sent(db, reminder.id)
+                # Помечаем как отправленное (коммит делает вызывающий код)
+                reminder.status = ReminderStatus.SENT
+                reminder.sent_at = datetime.now()
+                reminder.sent_count += 1
                 logger.info(f"Напоминание {reminder.id} отправлено")
                 
             finally:
@@ -214,7 +234,9 @@ class ReminderScheduler:
                 
         except Exception as e:
             logger.error(f"Ошибка отправки напоминания {reminder.id}: {e}")
-            reminder_crud.mark_as_failed(db, reminder.id)
+            reminder.status = ReminderStatus.FAILED
+            reminder.failed_at = datetime.now()
+            reminder.failed_count += 1
     
     async def _send_telegram_reminder(self, reminder: Reminder, user_telegram_id: int):
         """Отправляет напоминание через Telegram"""
@@ -226,12 +248,15 @@ class ReminderScheduler:
             # Формируем сообщение
             message = self._format_reminder_message(reminder)
             
-            # Отправляем сообщение
-            await bot.send_message(
-                chat_id=user_telegram_id,
-                text=message,
-                parse_mode="Markdown"
-            )
+            # Отправляем сообщение; HTTP-клиент бота закрывается до закрытия цикла событий
+            try:
+                await bot.send_message(
+                    chat_id=user_telegram_id,
+                    text=message,
+                    parse_mode="Markdown"
+                )
+            finally:
+                await bot.stop()
             
             logger.info(f"Напоминание отправлено пользователю {user_telegram_id}")
             
@@ -239,8 +264,11 @@ class ReminderScheduler:
             logger.error(f"Ошибка отправки напоминания через Telegram: {e}")
             raise
     
-    def _schedule_next_recurring_reminder(self, reminder: Reminder, db: Session):
-        """Планирует следующее повторяющееся напоминание"""
+    def _schedule_next_recurring_reminder(self, reminder: Reminder, db: Session) -> Optional[Reminder]:
+        """
+        Создает следующее повторяющееся напоминание в SAVEPOINT.
+        Ошибка откатывает только его, не затрагивая отметку об отправке.
+        """
         try:
             # Создаем новое напоминание для следующего раза
             next_time = datetime.now() + timedelta(minutes=reminder.repeat_interval)
@@ -264,16 +292,14 @@ class ReminderScheduler:
                 is_enabled=True
             )
             
-            db.add(new_reminder)
-            db.commit()
-            
-            # Планируем новое напоминание
-            self._schedule_reminder(new_reminder)
+            with db.begin_nested():
+                db.add(new_reminder)
             
-            logger.info(f"Запланировано следующее напоминание {new_reminder.id} на {next_time}")
+            return new_reminder
             
         except Exception as e:
             logger.error(f"Ошибка планирования следующего напоминания: {e}")
+            return None
     
     def _format_reminder_message(self, reminder: Reminder) -> str:
         """Форматирует сообщение напоминания"""
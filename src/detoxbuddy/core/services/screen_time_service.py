@@ -5,11 +5,13 @@
 @created: 2024-08-24
 """
 
+import logging
 from datetime import datetime, date, timedelta
 from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
 
 from ...database.crud.screen_time import screen_time_crud
+from ...database.crud.achievement import achievement_service
 from ...database.schemas.screen_time import (
     ScreenTimeCreate, 
     ScreenTimeUpdate, 
@@ -19,6 +21,8 @@ from ...database.schemas.screen_time import (
 )
 from ...database.models.screen_time import ScreenTime
 
+logger = logging.getLogger(__name__)
+
 
 class ScreenTimeService:
     """Сервис для работы с экранным временем"""
@@ -103,6 +107,12 @@ class ScreenTimeService:
             activity_type=quick_entry.activity_type,
             device_type=quick_entry.device_type
         )
+        # Достижения за экранное время пересчитываются при добавлении записи
+        try:
+            achievement_service.refresh_screen_time_achievements(self.db, user_id)
+        except Exception as e:
+            # Запись уже сохранена, ошибка достижений ее не отменяет
+            logger.error(f"Ошибка обновления достижений экранного времени: {e}")
         return ScreenTimeResponse.model_validate(screen_time)
     
     def get_today_summary(self, user_id: int) -> Dict[str, Any]:
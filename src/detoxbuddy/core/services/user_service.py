@@ -13,7 +13,7 @@ from detoxbuddy.database.crud.user import user_crud
 from detoxbuddy.database.crud.user_settings import user_settings_crud
 from detoxbuddy.database.schemas.user import UserCreate, UserResponse
 from detoxbuddy.database.models.user import User
-from detoxbuddy.database.database import get_db_session
+from detoxbuddy.database.database import get_current_session, get_db_session
 
 
 class UserService:
@@ -37,7 +37,9 @@ class UserService:
         Returns:
             Tuple[User, bool]: Пользователь и флаг "был ли создан"
         """
-        # Используем переданную сессию или создаем новую
+        # Используем переданную сессию, сессию обработчика или создаем новую
+        if db is None:
+            db = get_current_session()
         if db is None:
             db = get_db_session()
             close_db = True
@@ -170,6 +172,8 @@ class UserService:
         Returns:
             Optional[User]: Пользователь, если найден
         """
+        if db is None:
+            db = get_current_session()
         if db is None:
             db = get_db_session()
             close_db = True
@@ -197,6 +201,8 @@ class UserService:
         Returns:
             bool: True, если пользователь был деактивирован
         """
+        if db is None:
+            db = get_current_session()
         if db is None:
             db = get_db_session()
             close_db = True
@@ -228,6 +234,8 @@ class UserService:
         Returns:
             Optional[dict]: Настройки пользователя
         """
+        if db is None:
+            db = get_current_session()
         if db is None:
             db = get_db_session()
             close_db = True
@@ -280,6 +288,8 @@ class UserService:
         Returns:
             bool: True, если настройки были обновлены
         """
+        if db is None:
+            db = get_current_session()
         if db is None:
             db = get_db_session()
             close_db = True
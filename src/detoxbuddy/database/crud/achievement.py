@@ -7,17 +7,51 @@
 
 from datetime import datetime, timedelta
 from typing import List, Optional, Tuple
-from sqlalchemy import select, func, and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import Float, Row, bindparam, case, cast, select, update, func, and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, selectinload
 
 from ..models.achievement import Achievement, UserAchievement, UserLevel, AchievementType
 from ..models.user import User
 from ..models.focus_session import FocusSession, FocusSessionStatus
 from ..models.screen_time import ScreenTime
-from ..models.reminder import Reminder, ReminderStatus
+from ..models.reminder import Reminder
 from .base import CRUDBase
 
 
+# Частые запросы строятся один раз при импорте; значения передаются через bindparam,
+# поэтому каждый вызов берет готовый скомпилированный SQL из кэша SQLAlchemy
+_STMT_USER_ACHIEVEMENTS = (
+    select(UserAchievement)
+    .options(selectinload(UserAchievement.achievement))
+    .where(UserAchievement.user_id == bindparam("user_id"))
+)
+_STMT_COMPLETED_ACHIEVEMENTS = _STMT_USER_ACHIEVEMENTS.where(UserAchievement.is_completed == True)
+_STMT_USER_LEVEL = select(UserLevel).where(UserLevel.user_id == bindparam("user_id"))
+# Отпечаток прогресса достижений пользователя: меняется при любом изменении
+# current_progress или завершении, даже если уровень пользователя не менялся
+_STMT_PROGRESS_VERSION = select(
+    func.count(UserAchievement.id),
+    func.coalesce(func.sum(UserAchievement.current_progress), 0),
+    func.max(UserAchievement.completed_at),
+).where(UserAchievement.user_id == bindparam("user_id"))
+# INSERT ... ON CONFLICT DO NOTHING по диалекту БД (PostgreSQL и резервный SQLite)
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+# Сводка для экрана статистики уровня: производные значения считает БД
+_STMT_LEVEL_SUMMARY = select(
+    UserLevel.level,
+    UserLevel.experience,
+    UserLevel.total_experience,
+    UserLevel.achievements_count,
+    UserLevel.streak_days,
+    UserLevel.max_streak_days,
+    UserLevel.experience_to_next_level.label("experience_to_next_level"),
+    UserLevel.experience_remaining.label("experience_remaining"),
+    UserLevel.progress_to_next_level.label("progress_to_next_level"),
+).where(UserLevel.user_id == bindparam("user_id"))
+
+
 class CRUDAchievement(CRUDBase[Achievement, None, None]):
     """CRUD операции для достижений"""
     
@@ -42,31 +76,48 @@ class CRUDUserAchievement(CRUDBase[UserAchievement, None, None]):
     
     def get_user_achievements(self, db: Session, user_id: int) -> List[UserAchievement]:
         """Получить все достижения пользователя"""
-        stmt = select(UserAchievement).where(UserAchievement.user_id == user_id)
-        return db.execute(stmt).scalars().all()
+        return db.execute(_STMT_USER_ACHIEVEMENTS, {"user_id": user_id}).scalars().all()
     
     def get_completed_achievements(self, db: Session, user_id: int) -> List[UserAchievement]:
         """Получить завершенные достижения пользователя"""
-        stmt = select(UserAchievement).where(
+        return db.execute(_STMT_COMPLETED_ACHIEVEMENTS, {"user_id": user_id}).scalars().all()
+    
+    def count_completed(self, db: Session, user_id: int) -> int:
+        """Количество завершенных достижений пользователя (COUNT без загрузки строк)"""
+        stmt = select(func.count(UserAchievement.id)).where(
             and_(
                 UserAchievement.user_id == user_id,
                 UserAchievement.is_completed == True
             )
         )
-        return db.execute(stmt).scalars().all()
+        return db.execute(stmt).scalar_one()
+    
+    def get_progress_version(self, db: Session, user_id: int) -> tuple:
+        """
+        Версия прогресса достижений пользователя (число записей, сумма прогресса,
+        последнее завершение) - для проверки актуальности закэшированных экранов
+        """
+        return tuple(db.execute(_STMT_PROGRESS_VERSION, {"user_id": user_id}).one())
     
     def get_achievement_progress(self, db: Session, user_id: int, achievement_id: int) -> Optional[UserAchievement]:
         """Получить прогресс по конкретному достижению"""
-        stmt = select(UserAchievement).where(
-            and_(
-                UserAchievement.user_id == user_id,
-                UserAchievement.achievement_id == achievement_id
+        stmt = (
+            select(UserAchievement)
+            .options(selectinload(UserAchievement.achievement))
+            .where(
+                and_(
+                    UserAchievement.user_id == user_id,
+                    UserAchievement.achievement_id == achievement_id
+                )
             )
         )
         return db.execute(stmt).scalar_one_or_none()
     
     def update_progress(self, db: Session, user_id: int, achievement_id: int, progress: int) -> Optional[UserAchievement]:
-        """Обновить прогресс по достижению"""
+        """
+        Обновить прогресс по достижению. Прогресс не уменьшается: пересчет не должен
+        отменять то, что уже засчитано событиями (increment_progress)
+        """
         user_achievement = self.get_achievement_progress(db, user_id, achievement_id)
         
         if not user_achievement:
@@ -77,12 +128,16 @@ class CRUDUserAchievement(CRUDBase[UserAchievement, None, None]):
                 current_progress=progress
             )
             db.add(user_achievement)
-        else:
+        elif progress > user_achievement.current_progress:
             user_achievement.current_progress = progress
         
         # Проверяем, достигнуто ли условие
         achievement = db.get(Achievement, achievement_id)
-        if achievement and progress >= achievement.condition_value and not user_achievement.is_completed:
+        if (
+            achievement
+            and user_achievement.current_progress >= achievement.condition_value
+            and not user_achievement.is_completed
+        ):
             user_achievement.is_completed = True
             user_achievement.completed_at = datetime.utcnow()
         
@@ -90,17 +145,136 @@ class CRUDUserAchievement(CRUDBase[UserAchievement, None, None]):
         db.refresh(user_achievement)
         return user_achievement
     
-    def get_recent_achievements(self, db: Session, user_id: int, days: int = 7) -> List[UserAchievement]:
-        """Получить недавно полученные достижения"""
-        since = datetime.utcnow() - timedelta(days=days)
-        stmt = select(UserAchievement).where(
+    def increment_progress(
+        self, db: Session, user_id: int, achievement_type: AchievementType, delta: int = 1
+    ) -> Optional[List[UserAchievement]]:
+        """
+        Событийное обновление прогресса: current_progress += delta одним UPDATE
+        для всех активных достижений типа, затем отметка достигших цели.
+        Возвращает только что завершенные достижения или None, если у пользователя
+        есть не все записи прогресса по этому типу (нужен полный пересчет).
+        """
+        type_ids = select(Achievement.id).where(
             and_(
-                UserAchievement.user_id == user_id,
-                UserAchievement.is_completed == True,
-                UserAchievement.completed_at >= since
+                Achievement.type == achievement_type,
+                Achievement.is_active == True
+            )
+        )
+        user_rows = and_(
+            UserAchievement.user_id == user_id,
+            UserAchievement.achievement_id.in_(type_ids)
+        )
+        
+        # Активных достижений типа и записей прогресса по ним - одним запросом
+        total, tracked = db.execute(
+            select(
+                select(func.count()).select_from(type_ids.subquery()).scalar_subquery(),
+                select(func.count(UserAchievement.id)).where(user_rows).scalar_subquery()
+            )
+        ).one()
+        if tracked < total:
+            return None
+        
+        db.execute(
+            update(UserAchievement)
+            .where(user_rows)
+            .values(current_progress=UserAchievement.current_progress + delta)
+            .execution_options(synchronize_session=False)
+        )
+        
+        stmt = (
+            select(UserAchievement)
+            .join(UserAchievement.achievement)
+            .options(selectinload(UserAchievement.achievement))
+            .where(
+                and_(
+                    UserAchievement.user_id == user_id,
+                    Achievement.type == achievement_type,
+                    Achievement.is_active == True,
+                    UserAchievement.is_completed == False,
+                    UserAchievement.current_progress >= Achievement.condition_value
+                )
             )
-        ).order_by(UserAchievement.completed_at.desc())
+            .execution_options(populate_existing=True)
+        )
+        newly_completed = db.execute(stmt).scalars().all()
+        now = datetime.utcnow()
+        for user_achievement in newly_completed:
+            user_achievement.is_completed = True
+            user_achievement.completed_at = now
+        
+        db.commit()
+        return newly_completed
+    
+    def get_recent_achievements(
+        self, db: Session, user_id: int, days: int = 7, limit: Optional[int] = None
+    ) -> List[UserAchievement]:
+        """Получить недавно полученные достижения (от новых к старым, не более limit)"""
+        since = datetime.utcnow() - timedelta(days=days)
+        stmt = (
+            select(UserAchievement)
+            .options(selectinload(UserAchievement.achievement))
+            .where(
+                and_(
+                    UserAchievement.user_id == user_id,
+                    UserAchievement.is_completed == True,
+                    UserAchievement.completed_at >= since
+                )
+            )
+            .order_by(UserAchievement.completed_at.desc())
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return db.execute(stmt).scalars().all()
+    
+    def get_closest_to_completion(self, db: Session, user_id: int, limit: int = 5) -> List[UserAchievement]:
+        """Незавершенные достижения, которым осталось меньше всего до цели (сортировка в БД)"""
+        stmt = (
+            select(UserAchievement)
+            .join(UserAchievement.achievement)
+            .options(selectinload(UserAchievement.achievement))
+            .where(
+                and_(
+                    UserAchievement.user_id == user_id,
+                    UserAchievement.is_completed.is_(False)
+                )
+            )
+            .order_by((Achievement.condition_value - UserAchievement.current_progress).asc())
+            .limit(limit)
+        )
         return db.execute(stmt).scalars().all()
+    
+    def get_overachieved(self, db: Session, user_id: int, limit: int = 3) -> List[UserAchievement]:
+        """Завершенные достижения, где прогресс превысил цель"""
+        stmt = (
+            select(UserAchievement)
+            .join(UserAchievement.achievement)
+            .options(selectinload(UserAchievement.achievement))
+            .where(
+                and_(
+                    UserAchievement.user_id == user_id,
+                    UserAchievement.is_completed == True,
+                    UserAchievement.current_progress > Achievement.condition_value
+                )
+            )
+            .order_by(UserAchievement.id)
+            .limit(limit)
+        )
+        return db.execute(stmt).scalars().all()
+    
+    def get_full_snapshot(
+        self, db: Session, user_id: int
+    ) -> Tuple[List[UserAchievement], List[UserAchievement]]:
+        """
+        Все достижения пользователя одним запросом (с описаниями достижений)
+        и производный список завершенных: (все, завершенные).
+        Завершенные отсортированы от новых к старым.
+        """
+        all_achievements = db.execute(_STMT_USER_ACHIEVEMENTS, {"user_id": user_id}).scalars().all()
+        
+        completed = [ua for ua in all_achievements if ua.is_completed]
+        completed.sort(key=lambda ua: ua.completed_at or datetime.min, reverse=True)
+        return all_achievements, completed
 
 
 class CRUDUserLevel(CRUDBase[UserLevel, None, None]):
@@ -108,8 +282,75 @@ class CRUDUserLevel(CRUDBase[UserLevel, None, None]):
     
     def get_user_level(self, db: Session, user_id: int) -> Optional[UserLevel]:
         """Получить уровень пользователя"""
-        stmt = select(UserLevel).where(UserLevel.user_id == user_id)
-        return db.execute(stmt).scalar_one_or_none()
+        return db.execute(_STMT_USER_LEVEL, {"user_id": user_id}).scalar_one_or_none()
+    
+    def get_level_summary(self, db: Session, user_id: int) -> Optional[Row]:
+        """Числа уровня одной строкой (без загрузки объекта UserLevel)"""
+        return db.execute(_STMT_LEVEL_SUMMARY, {"user_id": user_id}).one_or_none()
+    
+    def get_profile_snapshot(self, db: Session, user_id: int, days: int = 30) -> Optional[Row]:
+        """
+        Все числа /profile одним запросом: уровень (через LEFT JOIN, поля None, если
+        уровня еще нет), сессии фокуса и экранное время за days дней, последнее достижение.
+        """
+        since = datetime.now() - timedelta(days=days)
+        
+        completed_sessions = and_(
+            FocusSession.user_id == user_id,
+            FocusSession.status == FocusSessionStatus.COMPLETED,
+            FocusSession.created_at >= since
+        )
+        # Как FocusSession.effective_duration_minutes: фактическая длительность без пауз или плановая
+        effective_minutes = case(
+            (func.coalesce(FocusSession.actual_duration, 0) != 0,
+             FocusSession.actual_duration - FocusSession.paused_duration),
+            else_=FocusSession.planned_duration
+        )
+        screen_rows = and_(
+            ScreenTime.user_id == user_id,
+            ScreenTime.date >= since.date()
+        )
+        
+        stmt = (
+            select(
+                UserLevel.level,
+                UserLevel.experience,
+                UserLevel.experience_to_next_level.label("experience_to_next_level"),
+                UserLevel.achievements_count,
+                UserLevel.streak_days,
+                select(func.count(FocusSession.id))
+                .where(completed_sessions)
+                .scalar_subquery().label("focus_sessions"),
+                select(func.coalesce(func.sum(effective_minutes), 0))
+                .where(completed_sessions)
+                .scalar_subquery().label("focus_minutes"),
+                # Среднее за день с записями: сумма минут / число разных дат
+                select(
+                    func.coalesce(
+                        cast(func.sum(ScreenTime.total_minutes), Float)
+                        / func.nullif(func.count(func.distinct(ScreenTime.date)), 0),
+                        0
+                    )
+                )
+                .where(screen_rows)
+                .scalar_subquery().label("avg_screen_minutes"),
+                select(Achievement.name)
+                .join(UserAchievement, UserAchievement.achievement_id == Achievement.id)
+                .where(
+                    and_(
+                        UserAchievement.user_id == user_id,
+                        UserAchievement.is_completed == True
+                    )
+                )
+                .order_by(UserAchievement.completed_at.desc())
+                .limit(1)
+                .scalar_subquery().label("last_achievement"),
+            )
+            .select_from(User)
+            .outerjoin(UserLevel, UserLevel.user_id == User.id)
+            .where(User.id == user_id)
+        )
+        return db.execute(stmt).one_or_none()
     
     def create_user_level(self, db: Session, user_id: int) -> UserLevel:
         """Создать уровень для пользователя"""
@@ -119,11 +360,34 @@ class CRUDUserLevel(CRUDBase[UserLevel, None, None]):
         db.refresh(user_level)
         return user_level
     
+    def get_or_create(self, db: Session, user_id: int) -> UserLevel:
+        """
+        Уровень пользователя; если его нет - создается.
+        Обычно это один SELECT; для нового пользователя - INSERT ... ON CONFLICT DO NOTHING
+        RETURNING, так что параллельные запросы не создают дубль и не падают на unique.
+        """
+        user_level = self.get_user_level(db, user_id)
+        if user_level is not None:
+            return user_level
+        
+        insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if insert is None:
+            return self.create_user_level(db, user_id)
+        
+        stmt = (
+            insert(UserLevel)
+            .values(user_id=user_id)
+            .on_conflict_do_nothing(index_elements=[UserLevel.user_id])
+            .returning(UserLevel)
+        )
+        user_level = db.scalars(stmt).one_or_none()
+        db.commit()
+        # Пустой RETURNING: строку только что вставил параллельный запрос
+        return user_level if user_level is not None else self.get_user_level(db, user_id)
+    
     def add_experience(self, db: Session, user_id: int, experience: int) -> Tuple[UserLevel, bool]:
         """Добавить опыт пользователю. Возвращает (уровень, повысился_ли_уровень)"""
-        user_level = self.get_user_level(user_id)
-        if not user_level:
-            user_level = self.create_user_level(db, user_id)
+        user_level = self.get_or_create(db, user_id)
         
         old_level = user_level.level
         user_level.experience += experience
@@ -144,9 +408,7 @@ class CRUDUserLevel(CRUDBase[UserLevel, None, None]):
     
     def update_achievements_count(self, db: Session, user_id: int, count: int) -> UserLevel:
         """Обновить количество достижений"""
-        user_level = self.get_user_level(db, user_id)
-        if not user_level:
-            user_level = self.create_user_level(db, user_id)
+        user_level = self.get_or_create(db, user_id)
         
         user_level.achievements_count = count
         db.commit()
@@ -155,9 +417,7 @@ class CRUDUserLevel(CRUDBase[UserLevel, None, None]):
     
     def update_streak_days(self, db: Session, user_id: int, streak_days: int) -> UserLevel:
         """Обновить серию дней"""
-        user_level = self.get_user_level(user_id)
-        if not user_level:
-            user_level = self.create_user_level(db, user_id)
+        user_level = self.get_or_create(db, user_id)
         
         user_level.streak_days = streak_days
         if streak_days > user_level.max_streak_days:
@@ -253,16 +513,14 @@ class AchievementService:
         achievements = self.achievement_crud.get_by_type(db, AchievementType.REMINDERS_COMPLETED)
         completed_achievements = []
         
+        # Считаем все доставки, как события record_reminder_sent: повторяющееся
+        # напоминание после отправки снова ACTIVE, но его sent_count растет
+        stmt = select(func.coalesce(func.sum(Reminder.sent_count), 0)).where(
+            Reminder.user_id == user_id
+        )
+        completed_reminders = db.execute(stmt).scalar()
+        
         for achievement in achievements:
-            # Подсчитываем выполненные напоминания
-            stmt = select(func.count(Reminder.id)).where(
-                and_(
-                    Reminder.user_id == user_id,
-                    Reminder.status == ReminderStatus.SENT
-                )
-            )
-            completed_reminders = db.execute(stmt).scalar()
-            
             user_achievement = self.user_achievement_crud.update_progress(
                 db, user_id, achievement.id, completed_reminders
             )
@@ -273,7 +531,11 @@ class AchievementService:
         return completed_achievements
     
     def check_all_achievements(self, db: Session, user_id: int) -> List[UserAchievement]:
-        """Проверить все достижения пользователя"""
+        """
+        Проверить все достижения пользователя (полный пересчет).
+        В обычной работе прогресс обновляется событиями (record_*);
+        пересчет нужен для исправления расхождений, см. задачу recheck_achievements.
+        """
         all_completed = []
         
         all_completed.extend(self.check_focus_session_achievements(db, user_id))
@@ -281,12 +543,61 @@ class AchievementService:
         all_completed.extend(self.check_streak_achievements(db, user_id))
         all_completed.extend(self.check_reminder_achievements(db, user_id))
         
-        # Обновляем количество достижений в уровне
-        completed_count = len(self.user_achievement_crud.get_completed_achievements(db, user_id))
+        # Обновляем количество достижений в уровне (пересчет сверяет счетчик с таблицей)
+        completed_count = self.user_achievement_crud.count_completed(db, user_id)
         self.user_level_crud.update_achievements_count(db, user_id, completed_count)
         
         return all_completed
     
+    def record_focus_session_completed(self, db: Session, user_id: int) -> List[UserAchievement]:
+        """Событие: пользователь завершил сессию фокуса. Возвращает только что полученные достижения"""
+        return self._apply_event(
+            db, user_id, AchievementType.FOCUS_SESSIONS, self.check_focus_session_achievements
+        )
+    
+    def record_reminder_sent(self, db: Session, user_id: int, count: int = 1) -> List[UserAchievement]:
+        """
+        Событие: отправлено count напоминаний пользователя (пачка засчитывается одним UPDATE).
+        Возвращает только что полученные достижения
+        """
+        return self._apply_event(
+            db, user_id, AchievementType.REMINDERS_COMPLETED, self.check_reminder_achievements, count
+        )
+    
+    def refresh_screen_time_achievements(self, db: Session, user_id: int) -> List[UserAchievement]:
+        """
+        Событие: добавлено экранное время. Прогресс зависит от среднего за неделю,
+        а не от счетчика, поэтому пересчитывается только этот тип достижений.
+        """
+        return self._recheck_type(db, user_id, self.check_screen_time_achievements)
+    
+    def _apply_event(
+        self, db: Session, user_id: int, achievement_type: AchievementType, check, delta: int = 1
+    ) -> List[UserAchievement]:
+        """Инкремент прогресса по событию; без записей прогресса - пересчет типа через check"""
+        newly_completed = self.user_achievement_crud.increment_progress(db, user_id, achievement_type, delta)
+        if newly_completed is None:
+            return self._recheck_type(db, user_id, check)
+        
+        if newly_completed:
+            self._sync_achievements_count(db, user_id)
+        return newly_completed
+    
+    def _recheck_type(self, db: Session, user_id: int, check) -> List[UserAchievement]:
+        """Полный пересчет одного типа; возвращает только впервые завершенные достижения"""
+        completed_before = {
+            ua.achievement_id for ua in self.user_achievement_crud.get_completed_achievements(db, user_id)
+        }
+        newly_completed = [ua for ua in check(db, user_id) if ua.achievement_id not in completed_before]
+        if newly_completed:
+            self._sync_achievements_count(db, user_id)
+        return newly_completed
+    
+    def _sync_achievements_count(self, db: Session, user_id: int) -> None:
+        """Счетчик завершенных достижений в уровне (по нему строятся /achievements и /profile)"""
+        completed_count = self.user_achievement_crud.count_completed(db, user_id)
+        self.user_level_crud.update_achievements_count(db, user_id, completed_count)
+    
     def award_experience_for_achievement(self, db: Session, user_id: int, achievement: Achievement) -> Tuple[UserLevel, bool]:
         """Наградить опытом за достижение"""
         return self.user_level_crud.add_experience(db, user_id, achievement.points)
@@ -5,14 +5,18 @@
 @created: 2024-12-19
 """
 
+import logging
 from datetime import datetime, timedelta
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc
 
 from ..models.focus_session import FocusSession, FocusSessionStatus, FocusSessionType
+from .achievement import achievement_service, user_level_crud
 from .base import CRUDBase
 
+logger = logging.getLogger(__name__)
+
 
 class CRUDFocusSession(CRUDBase[FocusSession, None, None]):
     """CRUD операции для сессий фокуса"""
@@ -88,9 +92,6 @@ class CRUDFocusSession(CRUDBase[FocusSession, None, None]):
 
     def pause_session(self, db: Session, session_id: int) -> Optional[FocusSession]:
         """Приостановить сессию"""
-        import logging
-        logger = logging.getLogger(__name__)
-        
         logger.info(f"Attempting to pause session {session_id}")
         session = self.get(db, session_id)
         logger.info(f"Retrieved session: {session}")
@@ -154,10 +155,8 @@ class CRUDFocusSession(CRUDBase[FocusSession, None, None]):
         
         # Проверяем достижения после завершения сессии
         try:
-            from ..crud.achievement import achievement_service, user_level_crud
-            
-            # Проверяем достижения
-            completed_achievements = achievement_service.check_focus_session_achievements(db, session.user_id)
+            # Обновляем прогресс достижений по событию (только что полученные)
+            completed_achievements = achievement_service.record_focus_session_completed(db, session.user_id)
             
             # Награждаем опытом за завершение сессии
             experience_gained = 10  # Базовый опыт за сессию
@@ -172,8 +171,7 @@ class CRUDFocusSession(CRUDBase[FocusSession, None, None]):
             
         except Exception as e:
             # Логируем ошибку, но не прерываем выполнение
-            import logging
-            logging.error(f"Error checking achievements after session completion: {e}")
+            logger.error(f"Error checking achievements after session completion: {e}")
         
         return session
 
@@ -5,15 +5,19 @@
 @created: 2024-08-24
 """
 
-from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Dict, Any
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy import Row, and_, or_, func, desc, asc, delete
 
 from detoxbuddy.database.crud.base import CRUDBase
 from detoxbuddy.database.models.reminder import Reminder, ReminderStatus, ReminderType
 from detoxbuddy.database.schemas.reminder import ReminderCreate, ReminderUpdate, ReminderFilter
 
+# Коды дней недели (понедельник = 0); бит i маски дней соответствует WEEKDAY_CODES[i]
+WEEKDAY_CODES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
 
 class CRUDReminder(CRUDBase[Reminder, ReminderCreate, ReminderUpdate]):
     """CRUD операции для напоминаний"""
@@ -303,49 +307,55 @@ class CRUDReminder(CRUDBase[Reminder, ReminderCreate, ReminderUpdate]):
         db.commit()
         return result
     
+    def delete_if_owned(self, db: Session, *, id: int, user_id: int) -> Optional[str]:
+        """
+        Удаляет напоминание, только если оно принадлежит пользователю.
+        Один DELETE ... RETURNING вместо SELECT + проверки + DELETE.
+        Возвращает название удаленного напоминания или None.
+        """
+        title = db.execute(
+            delete(self.model)
+            .where(self.model.id == id, self.model.user_id == user_id)
+            .returning(self.model.title)
+        ).scalar_one_or_none()
+        db.commit()
+        return title
+    
     def get_reminders_stats(self, db: Session, user_id: int) -> Dict[str, Any]:
-        """Получает статистику напоминаний для отображения в боте"""
-        # Общая статистика
-        total = db.query(func.count(self.model.id)).filter(self.model.user_id == user_id).scalar()
-        active = db.query(func.count(self.model.id)).filter(
-            and_(self.model.user_id == user_id, self.model.status == ReminderStatus.ACTIVE)
-        ).scalar()
-        sent = db.query(func.count(self.model.id)).filter(
-            and_(self.model.user_id == user_id, self.model.status == ReminderStatus.SENT)
-        ).scalar()
-        cancelled = db.query(func.count(self.model.id)).filter(
-            and_(self.model.user_id == user_id, self.model.status == ReminderStatus.CANCELLED)
-        ).scalar()
-        expired = db.query(func.count(self.model.id)).filter(
-            and_(self.model.user_id == user_id, self.model.status == ReminderStatus.EXPIRED)
-        ).scalar()
-        
-        # За последние 7 дней
+        """
+        Получает статистику напоминаний для отображения в боте.
+        Все счетчики считаются одним агрегатным запросом (COUNT ... FILTER).
+        """
         week_ago = datetime.now() - timedelta(days=7)
-        last_7_days = db.query(func.count(self.model.id)).filter(
-            and_(
-                self.model.user_id == user_id,
-                self.model.created_at >= week_ago
-            )
-        ).scalar()
-        
-        # Статистика повторяющихся напоминаний
-        recurring = db.query(func.count(self.model.id)).filter(
-            and_(
-                self.model.user_id == user_id,
-                self.model.is_recurring == True
-            )
-        ).scalar()
-        
-        return {
-            "total": total or 0,
-            "active": active or 0,
-            "sent": sent or 0,
-            "cancelled": cancelled or 0,
-            "expired": expired or 0,
-            "last_7_days": last_7_days or 0,
-            "recurring": recurring or 0
-        }
+        count = func.count(self.model.id)
+        row = db.query(
+            count.label("total"),
+            count.filter(self.model.status == ReminderStatus.ACTIVE).label("active"),
+            count.filter(self.model.status == ReminderStatus.SENT).label("sent"),
+            count.filter(self.model.status == ReminderStatus.CANCELLED).label("cancelled"),
+            count.filter(self.model.status == ReminderStatus.EXPIRED).label("expired"),
+            # За последние 7 дней
+            count.filter(self.model.created_at >= week_ago).label("last_7_days"),
+            # Повторяющиеся напоминания
+            count.filter(self.model.is_recurring == True).label("recurring"),
+            # Активные повторяющиеся (столько же строк, сколько у get_recurring_reminders)
+            count.filter(
+                self.model.is_recurring == True,
+                self.model.status == ReminderStatus.ACTIVE
+            ).label("recurring_active"),
+        ).filter(self.model.user_id == user_id).one()
+        
+        return {key: value or 0 for key, value in row._asdict().items()}
+    
+    def get_list_and_stats(
+        self, db: Session, user_id: int, limit: int = 10
+    ) -> Tuple[List[Reminder], Dict[str, Any]]:
+        """
+        Список напоминаний для бота и их статистика за одно обращение:
+        экраны списка и статистики используют общий результат.
+        """
+        reminders = self.get_reminders_for_telegram_bot(db, user_id=user_id, limit=limit)
+        return reminders, self.get_reminders_stats(db, user_id=user_id)
     
     def create_recurring_reminder(
         self,
@@ -443,20 +453,23 @@ class CRUDReminder(CRUDBase[Reminder, ReminderCreate, ReminderUpdate]):
         user_id: int,
         title: str,
         message: Optional[str],
-        days_of_week: List[str],
+        days_mask: int,
         reminder_time: datetime.time,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         max_send_count: Optional[int] = None,
         priority: int = 1
     ) -> Reminder:
-        """Создает еженедельное напоминание"""
+        """
+        Создает еженедельное напоминание.
+        days_mask - битовая маска дней недели: бит 0 - понедельник, бит 6 - воскресенье.
+        """
         if not message:
             message = title
         
         # Если не указана дата начала, используем следующий подходящий день
         if not start_date:
-            start_date = self._get_next_weekly_date(days_of_week, reminder_time)
+            start_date = self._get_next_weekly_date(days_mask, reminder_time)
         
         reminder = Reminder(
             user_id=user_id,
@@ -465,7 +478,8 @@ class CRUDReminder(CRUDBase[Reminder, ReminderCreate, ReminderUpdate]):
             reminder_type=ReminderType.WEEKLY,
             scheduled_time=start_date,
             reminder_time=reminder_time,
-            repeat_days=','.join(days_of_week),
+            # JSON массив кодов дней, как его читает планировщик
+            repeat_days=json.dumps([code for i, code in enumerate(WEEKDAY_CODES) if days_mask >> i & 1]),
             is_recurring=True,
             expires_at=end_date,
             max_send_count=max_send_count,
@@ -479,36 +493,24 @@ class CRUDReminder(CRUDBase[Reminder, ReminderCreate, ReminderUpdate]):
         db.refresh(reminder)
         return reminder
     
-    def _get_next_weekly_date(self, days_of_week: List[str], reminder_time: datetime.time) -> datetime:
-        """Вычисляет следующую дату для еженедельного напоминания"""
-        from datetime import date
-        
-        # Маппинг дней недели
-        day_mapping = {
-            'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6,
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6
-        }
-        
+    def _get_next_weekly_date(self, days_mask: int, reminder_time: datetime.time) -> datetime:
+        """Вычисляет следующую дату для еженедельного напоминания (не раньше завтрашнего дня)"""
         today = date.today()
         current_weekday = today.weekday()
         
-        # Находим следующий подходящий день
-        for day_name in days_of_week:
-            day_num = day_mapping.get(day_name.lower())
-            if day_num is not None:
-                days_ahead = day_num - current_weekday
-                if days_ahead <= 0:  # Если день уже прошел на этой неделе
-                    days_ahead += 7
-                
-                next_date = today + timedelta(days=days_ahead)
-                return datetime.combine(next_date, reminder_time)
-        
-        # Fallback - следующий понедельник
+        # Ближайший отмеченный в маске день после сегодняшнего
+        for days_ahead in range(1, 8):
+            if days_mask >> ((current_weekday + days_ahead) % 7) & 1:
+                return datetime.combine(today + timedelta(days=days_ahead), reminder_time)
+        
+        # Fallback - через неделю
         return datetime.combine(today + timedelta(days=7), reminder_time)
     
-    def get_recurring_reminders(self, db: Session, user_id: int) -> List[Reminder]:
-        """Получает все повторяющиеся напоминания пользователя"""
-        return (
+    def get_recurring_reminders(
+        self, db: Session, user_id: int, limit: Optional[int] = None
+    ) -> List[Reminder]:
+        """Получает повторяющиеся напоминания пользователя (все или первые limit)"""
+        query = (
             db.query(self.model)
             .filter(
                 and_(
@@ -518,9 +520,49 @@ class CRUDReminder(CRUDBase[Reminder, ReminderCreate, ReminderUpdate]):
                 )
             )
             .order_by(asc(self.model.scheduled_time))
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    def list_recurring_for_display(self, db: Session, user_id: int, limit: int = 10) -> List[Row]:
+        """
+        Первые limit повторяющихся напоминаний для экранов бота: только
+        отображаемые колонки (строки Row), без создания ORM-объектов.
+        """
+        model = self.model
+        return (
+            db.query(
+                model.id,
+                model.title,
+                model.is_enabled,
+                model.reminder_type,
+                model.scheduled_time,
+                model.is_recurring,
+                model.repeat_interval,
+                model.priority,
+            )
+            .filter(
+                model.user_id == user_id,
+                model.is_recurring == True,
+                model.status == ReminderStatus.ACTIVE
+            )
+            .order_by(asc(model.scheduled_time))
+            .limit(limit)
             .all()
         )
     
+    def get_recurring_and_stats(
+        self, db: Session, user_id: int, limit: int = 10
+    ) -> Tuple[List[Row], Dict[str, Any]]:
+        """
+        Первые limit повторяющихся напоминаний и статистика за одно обращение:
+        экраны /recurring (список, настройки, статистика) используют общий результат.
+        Общее число активных повторяющихся - stats["recurring_active"].
+        """
+        reminders = self.list_recurring_for_display(db, user_id, limit=limit)
+        return reminders, self.get_reminders_stats(db, user_id=user_id)
+    
     def pause_recurring_reminder(self, db: Session, reminder_id: int) -> Optional[Reminder]:
         """Приостанавливает повторяющееся напоминание"""
         reminder = db.query(self.model).filter(self.model.id == reminder_id).first()
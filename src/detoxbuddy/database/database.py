@@ -5,10 +5,12 @@
 @created: 2024-08-24
 """
 
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
-from typing import Generator
+from typing import Generator, Iterator, Optional
 
 from detoxbuddy.core.config_simple import settings
 from .models import Base
@@ -24,13 +26,21 @@ if settings.database_url:
         # Продакшн/разработка с реальной БД
         engine = create_engine(
             settings.database_url,
+            pool_size=20,
+            max_overflow=30,
+            pool_timeout=30,
+            pool_recycle=3600,
             pool_pre_ping=True,
-            pool_recycle=300,
+            # Последнее возвращенное соединение выдается первым: под низкой нагрузкой
+            # используются несколько "теплых" соединений, лишние закрываются по pool_recycle
+            pool_use_lifo=True,
+            # Кэш скомпилированных запросов с запасом на все CRUD-запросы приложения
+            query_cache_size=1200,
             echo=settings.debug
         )
         # Проверяем подключение
         with engine.connect() as conn:
-            conn.execute("SELECT 1")
+            conn.execute(text("SELECT 1"))
         print(f"✅ Подключено к базе данных: {settings.database_url}")
     except Exception as e:
         print(f"❌ Не удалось подключиться к PostgreSQL: {e}")
@@ -52,7 +62,11 @@ else:
     print("✅ Используется SQLite база данных: ./data/detoxbuddy.db")
 
 # Создание фабрики сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: после commit атрибуты объектов читаются без повторного SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Регистрируем обработчики, которые ставят новые напоминания в очередь Redis
+from detoxbuddy.core import reminder_queue  # noqa: E402,F401
 
 # Автоматически создаем таблицы при импорте модуля
 try:
@@ -90,6 +104,37 @@ def get_db_session() -> Session:
     return SessionLocal()
 
 
+# Сессия, открытая на время обработки текущего запроса (см. session_scope)
+_current_session: ContextVar[Optional[Session]] = ContextVar("db_session", default=None)
+
+
+def get_current_session() -> Optional[Session]:
+    """
+    Возвращает сессию текущего обработчика или None, если она не открыта.
+    """
+    return _current_session.get()
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Одна сессия на весь обработчик.
+    Вложенные вызовы переиспользуют уже открытую сессию и не закрывают её.
+    """
+    db = _current_session.get()
+    if db is not None:
+        yield db
+        return
+    
+    db = SessionLocal()
+    token = _current_session.set(db)
+    try:
+        yield db
+    finally:
+        _current_session.reset(token)
+        db.close()
+
+
 def init_db() -> None:
     """
     Инициализация базы данных.
@@ -7,7 +7,8 @@
 
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import String, DateTime, Boolean, Integer, Text, Enum, ForeignKey
+from sqlalchemy import String, DateTime, Boolean, Integer, Text, Enum, ForeignKey, Float, case, cast
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 
@@ -120,15 +121,28 @@ class UserLevel(Base):
     def __repr__(self) -> str:
         return f"UserLevel(user_id={self.user_id}, level={self.level}, exp={self.experience})"
 
-    @property
+    @hybrid_property
     def experience_to_next_level(self) -> int:
         """Опыт, необходимый для следующего уровня"""
         return self.level * 100  # Простая формула: уровень * 100
 
-    @property
+    @hybrid_property
+    def experience_remaining(self) -> int:
+        """Сколько опыта осталось до следующего уровня"""
+        return self.experience_to_next_level - self.experience
+
+    @hybrid_property
     def progress_to_next_level(self) -> float:
         """Прогресс до следующего уровня (0.0 - 1.0)"""
         exp_needed = self.experience_to_next_level
         if exp_needed == 0:
             return 1.0
         return min(self.experience / exp_needed, 1.0)
+
+    @progress_to_next_level.inplace.expression
+    @classmethod
+    def _progress_to_next_level_expression(cls):
+        """То же в SQL: вычисляется в запросе, без загрузки объекта"""
+        exp_needed = cls.level * 100
+        progress = cast(cls.experience, Float) / exp_needed
+        return case((exp_needed == 0, 1.0), (progress > 1.0, 1.0), else_=progress)
@@ -7,7 +7,7 @@
 
 from datetime import datetime, time
 from typing import Optional
-from sqlalchemy import String, DateTime, Boolean, Integer, Time, Text, Enum
+from sqlalchemy import String, DateTime, Boolean, Integer, Time, Text, Enum, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import ForeignKey
 import enum
@@ -41,6 +41,15 @@ class Reminder(Base):
     Управляет системой уведомлений и напоминаний.
     """
     __tablename__ = "reminders"
+    __table_args__ = (
+        # Частичный индекс только по "горячим" напоминаниям для check_due_reminders
+        Index(
+            "ix_reminder_due",
+            "scheduled_time",
+            postgresql_where=text("status = 'ACTIVE' AND is_enabled = true"),
+            sqlite_where=text("status = 'ACTIVE' AND is_enabled = 1"),
+        ),
+    )
 
     # Основные поля
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -87,8 +96,8 @@ class Reminder(Base):
     )
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
-    # Связи
-    user: Mapped["User"] = relationship(back_populates="reminders")
+    # Связи (lazy="raise": пользователь загружается только явно через joinedload)
+    user: Mapped["User"] = relationship(back_populates="reminders", lazy="raise")
 
     def __repr__(self) -> str:
         return f"Reminder(id={self.id}, title='{self.title}', type={self.reminder_type.value}, status={self.status.value})"
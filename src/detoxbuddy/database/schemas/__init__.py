@@ -15,6 +15,7 @@ from .screen_time import (
     ScreenTimeStats,
     QuickScreenTimeEntry
 )
+from .pagination import pagination_headers
 
 __all__ = [
     "UserCreate",
@@ -29,5 +30,6 @@ __all__ = [
     "ScreenTimeUpdate",
     "ScreenTimeList",
     "ScreenTimeStats",
-    "QuickScreenTimeEntry"
+    "QuickScreenTimeEntry",
+    "pagination_headers"
 ]
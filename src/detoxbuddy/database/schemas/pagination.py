@@ -0,0 +1,25 @@
+"""
+@file: pagination.py
+@description: Метаданные пагинации для списковых ответов API
+@dependencies: math, typing
+@created: 2026-10-16
+"""
+
+import math
+from typing import Dict
+
+
+def pagination_headers(total: int, page: int, size: int) -> Dict[str, str]:
+    """
+    Формирует заголовки пагинации для списковых ответов.
+
+    Списки (ReminderList, ScreenTimeList, UserList) сериализуются в
+    JSON-массив, а метаданные страницы передаются в заголовках ответа.
+    """
+    pages = math.ceil(total / size) if size > 0 else 0
+    return {
+        "X-Total-Count": str(total),
+        "X-Page": str(page),
+        "X-Page-Size": str(size),
+        "X-Total-Pages": str(pages),
+    }
@@ -7,7 +7,7 @@
 
 from datetime import datetime, time
 from typing import Optional, List
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, RootModel, validator
 from enum import Enum
 
 from detoxbuddy.database.models.reminder import ReminderType, ReminderStatus
@@ -104,17 +104,19 @@ class ReminderResponse(ReminderBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        revalidate_instances="never",
+        arbitrary_types_allowed=False,
+    )
 
 
-class ReminderList(BaseModel):
-    """Схема для списка напоминаний"""
-    reminders: List[ReminderResponse]
-    total: int
-    page: int
-    size: int
-    pages: int
+class ReminderList(RootModel[List[ReminderResponse]]):
+    """
+    Схема для списка напоминаний.
+    Сериализуется в JSON-массив, пагинация передается заголовками (см. pagination_headers).
+    """
 
 
 class ReminderFilter(BaseModel):
@@ -7,7 +7,7 @@
 
 from datetime import datetime, date
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, RootModel, validator
 
 
 class ScreenTimeBase(BaseModel):
@@ -114,17 +114,19 @@ class ScreenTimeResponse(ScreenTimeBase):
     is_within_limit: bool
     limit_usage_percentage: float
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        revalidate_instances="never",
+        arbitrary_types_allowed=False,
+    )
 
 
-class ScreenTimeList(BaseModel):
-    """Схема для списка записей экранного времени"""
-    items: list[ScreenTimeResponse]
-    total: int
-    page: int
-    size: int
-    pages: int
+class ScreenTimeList(RootModel[list[ScreenTimeResponse]]):
+    """
+    Схема для списка записей экранного времени.
+    Сериализуется в JSON-массив, пагинация передается заголовками (см. pagination_headers).
+    """
 
 
 class ScreenTimeStats(BaseModel):
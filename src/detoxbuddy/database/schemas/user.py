@@ -7,7 +7,7 @@
 
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, RootModel
 
 
 class UserBase(BaseModel):
@@ -48,6 +48,13 @@ class UserInDB(UserBase):
 class UserResponse(UserInDB):
     """Схема ответа с информацией о пользователе"""
     full_name: Optional[str] = Field(None, description="Полное имя пользователя")
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        revalidate_instances="never",
+        arbitrary_types_allowed=False,
+    )
     
     @property
     def full_name_computed(self) -> str:
@@ -62,10 +69,8 @@ class UserResponse(UserInDB):
             return f"User {self.telegram_id}"
 
 
-class UserList(BaseModel):
-    """Схема для списка пользователей"""
-    users: list[UserResponse] = Field(..., description="Список пользователей")
-    total: int = Field(..., description="Общее количество пользователей")
-    page: int = Field(..., description="Номер страницы")
-    size: int = Field(..., description="Размер страницы")
-    pages: int = Field(..., description="Общее количество страниц")
+class UserList(RootModel[list[UserResponse]]):
+    """
+    Схема для списка пользователей.
+    Сериализуется в JSON-массив, пагинация передается заголовками (см. pagination_headers).
+    """
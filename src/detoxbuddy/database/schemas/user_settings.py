@@ -71,4 +71,9 @@ class UserSettingsInDB(UserSettingsBase):
 
 class UserSettingsResponse(UserSettingsInDB):
     """Схема ответа с настройками пользователя"""
-    pass
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        revalidate_instances="never",
+        arbitrary_types_allowed=False,
+    )
@@ -0,0 +1,71 @@
+"""
+@file: achievement_tasks.py
+@description: Задачи Celery для обслуживания системы достижений
+@dependencies: celery, sqlalchemy, models, crud.achievement
+@created: 2026-10-16
+"""
+
+import logging
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from detoxbuddy.core.celery_app import celery_app
+from detoxbuddy.database.crud.achievement import achievement_service
+from detoxbuddy.database.database import SessionLocal
+from detoxbuddy.database.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Сколько пользователей пересчитывается в одной сессии БД
+RECHECK_BATCH_SIZE = 200
+
+
+def _recheck_users(user_ids: List[int]) -> int:
+    """
+    Полный пересчет достижений пользователей; ошибка одного пользователя
+    не прерывает пересчет остальных. Возвращает число пересчитанных
+    """
+    rechecked = 0
+    with SessionLocal() as db:
+        for user_id in user_ids:
+            try:
+                achievement_service.check_all_achievements(db, user_id)
+                rechecked += 1
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Ошибка пересчета достижений пользователя {user_id}: {e}")
+    return rechecked
+
+
+@celery_app.task(bind=True, name="app.tasks.achievement_tasks.recheck_achievements")
+def recheck_achievements(self, user_ids: Optional[List[int]] = None):
+    """
+    Исправляет расхождения событийного прогресса достижений полным пересчетом.
+    Без user_ids пересчитываются все активные пользователи пачками по RECHECK_BATCH_SIZE
+    """
+    try:
+        if user_ids is not None:
+            rechecked = _recheck_users(user_ids)
+        else:
+            rechecked = 0
+            last_id = 0
+            while True:
+                with SessionLocal() as db:
+                    batch = db.execute(
+                        select(User.id)
+                        .where(User.is_active == True, User.id > last_id)
+                        .order_by(User.id)
+                        .limit(RECHECK_BATCH_SIZE)
+                    ).scalars().all()
+                if not batch:
+                    break
+                rechecked += _recheck_users(batch)
+                last_id = batch[-1]
+
+        logger.info(f"Достижения пересчитаны для {rechecked} пользователей")
+        return {"status": "success", "rechecked": rechecked}
+
+    except Exception as e:
+        logger.error(f"Ошибка при пересчете достижений: {e}")
+        raise
@@ -1,27 +1,389 @@
 """
 @file: reminder_tasks.py
 @description: Задачи Celery для системы напоминаний
-@dependencies: celery, sqlalchemy, telegram_bot, models
+@dependencies: celery, sqlalchemy, python-telegram-bot, models
 @created: 2024-08-24
 """
 
+import asyncio
+import concurrent.futures
 import json
 import logging
+import threading
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from celery import current_task
-from sqlalchemy.orm import Session
+from celery import current_task, group
+from celery.signals import worker_process_init
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.orm import Session, joinedload, load_only, raiseload
+from telegram import Bot
+from telegram.request import HTTPXRequest
 
+from detoxbuddy.core import reminder_queue
 from detoxbuddy.core.celery_app import celery_app
+from detoxbuddy.database.crud.achievement import achievement_service
 from detoxbuddy.database.database import SessionLocal
 from detoxbuddy.database.models.reminder import Reminder, ReminderStatus, ReminderType
 from detoxbuddy.database.models.user import User
-from detoxbuddy.telegram.bot.telegram_bot import TelegramBot
 from detoxbuddy.core.config_simple import settings
 
 logger = logging.getLogger(__name__)
 
+# Максимальное число напоминаний, захватываемых за один тик beat
+CLAIM_BATCH_LIMIT = 1000
+
+# Размер пачки напоминаний, отправляемых одной задачей
+SEND_CHUNK_SIZE = 64
+
+# Эмодзи для типов напоминаний
+_TYPE_EMOJI = {
+    ReminderType.DAILY: "📅",
+    ReminderType.WEEKLY: "📆",
+    ReminderType.CUSTOM: "⚙️",
+    ReminderType.DETOX_REMINDER: "🧘",
+    ReminderType.FOCUS_REMINDER: "🎯",
+    ReminderType.BREAK_REMINDER: "☕",
+    ReminderType.QUIET_HOURS: "🤫"
+}
+
+# Прямой поиск членов перечислений по значению, без вызова Enum.__call__
+_RT = ReminderType._value2member_map_
+_RS = ReminderStatus._value2member_map_
+
+
+def _reminder_type(value: str) -> ReminderType:
+    """Возвращает тип напоминания по его значению"""
+    try:
+        return _RT[value]
+    except KeyError:
+        raise ValueError(f"Неизвестный тип напоминания: {value}") from None
+
+
+def _reminder_status(value: str) -> ReminderStatus:
+    """Возвращает статус напоминания по его значению"""
+    try:
+        return _RS[value]
+    except KeyError:
+        raise ValueError(f"Неизвестный статус напоминания: {value}") from None
+
+
+# Лимит сообщений в секунду на все процессы воркера (у Telegram 30 msg/s, оставляем запас)
+TELEGRAM_RATE_LIMIT = 28
+
+# Префикс ключей общего счетчика отправок в Redis: один ключ на секунду
+TELEGRAM_RATE_KEY = "detox:telegram:sent"
+
+
+class _SendRateLimiter:
+    """
+    Ограничивает частоту отправок: не больше rate сообщений в секунду на все процессы.
+
+    С Redis процессы делят счетчик текущей секунды (INCR + EXPIRE); без Redis
+    каждый процесс берет свою долю rate // worker_concurrency. Внутри процесса
+    отправки равномерно распределяются во времени. Не использует примитивы
+    asyncio, поэтому не привязан к конкретному event loop.
+    """
+    
+    def __init__(self, rate: int, processes: int):
+        self._rate = rate
+        self._local_rate = max(1, rate // max(1, processes))
+        self._next_slot = 0.0
+    
+    async def wait(self) -> None:
+        """Ждет своего слота на отправку"""
+        client = reminder_queue.get_queue_client()
+        await self._pace(self._rate if client is not None else self._local_rate)
+        if client is None:
+            return
+        
+        while True:
+            window = int(time.time())
+            try:
+                sent = self._count_send(client, window)
+            except reminder_queue.RedisError as e:
+                # Следующие отправки не ждут таймаута Redis до переподключения
+                reminder_queue.mark_unavailable(e)
+                await self._pace(self._local_rate)
+                return
+            if sent <= self._rate:
+                return
+            # Бюджет текущей секунды исчерпан другими процессами
+            await asyncio.sleep(window + 1 - time.time())
+    
+    async def _pace(self, rate: int) -> None:
+        """Равномерный интервал между отправками этого процесса"""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
+    @staticmethod
+    def _count_send(client, window: int) -> int:
+        """Засчитывает отправку в окне window; один короткий round-trip к Redis"""
+        key = f"{TELEGRAM_RATE_KEY}:{window}"
+        pipe = client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, 2)
+        return pipe.execute()[0]
+
+
+_limiter = _SendRateLimiter(TELEGRAM_RATE_LIMIT, celery_app.conf.worker_concurrency or 1)
+
+# Максимальное время ожидания отправки одной пачки, секунды
+DELIVER_TIMEOUT = 60
+
+# Бот воркера с общим пулом соединений, создается при первой отправке
+_bot: Optional[Bot] = None
+
+# Постоянный event loop воркера: пул соединений бота живет между задачами
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_bot() -> Bot:
+    """
+    Возвращает бота воркера, создавая его при первом обращении
+    """
+    global _bot
+    if _bot is None:
+        _bot = Bot(
+            token=settings.telegram_bot_token,
+            request=HTTPXRequest(connection_pool_size=SEND_CHUNK_SIZE // 2)
+        )
+    return _bot
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Возвращает event loop воркера, запуская его в отдельном потоке
+    при первом обращении
+    """
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=_loop.run_forever, name="reminder-sender", daemon=True
+        ).start()
+    return _loop
+
+
+@worker_process_init.connect
+def _init_worker_bot(**kwargs) -> None:
+    """
+    Создает бота и event loop заново в каждом дочернем процессе воркера,
+    чтобы они не наследовались через fork
+    """
+    global _bot, _loop
+    _bot = None
+    _loop = None
+    _get_bot()
+    _get_loop()
+
+
+def _deliver(deliveries: List[tuple]) -> list:
+    """
+    Отправляет сообщения (chat_id, text) через постоянный event loop воркера.
+
+    Все сообщения пачки уходят параллельно через общий пул соединений бота
+    с ограничением частоты TELEGRAM_RATE_LIMIT. Результаты (Message или
+    исключение) возвращаются в порядке deliveries. Если пачка не уложилась
+    в DELIVER_TIMEOUT, отправка отменяется, а для неотправленных сообщений
+    возвращается TimeoutError.
+    """
+    bot = _get_bot()
+    results: list = [None] * len(deliveries)
+    
+    async def _send(index: int, chat_id: int, text: str):
+        await _limiter.wait()
+        try:
+            results[index] = await bot.send_message(
+                chat_id=chat_id, text=text, parse_mode="Markdown"
+            )
+        except Exception as e:
+            results[index] = e
+    
+    async def _run():
+        # Повторные вызовы initialize() ничего не делают
+        await bot.initialize()
+        await asyncio.gather(
+            *(_send(i, chat_id, text) for i, (chat_id, text) in enumerate(deliveries))
+        )
+    
+    future = asyncio.run_coroutine_threadsafe(_run(), _get_loop())
+    try:
+        future.result(timeout=DELIVER_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        # Отменяем оставшиеся отправки, чтобы они не ушли после пометки FAILED
+        future.cancel()
+        logger.warning("Отправка пачки не уложилась в %d с, остаток отменен", DELIVER_TIMEOUT)
+    return [
+        TimeoutError("Delivery timed out") if result is None else result
+        for result in results
+    ]
+
+
+def claim_due_reminders(
+    db: Session,
+    limit: int = CLAIM_BATCH_LIMIT,
+    now: Optional[datetime] = None,
+    ids: Optional[List[int]] = None
+) -> list:
+    """
+    Атомарно захватывает пачку напоминаний, которые пора отправить.
+
+    Один UPDATE ... RETURNING помечает строки как отправленные, а подзапрос
+    с FOR UPDATE SKIP LOCKED не дает двум воркерам захватить одни и те же
+    строки. Повторяющимся напоминаниям следующим пакетным UPDATE
+    назначается новое время и возвращается статус ACTIVE.
+    Все сравнения и отметки времени используют один и тот же момент now.
+    Если передан ids, захватываются только эти напоминания (из очереди Redis).
+    Коммит остается за вызывающим кодом.
+    """
+    if now is None:
+        now = datetime.utcnow()
+
+    due_ids = (
+        select(Reminder.id)
+        .where(
+            Reminder.status == ReminderStatus.ACTIVE,
+            Reminder.is_enabled == True,
+            Reminder.scheduled_time <= now,
+            # NULL в expires_at / max_send_count означает "без ограничения"; эти условия
+            # проверяются по строкам, уже отобранным частичным индексом ix_reminder_due
+            func.coalesce(Reminder.expires_at, datetime.max) > now,
+            func.coalesce(Reminder.max_send_count, Reminder.sent_count + 1) > Reminder.sent_count
+        )
+    )
+    if ids is not None:
+        due_ids = due_ids.where(Reminder.id.in_(ids))
+
+    due_ids = (
+        due_ids.order_by(Reminder.scheduled_time)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+    claimed = db.execute(
+        update(Reminder)
+        .where(Reminder.id.in_(due_ids))
+        .values(
+            status=ReminderStatus.SENT,
+            sent_at=now,
+            sent_count=Reminder.sent_count + 1
+        )
+        .returning(
+            Reminder.id,
+            Reminder.user_id,
+            Reminder.is_recurring,
+            Reminder.repeat_interval
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    # Планируем следующую отправку повторяющихся напоминаний одним executemany
+    recurring = [
+        {
+            "id": row.id,
+            "status": ReminderStatus.ACTIVE,
+            "scheduled_time": now + timedelta(minutes=row.repeat_interval)
+        }
+        for row in claimed
+        if row.is_recurring and row.repeat_interval
+    ]
+    if recurring:
+        db.execute(update(Reminder), recurring)
+        # Пакетный UPDATE не вызывает событий ORM, ставим в очередь явно
+        reminder_queue.defer(db, {item["id"]: item["scheduled_time"] for item in recurring})
+
+    return claimed
+
+
+# Для отправки нужны только поля сообщения и telegram_id пользователя
+_SEND_LOAD_OPTIONS = (
+    load_only(
+        Reminder.id,
+        Reminder.user_id,
+        Reminder.title,
+        Reminder.message,
+        Reminder.reminder_type,
+        Reminder.action_url
+    ),
+    joinedload(Reminder.user).load_only(User.id, User.telegram_id),
+    raiseload("*")
+)
+
+
+def _format_reminder_message(reminder: Reminder) -> str:
+    """
+    Формирует текст сообщения напоминания
+    """
+    emoji = _TYPE_EMOJI.get(reminder.reminder_type, "🔔")
+    body = f"{reminder.message}\n\n" if reminder.message else ""
+    action = f"🔗 [Открыть действие]({reminder.action_url})" if reminder.action_url else ""
+    return f"🔔 *{reminder.title}*\n\n{body}{emoji} Тип: {reminder.reminder_type.value}\n{action}"
+
+
+def _mark_failed(reminder_ids: List[int]) -> None:
+    """
+    Отмечает неудачную отправку пачки напоминаний.
+    Разовые напоминания переводятся в FAILED, повторяющиеся остаются в расписании.
+    Захват уже увеличил sent_count; он откатывается, чтобы sent_count считал
+    только доставленные сообщения (как в ReminderScheduler и в достижениях).
+    """
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        db.execute(
+            update(Reminder)
+            .where(Reminder.id.in_(reminder_ids))
+            .values(
+                failed_at=now,
+                failed_count=Reminder.failed_count + 1,
+                sent_count=case((Reminder.sent_count > 0, Reminder.sent_count - 1), else_=0)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            update(Reminder)
+            .where(Reminder.id.in_(reminder_ids), Reminder.is_recurring == False)
+            .values(status=ReminderStatus.FAILED)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def _record_sent(sent_per_user: Counter) -> None:
+    """
+    Засчитывает доставленные напоминания в достижения: одно событие
+    на пользователя с числом его отправленных напоминаний.
+    Ошибка достижений не должна ронять уже выполненную отправку.
+    """
+    with SessionLocal() as db:
+        for user_id, count in sent_per_user.items():
+            try:
+                achievement_service.record_reminder_sent(db, user_id, count)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Ошибка обновления достижений пользователя {user_id}: {e}")
+
+
+def _dispatch_batches(ids: List[int]) -> None:
+    """
+    Ставит отправку напоминаний в очередь Celery пачками по SEND_CHUNK_SIZE
+    """
+    if not ids:
+        return
+    
+    chunks = group(
+        send_telegram_reminder_batch.s(ids[i:i + SEND_CHUNK_SIZE])
+        for i in range(0, len(ids), SEND_CHUNK_SIZE)
+    )
+    # Публикуем все пачки через одно соединение с брокером
+    with celery_app.producer_pool.acquire(block=True) as producer:
+        chunks.apply_async(producer=producer)
+
 
 @celery_app.task(bind=True, name="app.tasks.reminder_tasks.check_due_reminders")
 def check_due_reminders(self):
@@ -29,132 +391,174 @@ def check_due_reminders(self):
     Проверяет и отправляет напоминания, которые должны быть отправлены
     """
     try:
-        logger.info("Начинаю проверку напоминаний")
+        logger.debug("Начинаю проверку напоминаний")
+        now = datetime.utcnow()
         
         with SessionLocal() as db:
-            # Получаем все активные напоминания, которые должны быть отправлены
-            due_reminders = (
-                db.query(Reminder)
-                .filter(
-                    Reminder.status == ReminderStatus.ACTIVE,
-                    Reminder.is_enabled == True,
-                    Reminder.scheduled_time <= datetime.utcnow(),
-                    (Reminder.expires_at.is_(None) | (Reminder.expires_at > datetime.utcnow())),
-                    (Reminder.max_send_count.is_(None) | (Reminder.sent_count < Reminder.max_send_count))
-                )
-                .all()
-            )
-            
-            logger.info(f"Найдено {len(due_reminders)} напоминаний для отправки")
-            
-            for reminder in due_reminders:
-                try:
-                    # Отправляем напоминание
-                    send_telegram_reminder.delay(reminder.id)
-                    
-                    # Обновляем статус
-                    reminder.status = ReminderStatus.SENT
-                    reminder.sent_at = datetime.utcnow()
-                    reminder.sent_count += 1
-                    
-                    # Если это повторяющееся напоминание, планируем следующее
-                    if reminder.is_recurring and reminder.repeat_interval:
-                        next_time = reminder.sent_at + timedelta(minutes=reminder.repeat_interval)
-                        reminder.scheduled_time = next_time
-                        reminder.status = ReminderStatus.ACTIVE
-                    
-                    db.commit()
-                    logger.info(f"Напоминание {reminder.id} обработано")
-                    
-                except Exception as e:
-                    logger.error(f"Ошибка при обработке напоминания {reminder.id}: {e}")
-                    db.rollback()
-                    continue
+            # Захватываем все напоминания, которые должны быть отправлены
+            claimed = claim_due_reminders(db, now=now)
+            db.commit()
         
-        logger.info("Проверка напоминаний завершена")
-        return {"status": "success", "processed": len(due_reminders)}
+        logger.info("Найдено %d напоминаний для отправки", len(claimed))
+        
+        _dispatch_batches([row.id for row in claimed])
+        
+        logger.debug("Проверка напоминаний завершена")
+        return {"status": "success", "processed": len(claimed)}
         
     except Exception as e:
         logger.error(f"Ошибка при проверке напоминаний: {e}")
         raise
 
 
+@celery_app.task(bind=True, name="app.tasks.reminder_tasks.dispatch_queued_reminders")
+def dispatch_queued_reminders(self):
+    """
+    Отправляет напоминания, время которых наступило, по очереди в Redis.
+    Не обращается к БД, пока в очереди нет созревших напоминаний.
+    """
+    try:
+        now = datetime.utcnow()
+        ids = reminder_queue.pop_due(now, CLAIM_BATCH_LIMIT)
+        if not ids:
+            return {"status": "success", "processed": 0}
+        
+        with SessionLocal() as db:
+            # Повторно проверяем условия в БД: напоминание могли отменить
+            claimed = claim_due_reminders(db, now=now, ids=ids)
+            db.commit()
+        
+        logger.info("Из очереди получено %d напоминаний, к отправке %d", len(ids), len(claimed))
+        
+        _dispatch_batches([row.id for row in claimed])
+        return {"status": "success", "processed": len(claimed)}
+        
+    except Exception as e:
+        logger.error(f"Ошибка при отправке напоминаний из очереди: {e}")
+        raise
+
+
+@celery_app.task(bind=True, name="app.tasks.reminder_tasks.backfill_reminder_queue")
+def backfill_reminder_queue(self):
+    """
+    Заполняет очередь в Redis всеми активными напоминаниями из БД.
+    Запускается после развертывания очереди или потери данных Redis.
+    """
+    try:
+        with SessionLocal() as db:
+            schedule = dict(
+                db.execute(
+                    select(Reminder.id, Reminder.scheduled_time).where(
+                        Reminder.status == ReminderStatus.ACTIVE,
+                        Reminder.is_enabled == True
+                    )
+                ).all()
+            )
+        
+        queued = reminder_queue.enqueue(schedule)
+        logger.info(f"В очередь добавлено {len(schedule) if queued else 0} напоминаний")
+        return {"status": "success" if queued else "error", "queued": len(schedule) if queued else 0}
+        
+    except Exception as e:
+        logger.error(f"Ошибка при заполнении очереди напоминаний: {e}")
+        raise
+
+
 @celery_app.task(bind=True, name="app.tasks.reminder_tasks.send_telegram_reminder")
 def send_telegram_reminder(self, reminder_id: int):
     """
     Отправляет напоминание через Telegram
     """
     try:
-        logger.info(f"Отправляю напоминание {reminder_id}")
+        logger.debug("Отправляю напоминание %s", reminder_id)
         
         with SessionLocal() as db:
-            reminder = db.query(Reminder).filter(Reminder.id == reminder_id).first()
+            reminder = db.execute(
+                select(Reminder)
+                .options(*_SEND_LOAD_OPTIONS)
+                .where(Reminder.id == reminder_id)
+            ).scalar_one_or_none()
             if not reminder:
-                logger.error(f"Напоминание {reminder_id} не найдено")
+                logger.error("Напоминание %s не найдено", reminder_id)
                 return {"status": "error", "message": "Reminder not found"}
             
-            user = db.query(User).filter(User.id == reminder.user_id).first()
+            user = reminder.user
             if not user:
-                logger.error(f"Пользователь {reminder.user_id} не найден")
+                logger.error("Пользователь %s не найден", reminder.user_id)
                 return {"status": "error", "message": "User not found"}
             
-            # Формируем сообщение
-            message = f"🔔 *{reminder.title}*\n\n"
-            if reminder.message:
-                message += f"{reminder.message}\n\n"
-            
-            # Добавляем информацию о типе напоминания
-            type_emoji = {
-                ReminderType.DAILY: "📅",
-                ReminderType.WEEKLY: "📆",
-                ReminderType.CUSTOM: "⚙️",
-                ReminderType.DETOX_REMINDER: "🧘",
-                ReminderType.FOCUS_REMINDER: "🎯",
-                ReminderType.BREAK_REMINDER: "☕",
-                ReminderType.QUIET_HOURS: "🤫"
-            }
-            
-            emoji = type_emoji.get(reminder.reminder_type, "🔔")
-            message += f"{emoji} Тип: {reminder.reminder_type.value}\n"
-            
-            if reminder.action_url:
-                message += f"🔗 [Открыть действие]({reminder.action_url})"
-            
-            # Отправляем через Telegram бота
-            from telegram import Bot
-            bot = Bot(token=settings.telegram_bot_token)
+            message = _format_reminder_message(reminder)
+            chat_id = user.telegram_id
+            user_id = reminder.user_id
+        
+        result = _deliver([(chat_id, message)])[0]
+        if isinstance(result, Exception):
+            logger.error("Не удалось отправить напоминание %s: %s", reminder_id, result)
+            _mark_failed([reminder_id])
+            return {"status": "error", "message": "Failed to send message"}
+        
+        _record_sent(Counter({user_id: 1}))
+        
+        logger.debug(
+            "Напоминание %s отправлено пользователю %s, сообщение %s",
+            reminder_id, chat_id, result.message_id
+        )
+        return {"status": "success", "reminder_id": reminder_id}
             
-            try:
-                # Используем asyncio для отправки сообщения
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                result = loop.run_until_complete(
-                    bot.send_message(
-                        chat_id=user.telegram_id,
-                        text=message,
-                        parse_mode="Markdown"
-                    )
-                )
-                loop.close()
-                
-                success = True
-                logger.info(f"Сообщение отправлено: {result.message_id}")
-                
-            except Exception as e:
-                logger.error(f"Ошибка отправки сообщения: {e}")
-                success = False
+    except Exception as e:
+        logger.error(f"Ошибка при отправке напоминания {reminder_id}: {e}")
+        raise
+
+
+@celery_app.task(bind=True, name="app.tasks.reminder_tasks.send_telegram_reminder_batch")
+def send_telegram_reminder_batch(self, reminder_ids: List[int]):
+    """
+    Отправляет пачку напоминаний через Telegram
+    """
+    try:
+        logger.debug("Отправляю пачку из %d напоминаний", len(reminder_ids))
+        
+        with SessionLocal() as db:
+            # Одна выборка с JOIN возвращает и напоминания, и их пользователей
+            reminders = db.execute(
+                select(Reminder)
+                .options(*_SEND_LOAD_OPTIONS)
+                .where(Reminder.id.in_(reminder_ids))
+            ).unique().scalars().all()
             
-            if success:
-                logger.info(f"Напоминание {reminder_id} отправлено пользователю {user.telegram_id}")
-                return {"status": "success", "reminder_id": reminder_id}
+            ids = []
+            user_ids = []
+            deliveries = []
+            for reminder in reminders:
+                if not reminder.user:
+                    logger.error("Пользователь %s не найден", reminder.user_id)
+                    continue
+                ids.append(reminder.id)
+                user_ids.append(reminder.user_id)
+                deliveries.append((reminder.user.telegram_id, _format_reminder_message(reminder)))
+        
+        results = _deliver(deliveries) if deliveries else []
+        
+        failed_ids = []
+        sent_per_user = Counter()
+        for reminder_id, user_id, result in zip(ids, user_ids, results):
+            if isinstance(result, Exception):
+                logger.warning("Ошибка отправки напоминания %s: %s", reminder_id, result)
+                failed_ids.append(reminder_id)
             else:
-                logger.error(f"Не удалось отправить напоминание {reminder_id}")
-                return {"status": "error", "message": "Failed to send message"}
-                
+                sent_per_user[user_id] += 1
+        
+        if failed_ids:
+            _mark_failed(failed_ids)
+        if sent_per_user:
+            _record_sent(sent_per_user)
+        
+        sent = len(ids) - len(failed_ids)
+        logger.info("Отправлено %d из %d напоминаний", sent, len(reminder_ids))
+        return {"status": "success", "sent": sent, "total": len(reminder_ids)}
+        
     except Exception as e:
-        logger.error(f"Ошибка при отправке напоминания {reminder_id}: {e}")
+        logger.error(f"Ошибка при отправке пачки напоминаний: {e}")
         raise
 
 
@@ -165,28 +569,24 @@ def cleanup_expired_reminders(self):
     """
     try:
         logger.info("Начинаю очистку истекших напоминаний")
+        now = datetime.utcnow()
         
         with SessionLocal() as db:
-            # Находим истекшие напоминания
-            expired_reminders = (
-                db.query(Reminder)
-                .filter(
-                    Reminder.expires_at <= datetime.utcnow(),
+            # Помечаем истекшие напоминания одним UPDATE
+            result = db.execute(
+                update(Reminder)
+                .where(
+                    Reminder.expires_at <= now,
                     Reminder.status == ReminderStatus.ACTIVE
                 )
-                .all()
+                .values(status=ReminderStatus.EXPIRED)
+                .execution_options(synchronize_session=False)
             )
-            
-            logger.info(f"Найдено {len(expired_reminders)} истекших напоминаний")
-            
-            for reminder in expired_reminders:
-                reminder.status = ReminderStatus.EXPIRED
-                logger.info(f"Напоминание {reminder.id} помечено как истекшее")
-            
             db.commit()
+            expired_count = result.rowcount
         
-        logger.info("Очистка истекших напоминаний завершена")
-        return {"status": "success", "expired_count": len(expired_reminders)}
+        logger.info("Очистка истекших напоминаний завершена, помечено %d", expired_count)
+        return {"status": "success", "expired_count": expired_count}
         
     except Exception as e:
         logger.error(f"Ошибка при очистке истекших напоминаний: {e}")
@@ -216,8 +616,10 @@ def create_reminder(
         
         with SessionLocal() as db:
             # Проверяем существование пользователя
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
+            user_exists = db.execute(
+                select(User.id).where(User.id == user_id)
+            ).scalar_one_or_none()
+            if user_exists is None:
                 logger.error(f"Пользователь {user_id} не найден")
                 return {"status": "error", "message": "User not found"}
             
@@ -226,7 +628,7 @@ def create_reminder(
                 user_id=user_id,
                 title=title,
                 message=message,
-                reminder_type=ReminderType(reminder_type),
+                reminder_type=_reminder_type(reminder_type),
                 scheduled_time=datetime.fromisoformat(scheduled_time),
                 is_recurring=is_recurring,
                 repeat_interval=repeat_interval,
@@ -250,6 +652,71 @@ def create_reminder(
         raise
 
 
+@celery_app.task(bind=True, name="app.tasks.reminder_tasks.create_reminders_bulk")
+def create_reminders_bulk(self, rows: List[dict]):
+    """
+    Создает пачку напоминаний одним INSERT.
+    Каждая строка принимает те же поля, что и create_reminder;
+    строки с несуществующими пользователями отклоняются.
+    """
+    try:
+        logger.info(f"Создаю пачку из {len(rows)} напоминаний")
+        
+        with SessionLocal() as db:
+            # Проверяем существование всех пользователей одним запросом
+            user_ids = {row["user_id"] for row in rows}
+            known = set(
+                db.execute(select(User.id).where(User.id.in_(user_ids))).scalars().all()
+            )
+            
+            values = []
+            rejected = []
+            for row in rows:
+                if row["user_id"] not in known:
+                    rejected.append(row["user_id"])
+                    continue
+                
+                expires_at = row.get("expires_at")
+                values.append({
+                    "user_id": row["user_id"],
+                    "title": row["title"],
+                    "message": row.get("message"),
+                    "reminder_type": _reminder_type(row["reminder_type"]),
+                    "scheduled_time": datetime.fromisoformat(row["scheduled_time"]),
+                    "is_recurring": row.get("is_recurring", False),
+                    "repeat_interval": row.get("repeat_interval"),
+                    "expires_at": datetime.fromisoformat(expires_at) if expires_at else None,
+                    "max_send_count": row.get("max_send_count"),
+                    "priority": row.get("priority", 1),
+                    "action_url": row.get("action_url"),
+                    "status": ReminderStatus.ACTIVE,
+                    "is_enabled": True
+                })
+            
+            if rejected:
+                logger.error(f"Пользователи не найдены: {sorted(set(rejected))}")
+            
+            reminder_ids = []
+            if values:
+                reminder_ids = db.execute(
+                    insert(Reminder).returning(Reminder.id, sort_by_parameter_order=True),
+                    values
+                ).scalars().all()
+                # Пакетный INSERT не вызывает событий ORM, ставим в очередь явно
+                reminder_queue.defer(
+                    db,
+                    {reminder_id: value["scheduled_time"] for reminder_id, value in zip(reminder_ids, values)}
+                )
+                db.commit()
+        
+        logger.info("Создано %d напоминаний, отклонено %d", len(reminder_ids), len(rejected))
+        return {"status": "success", "reminder_ids": reminder_ids, "rejected": len(rejected)}
+        
+    except Exception as e:
+        logger.error(f"Ошибка при пакетном создании напоминаний: {e}")
+        raise
+
+
 @celery_app.task(bind=True, name="app.tasks.reminder_tasks.cancel_reminder")
 def cancel_reminder(self, reminder_id: int):
     """
@@ -259,7 +726,9 @@ def cancel_reminder(self, reminder_id: int):
         logger.info(f"Отменяю напоминание {reminder_id}")
         
         with SessionLocal() as db:
-            reminder = db.query(Reminder).filter(Reminder.id == reminder_id).first()
+            reminder = db.execute(
+                select(Reminder).where(Reminder.id == reminder_id)
+            ).scalar_one_or_none()
             if not reminder:
                 logger.error(f"Напоминание {reminder_id} не найдено")
                 return {"status": "error", "message": "Reminder not found"}
@@ -276,39 +745,70 @@ def cancel_reminder(self, reminder_id: int):
 
 
 @celery_app.task(bind=True, name="app.tasks.reminder_tasks.get_user_reminders")
-def get_user_reminders(self, user_id: int, status: Optional[str] = None):
+def get_user_reminders(
+    self,
+    user_id: int,
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0
+):
     """
-    Получает напоминания пользователя
+    Получает напоминания пользователя; без limit - все, с limit - страницу.
+    Для страницы в ответе есть has_more и next_offset (None на последней странице).
+    Выбираются только нужные колонки, без построения ORM-объектов.
     """
     try:
         logger.info(f"Получаю напоминания пользователя {user_id}")
         
+        stmt = (
+            select(
+                Reminder.id,
+                Reminder.title,
+                Reminder.message,
+                Reminder.reminder_type,
+                Reminder.status,
+                Reminder.scheduled_time,
+                Reminder.sent_at,
+                Reminder.is_recurring,
+                Reminder.priority,
+                Reminder.created_at
+            )
+            .where(Reminder.user_id == user_id)
+        )
+        
+        if status:
+            stmt = stmt.where(Reminder.status == _reminder_status(status))
+        
+        stmt = stmt.order_by(Reminder.scheduled_time.desc()).offset(offset)
+        if limit is not None:
+            # Лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+            stmt = stmt.limit(limit + 1)
+        
         with SessionLocal() as db:
-            query = db.query(Reminder).filter(Reminder.user_id == user_id)
-            
-            if status:
-                query = query.filter(Reminder.status == ReminderStatus(status))
-            
-            reminders = query.order_by(Reminder.scheduled_time.desc()).all()
-            
-            result = []
-            for reminder in reminders:
-                result.append({
-                    "id": reminder.id,
-                    "title": reminder.title,
-                    "message": reminder.message,
-                    "reminder_type": reminder.reminder_type.value,
-                    "status": reminder.status.value,
-                    "scheduled_time": reminder.scheduled_time.isoformat(),
-                    "sent_at": reminder.sent_at.isoformat() if reminder.sent_at else None,
-                    "is_recurring": reminder.is_recurring,
-                    "priority": reminder.priority,
-                    "created_at": reminder.created_at.isoformat()
-                })
-            
-            logger.info(f"Найдено {len(result)} напоминаний для пользователя {user_id}")
-            return {"status": "success", "reminders": result}
-            
+            result = [
+                dict(
+                    row,
+                    reminder_type=row["reminder_type"].value,
+                    status=row["status"].value,
+                    scheduled_time=row["scheduled_time"].isoformat(),
+                    sent_at=row["sent_at"].isoformat() if row["sent_at"] else None,
+                    created_at=row["created_at"].isoformat()
+                )
+                for row in db.execute(stmt).mappings()
+            ]
+        
+        has_more = limit is not None and len(result) > limit
+        if has_more:
+            del result[limit:]
+        
+        logger.info(f"Найдено {len(result)} напоминаний для пользователя {user_id}")
+        return {
+            "status": "success",
+            "reminders": result,
+            "has_more": has_more,
+            "next_offset": offset + len(result) if has_more else None
+        }
+        
     except Exception as e:
         logger.error(f"Ошибка при получении напоминаний пользователя {user_id}: {e}")
         raise
@@ -4,13 +4,20 @@
 
 import asyncio
 import logging
+import re
 import threading
-from typing import Optional
-from datetime import timedelta
-from telegram import Update, BotCommand, InlineKeyboardButton, InlineKeyboardMarkup
+import time
+import weakref
+from collections import Counter, OrderedDict
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
+from datetime import datetime, time as dt_time, timedelta, timezone
+from telegram import Bot, Update, BotCommand, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import (
+    AIORateLimiter,
     Application,
-    CommandHandler,
+    ExtBot,
     MessageHandler,
     CallbackQueryHandler,
     filters,
@@ -18,8 +25,20 @@ from telegram.ext import (
 )
 import structlog
 
+try:
+    import orjson
+except ImportError:  # без orjson PTB использует стандартный json
+    orjson = None
+
 from detoxbuddy.core.config_simple import settings, constants
 from detoxbuddy.core.services.user_service import user_service
+from detoxbuddy.core.services.screen_time_service import ScreenTimeService
+from detoxbuddy.core.reminder_scheduler import add_reminder_to_scheduler
+from detoxbuddy.database.database import session_scope
+from detoxbuddy.database.crud.reminder import WEEKDAY_CODES, reminder_crud
+from detoxbuddy.database.crud.focus_session import focus_session
+from detoxbuddy.database.models.reminder import ReminderType
+from detoxbuddy.database.schemas.screen_time import QuickScreenTimeEntry
 from detoxbuddy.database.models.user import User
 from detoxbuddy.database.models.achievement import Achievement, UserAchievement, UserLevel, AchievementType
 from detoxbuddy.database.crud.achievement import achievement_service, user_achievement_crud, user_level_crud
@@ -29,9 +48,820 @@ from detoxbuddy.core.focus_timer import FocusTimer
 logger = structlog.get_logger()
 
 
+def _install_orjson_encoder() -> None:
+    """
+    Переключает JSON-кодирование параметров запросов PTB на orjson.
+    PTB сериализует каждое вложенное значение (reply_markup, entities и т.п.)
+    через json.dumps в telegram.request._requestparameter; подменяем только
+    этот модуль и откатываемся на json.dumps для неподдерживаемых значений.
+    """
+    if orjson is None:
+        return
+    
+    import json
+    from types import SimpleNamespace
+    from telegram.request import _requestparameter
+    
+    def dumps(value):
+        try:
+            return orjson.dumps(value).decode()
+        except TypeError:
+            return json.dumps(value)
+    
+    _requestparameter.json = SimpleNamespace(dumps=dumps, loads=json.loads)
+
+
+_install_orjson_encoder()
+
+
+def _is_not_modified(error: Exception) -> bool:
+    """Ошибка Telegram "Message is not modified" (новое содержимое совпадает с текущим)"""
+    return isinstance(error, BadRequest) and error.message.startswith("Message is not modified")
+
+# Кэш аутентифицированных пользователей: время жизни (сек) и максимальный размер
+_USER_CACHE_TTL = 300
+_USER_CACHE_MAXSIZE = 10_000
+
+# Кэш настроек пользователей для /settings
+_SETTINGS_CACHE_TTL = 30
+_SETTINGS_CACHE_MAXSIZE = 5_000
+
+# Кэш аналитики экранного времени (вкладки /analytics)
+_INSIGHTS_CACHE_TTL = 20
+_INSIGHTS_CACHE_MAXSIZE = 512
+
+# Кэш списка и статистики напоминаний (экраны /reminders и /recurring)
+_REMINDERS_CACHE_TTL = 15
+_REMINDERS_CACHE_MAXSIZE = 512
+
+# Кэш экранов достижений (кнопки ach:*): (user_id, экран) -> готовые текст и клавиатура
+_ACHIEVEMENT_VIEWS_CACHE_TTL = 60
+_ACHIEVEMENT_VIEWS_CACHE_MAXSIZE = 1024
+
+# Последнее отправленное содержимое Markdown-сообщений (для пропуска одинаковых правок)
+_LAST_EDITS_MAXSIZE = 10_000
+
+# Повторное нажатие кнопки "Обновить" раньше, чем через столько секунд, не пересчитывается
+_REFRESH_THROTTLE = 3.0
+# Записи о последних обновлениях: срок хранения (сек) и размер, после которого они чистятся
+_REFRESH_HISTORY_TTL = 300
+_REFRESH_HISTORY_MAXSIZE = 10_000
+# Кнопки обновления: (код операции, данные callback_data)
+_REFRESH_OPS = frozenset({("a", "refresh"), ("r", "refresh"), ("rr", "")})
+
+# Лимиты Telegram для всех исходящих вызовов API (сообщения, ответы, редактирования):
+# не чаще 30 в секунду всего и 20 в минуту в одну группу; после RetryAfter - один повтор
+_SEND_MAX_RATE = 30
+_SEND_GROUP_MAX_RATE = 20
+_SEND_MAX_RETRIES = 1
+
+# Через сколько секунд простоя завершается обработчик очереди чата
+_CHAT_WORKER_IDLE_TIMEOUT = 60
+
+# Пользователь считается новым, если создан не раньше, чем столько времени назад
+_NEW_USER_WINDOW = timedelta(minutes=1)
+
+# Long polling: сервер Telegram держит запрос до этого числа секунд
+_POLLING_TIMEOUT = 30
+
+# Типы обновлений, которые обрабатывает бот; остальные Telegram не присылает
+_ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+# Формат длительности для /remind: "2h", "30m", "1h30m", "1h 30m"
+_TIME_RE = re.compile(r'(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?', re.I)
+
+# Время суток для /daily и /weekly: "ЧЧ:ММ" (или "Ч:ММ"), часы 0-23, минуты 0-59
+_CLOCK_TIME_RE = re.compile(r'([01]?\d|2[0-3]):([0-5]\d)')
+
+# Готовые подписи длительностей до 4 часов для _format_time
+_FORMATTED_TIME = tuple(
+    f"{i} мин" if i < 60 else (f"{i // 60} ч" if i % 60 == 0 else f"{i // 60} ч {i % 60} мин")
+    for i in range(241)
+)
+
+# Дни недели для /weekly: код -> бит маски (понедельник = бит 0), принимаются и полные названия
+_WEEKDAY_BITS = MappingProxyType({
+    **{code: 1 << i for i, code in enumerate(WEEKDAY_CODES)},
+    **{name: 1 << i for i, name in enumerate(
+        ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    )},
+})
+
+# Приветствие в свободном тексте: один проход без копии текста в нижнем регистре
+_GREETING_RE = re.compile(r"привет|hello", re.I)
+
+# Команды бота: (команда, имя метода-обработчика), см. _dispatch_command
+_COMMAND_HANDLERS = (
+    ("start", "_start_command"),
+    ("help", "_help_command"),
+    ("test", "_test_command"),
+    ("remind", "_remind_command"),
+    ("reminders", "_reminders_command"),
+    ("detox", "_detox_command"),
+    ("focus", "_focus_command"),
+    ("quiet", "_quiet_command"),
+    ("content", "_content_command"),
+    ("analytics", "_analytics_command"),
+    ("addtime", "_addtime_command"),
+    ("settings", "_settings_command"),
+    ("recurring", "_recurring_command"),
+    ("daily", "_daily_command"),
+    ("weekly", "_weekly_command"),
+    ("achievements", "_achievements_command"),
+    ("level", "_level_command"),
+    ("profile", "_profile_command"),
+)
+
+# Действия таймера фокуса (кроме запуска по длительности): (действие, имя метода), см. _run_focus_action
+_FOCUS_ACTIONS = (
+    ("pause", "_pause_focus_session"),
+    ("resume", "_resume_focus_session"),
+    ("complete", "_complete_focus_session"),
+    ("cancel", "_cancel_focus_session"),
+    ("stats", "_show_focus_stats"),
+)
+
+# Экраны достижений: (действие кнопки ach:*, имя метода-рендерера), см. _handle_achievement_callback
+_ACHIEVEMENT_VIEWS = (
+    ("all", "_render_all_achievements"),
+    ("progress", "_render_achievement_progress"),
+    ("recent", "_render_recent_achievements"),
+    ("stats", "_render_achievement_stats"),
+)
+
+# Свободный текст обрабатывается только в личных чатах; пересланные
+# сообщения и сообщения через inline-ботов отсеиваются до вызова обработчика
+_TEXT_FILTER = (
+    filters.TEXT
+    & ~filters.COMMAND
+    & ~filters.FORWARDED
+    & ~filters.VIA_BOT
+    & filters.ChatType.PRIVATE
+)
+
+# Меню команд бота (общий неизменяемый кортеж)
+_BOT_COMMANDS = (
+    BotCommand(constants.COMMAND_START, "Запустить бота"),
+    BotCommand(constants.COMMAND_HELP, "Помощь"),
+    BotCommand("test", "Тестовая команда"),
+    BotCommand("remind", "Создать напоминание"),
+    BotCommand("reminders", "Мои напоминания"),
+    BotCommand("recurring", "Повторяющиеся напоминания"),
+    BotCommand("daily", "Ежедневные напоминания"),
+    BotCommand("weekly", "Еженедельные напоминания"),
+    BotCommand("achievements", "Достижения"),
+    BotCommand("level", "Уровень и опыт"),
+    BotCommand("profile", "Профиль"),
+    BotCommand(constants.COMMAND_DETOX, "План детокса"),
+    BotCommand(constants.COMMAND_FOCUS, "Таймер фокуса"),
+    BotCommand(constants.COMMAND_QUIET, "Тихие часы"),
+    BotCommand(constants.COMMAND_CONTENT, "Полезный контент"),
+    BotCommand(constants.COMMAND_ANALYTICS, "Аналитика"),
+    BotCommand("addtime", "Добавить время"),
+    BotCommand(constants.COMMAND_SETTINGS, "Настройки"),
+)
+
+# Эмодзи статусов и типов напоминаний (только для чтения)
+_REMINDER_STATUS_EMOJI = MappingProxyType({
+    "active": "🟢",
+    "sent": "✅",
+    "cancelled": "❌",
+    "expired": "⏰"
+})
+
+_REMINDER_TYPE_EMOJI = MappingProxyType({
+    "daily": "📅",
+    "weekly": "📆",
+    "custom": "⚙️",
+    "detox_reminder": "🧘",
+    "focus_reminder": "🎯",
+    "break_reminder": "☕",
+    "quiet_hours": "🤫"
+})
+
+# Полосы прогресса длиной 10: индекс - число заполненных делений
+_PROGRESS_BAR_LENGTH = 10
+_PROGRESS_BARS = tuple(
+    "█" * i + "░" * (_PROGRESS_BAR_LENGTH - i) for i in range(_PROGRESS_BAR_LENGTH + 1)
+)
+
+
+def _progress_bar(fraction: float) -> str:
+    """Полоса прогресса для доли 0..1 (значения вне диапазона ограничиваются)"""
+    filled = int(fraction * _PROGRESS_BAR_LENGTH)
+    return _PROGRESS_BARS[min(max(filled, 0), _PROGRESS_BAR_LENGTH)]
+
+# Экранирование пользовательского текста для parse_mode="Markdown" (служебные символы _ * ` [)
+_MARKDOWN_ESCAPE = str.maketrans({c: "\\" + c for c in "_*`["})
+
+
+def _md_escape(text: Optional[str]) -> str:
+    """Текст из БД/Telegram для подстановки в Markdown-сообщение"""
+    return text.translate(_MARKDOWN_ESCAPE) if text else ""
+
+# Строка достижения по состоянию: 0 - в процессе, 1 - выполнено, 2 - перевыполнено
+_ACHIEVEMENT_PROGRESS_TEMPLATES = (
+    "⏳ {icon} {name} ({progress}/{target})",
+    "✅ {icon} {name} ({progress}/{target})",
+    "✅ {icon} {name} ({progress}/{target} +{over})",
+)
+
+# Типы достижений: AchievementType -> (эмодзи, название, название в статистике).
+# Ключи - члены enum (ua.achievement.type), поэтому покрыты все типы и поиск без .value
+_ACHIEVEMENT_TYPE_META = MappingProxyType({
+    AchievementType.FOCUS_SESSIONS: ("🎯", "Focus Sessions", "🎯 Сессии фокуса"),
+    AchievementType.SCREEN_TIME_REDUCTION: ("📱", "Screen Time Reduction", "📱 Сокращение экранного времени"),
+    AchievementType.STREAK_DAYS: ("📅", "Streak Days", "📅 Серии дней"),
+    AchievementType.REMINDERS_COMPLETED: ("⏰", "Reminders Completed", "⏰ Выполненные напоминания"),
+    AchievementType.DETOX_PLANS: ("📋", "Detox Plans", "📋 Планы детокса"),
+    AchievementType.FIRST_TIME: ("👋", "First Time", "👋 Первые шаги"),
+    AchievementType.MILESTONE: ("🏅", "Milestone", "🏅 Достижения"),
+})
+
+# Названия типов активности для /addtime
+_ACTIVITY_NAMES = MappingProxyType({
+    'productivity': 'продуктивное время',
+    'social': 'социальные сети',
+    'entertainment': 'развлечения',
+    'other': 'другое время'
+})
+
+# Клавиатуры команд (неизменяемые, создаются один раз)
+_ANALYTICS_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📈 Детальный отчет", callback_data="a:detailed"),
+        InlineKeyboardButton("📊 Тренды", callback_data="a:trends")
+    ],
+    [
+        InlineKeyboardButton("🎯 Цели", callback_data="a:goals"),
+        InlineKeyboardButton("🏆 Достижения", callback_data="a:achievements")
+    ],
+    [
+        InlineKeyboardButton("⏰ Добавить время", callback_data="time"),
+        InlineKeyboardButton("🔄 Обновить", callback_data="a:refresh")
+    ]
+])
+
+# Кнопка для создания первого напоминания
+_REMINDERS_KEYBOARD_EMPTY = InlineKeyboardMarkup([
+    [InlineKeyboardButton("➕ Создать напоминание", callback_data="rc")]
+])
+
+# Кнопки для управления напоминаниями
+_REMINDERS_KEYBOARD_FULL = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("➕ Создать", callback_data="rc"),
+        InlineKeyboardButton("🔄 Обновить", callback_data="rr")
+    ],
+    [
+        InlineKeyboardButton("❌ Отменить все", callback_data="rx"),
+        InlineKeyboardButton("📊 Статистика", callback_data="rs")
+    ]
+])
+
+# Кнопки "Назад" для экранов inline-меню
+_BACK_TO_REMINDERS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Назад к напоминаниям", callback_data="rr")]
+])
+
+_BACK_TO_ANALYTICS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Назад к аналитике", callback_data="a:refresh")]
+])
+
+_RECURRING_BACK_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Назад", callback_data="r:refresh")]
+])
+
+_ADDTIME_QUICK_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Назад", callback_data="a:refresh")]
+])
+
+# Меню /recurring
+_RECURRING_MAIN_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📅 Ежедневные", callback_data="r:daily"),
+        InlineKeyboardButton("📆 Еженедельные", callback_data="r:weekly")
+    ],
+    [
+        InlineKeyboardButton("⚙️ Настройки", callback_data="r:settings"),
+        InlineKeyboardButton("📊 Статистика", callback_data="r:stats")
+    ],
+    [
+        InlineKeyboardButton("🔄 Обновить", callback_data="r:refresh")
+    ]
+])
+
+# Выбор длительности сессии фокуса
+_FOCUS_MENU_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🍅 25 мин (стандарт)", callback_data="f:25"),
+        InlineKeyboardButton("⏰ 15 мин (короткая)", callback_data="f:15")
+    ],
+    [
+        InlineKeyboardButton("⏱️ 45 мин (длинная)", callback_data="f:45"),
+        InlineKeyboardButton("🎯 60 мин (марафон)", callback_data="f:60")
+    ],
+    [
+        InlineKeyboardButton("📊 Статистика", callback_data="f:stats"),
+        InlineKeyboardButton("❌ Отмена", callback_data="f:cancel")
+    ]
+])
+
+# Управление активной сессией фокуса (/focus при уже идущей сессии)
+_FOCUS_CONTROLS_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("⏸️ Пауза", callback_data="f:pause"),
+        InlineKeyboardButton("▶️ Продолжить", callback_data="f:resume")
+    ],
+    [
+        InlineKeyboardButton("⏹️ Завершить", callback_data="f:complete"),
+        InlineKeyboardButton("❌ Отменить", callback_data="f:cancel")
+    ]
+])
+
+# Сессия фокуса идет (после запуска или возобновления)
+_FOCUS_RUNNING_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("⏸️ Пауза", callback_data="f:pause"),
+        InlineKeyboardButton("⏹️ Завершить", callback_data="f:complete")
+    ],
+    [
+        InlineKeyboardButton("❌ Отменить", callback_data="f:cancel")
+    ]
+])
+
+# Сессия фокуса на паузе
+_FOCUS_PAUSED_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("▶️ Продолжить", callback_data="f:resume"),
+        InlineKeyboardButton("⏹️ Завершить", callback_data="f:complete")
+    ],
+    [
+        InlineKeyboardButton("❌ Отменить", callback_data="f:cancel")
+    ]
+])
+
+# Экран статистики фокуса
+_FOCUS_STATS_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🍅 Начать сессию", callback_data="f:25"),
+        InlineKeyboardButton("📊 Подробнее", callback_data="f:detailed_stats")
+    ],
+    [
+        InlineKeyboardButton("🔙 Назад", callback_data="f:back")
+    ]
+])
+
+# Меню /achievements
+_ACHIEVEMENTS_MENU_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📋 Все достижения", callback_data="ach:all"),
+        InlineKeyboardButton("🎯 Прогресс", callback_data="ach:progress")
+    ],
+    [
+        InlineKeyboardButton("🏅 Недавние", callback_data="ach:recent"),
+        InlineKeyboardButton("📈 Статистика", callback_data="ach:stats")
+    ],
+    [
+        InlineKeyboardButton("🔙 Назад", callback_data="menu")
+    ]
+])
+
+# Меню /level
+_LEVEL_MENU_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🏆 Достижения", callback_data="ach:all"),
+        InlineKeyboardButton("📈 Статистика", callback_data="lvl:stats")
+    ],
+    [
+        InlineKeyboardButton("🎯 Как получить опыт", callback_data="lvl:help"),
+        InlineKeyboardButton("🔙 Назад", callback_data="menu")
+    ]
+])
+
+# Меню /profile
+_PROFILE_MENU_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🏆 Достижения", callback_data="ach:all"),
+        InlineKeyboardButton("📊 Аналитика", callback_data="a:main")
+    ],
+    [
+        InlineKeyboardButton("⚙️ Настройки", callback_data="settings_main"),
+        InlineKeyboardButton("📈 Статистика", callback_data="profile_stats")
+    ],
+    [
+        InlineKeyboardButton("🔙 Назад", callback_data="menu")
+    ]
+])
+
+# Экран «Все достижения»
+_ACH_ALL_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🎯 Прогресс", callback_data="ach:progress"),
+        InlineKeyboardButton("🏅 Недавние", callback_data="ach:recent")
+    ],
+    [
+        InlineKeyboardButton("🔙 Назад", callback_data="ach:main")
+    ]
+])
+
+# Экран «Прогресс по достижениям»
+_ACH_PROGRESS_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🏆 Все достижения", callback_data="ach:all"),
+        InlineKeyboardButton("📊 Статистика", callback_data="ach:stats")
+    ],
+    [
+        InlineKeyboardButton("🔙 Назад", callback_data="ach:main")
+    ]
+])
+
+# Экраны «Недавние достижения» и «Статистика достижений»
+_ACH_BROWSE_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🏆 Все достижения", callback_data="ach:all"),
+        InlineKeyboardButton("🎯 Прогресс", callback_data="ach:progress")
+    ],
+    [
+        InlineKeyboardButton("🔙 Назад", callback_data="ach:main")
+    ]
+])
+
+# Экран статистики уровня
+_LEVEL_STATS_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🏆 Достижения", callback_data="ach:all"),
+        InlineKeyboardButton("🎯 Прогресс", callback_data="ach:progress")
+    ],
+    [
+        InlineKeyboardButton("🔙 Назад", callback_data="lvl:main")
+    ]
+])
+
+# Справка по получению опыта
+_LEVEL_HELP_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🏆 Достижения", callback_data="ach:all"),
+        InlineKeyboardButton("📊 Статистика", callback_data="lvl:stats")
+    ],
+    [
+        InlineKeyboardButton("🔙 Назад", callback_data="lvl:main")
+    ]
+])
+
+# Статические ответы команд (строятся один раз при импорте)
+_HELP_TEXT = """
+📚 Доступные команды:
+
+/start - Запустить бота
+/help - Показать эту справку
+/test - Тестовая команда
+/remind - Создать напоминание
+/reminders - Мои напоминания
+/addtime - Добавить время использования
+/analytics - Аналитика экранного времени
+/detox - Управление планом детокса
+/focus - Таймер фокуса (Pomodoro)
+/quiet - Настройка тихих часов
+/content - Полезный контент
+/settings - Настройки профиля
+
+🏆 Система достижений:
+/achievements - Ваши достижения
+/level - Уровень и опыт
+/profile - Профиль пользователя
+
+💡 Советы:
+• /addtime 30 productivity - добавить 30 минут работы
+• /remind 15m Сделать перерыв - создать напоминание
+• /analytics - посмотреть статистику
+• /achievements - посмотреть достижения
+""".strip()
+
+_TEST_TEXT = "✅ Тестовая команда работает! Бот DetoxBuddy функционирует корректно."
+
+_DETOX_TEXT = """
+🧘‍♀️ План детокса
+
+Здесь вы сможете:
+• Создать персональный план детокса
+• Отслеживать прогресс
+• Получать рекомендации
+
+🚧 Функция в разработке
+""".strip()
+
+_QUIET_TEXT = """
+🌙 Тихие часы
+
+Настройте время для:
+• Отдыха от гаджетов
+• Подготовки ко сну
+• Цифрового детокса
+
+🚧 Функция в разработке
+""".strip()
+
+_CONTENT_TEXT = """
+📖 Полезный контент
+
+Получайте:
+• Ежедневные статьи о цифровой гигиене
+• Рекомендации по саморазвитию
+• Позитивный контент
+
+🚧 Функция в разработке
+""".strip()
+
+_ANALYTICS_ERROR_TEXT = """
+📊 Аналитика экранного времени
+
+❌ Произошла ошибка при получении данных.
+Попробуйте позже или добавьте данные о времени использования.
+
+💡 Используйте команды:
+• /addtime 30 productivity - добавить 30 минут продуктивного времени
+• /addtime 60 social - добавить 1 час в соцсетях
+• /addtime 45 entertainment - добавить 45 минут развлечений
+""".strip()
+
+_REMIND_USAGE_TEXT = """
+🔔 Создание напоминания
+
+Использование: /remind <время> <текст> [repeat]
+
+Примеры:
+• /remind 15m Сделать перерыв
+• /remind 1h Позвонить маме
+• /remind 30m Выпить воды repeat
+• /remind 2h Проверить почту repeat
+
+Время можно указать в формате:
+• 15m - 15 минут
+• 1h - 1 час
+• 2h30m - 2 часа 30 минут
+
+Добавьте "repeat" в конце для создания повторяющегося напоминания
+""".strip()
+
+_REMINDERS_EMPTY_TEXT = """
+📝 У вас пока нет напоминаний
+
+Создайте первое напоминание командой:
+/remind 15m Сделать перерыв
+""".strip()
+
+_SETTINGS_FALLBACK_TEXT = """
+⚙️ Настройки
+
+Управляйте:
+• Профилем пользователя
+• Настройками уведомлений
+• Предпочтениями контента
+
+🚧 Функция в разработке
+""".strip()
+
+_ADDTIME_USAGE_TEXT = """
+⏱️ Добавление времени использования
+
+Использование: /addtime <минуты> <тип_активности>
+
+Примеры:
+• /addtime 30 productivity - добавить 30 минут продуктивного времени
+• /addtime 60 social - добавить 1 час в соцсетях
+• /addtime 45 entertainment - добавить 45 минут развлечений
+• /addtime 20 other - добавить 20 минут другого времени
+
+Типы активности:
+• productivity - продуктивное время (работа, учеба)
+• social - социальные сети
+• entertainment - развлечения (игры, видео)
+• other - другое время
+""".strip()
+
+_CREATE_REMINDER_HELP_TEXT = """
+🔔 Создание напоминания
+
+Используйте команду:
+/remind <время> <текст>
+
+Примеры:
+• /remind 15m Сделать перерыв
+• /remind 1h Позвонить маме
+• /remind 30m Выпить воды
+
+Время можно указать в формате:
+• 15m - 15 минут
+• 1h - 1 час
+• 2h30m - 2 часа 30 минут
+""".strip()
+
+_RECURRING_DAILY_HELP_TEXT = """
+📅 Ежедневные напоминания
+
+Создать ежедневное напоминание:
+/daily <время> <название> [сообщение]
+
+Примеры:
+• /daily 09:00 "Утренняя зарядка"
+• /daily 18:00 "Вечерний детокс" "Время отложить телефон"
+• /daily 22:00 "Тихие часы" "Подготовка ко сну"
+
+Время указывайте в формате ЧЧ:ММ
+""".strip()
+
+_RECURRING_WEEKLY_HELP_TEXT = """
+📆 Еженедельные напоминания
+
+Создать еженедельное напоминание:
+/weekly <дни> <время> <название> [сообщение]
+
+Дни недели: mon,tue,wed,thu,fri,sat,sun
+Время: ЧЧ:ММ
+
+Примеры:
+• /weekly mon,wed,fri 09:00 "Утренняя зарядка"
+• /weekly sat,sun 10:00 "Выходные" "Время для себя"
+• /weekly mon 18:00 "Начало недели" "Планирование"
+
+Дни указывайте через запятую без пробелов
+""".strip()
+
+_ADDTIME_QUICK_HELP_TEXT = """
+⏱️ Быстрое добавление времени
+
+Используйте команду:
+/addtime <минуты> <тип>
+
+Примеры:
+• /addtime 30 productivity
+• /addtime 60 social
+• /addtime 45 entertainment
+
+Типы активности:
+• productivity - продуктивное время
+• social - социальные сети
+• entertainment - развлечения
+• other - другое время
+""".strip()
+
+_DAILY_USAGE_TEXT = """
+📅 Создание ежедневного напоминания
+
+Использование:
+/daily <время> <название> [сообщение]
+
+Примеры:
+• /daily 09:00 "Утренняя зарядка"
+• /daily 18:00 "Вечерний детокс" "Время отложить телефон"
+• /daily 22:00 "Тихие часы" "Подготовка ко сну"
+
+Время указывайте в формате ЧЧ:ММ
+""".strip()
+
+_WEEKLY_USAGE_TEXT = """
+📆 Создание еженедельного напоминания
+
+Использование:
+/weekly <дни> <время> <название> [сообщение]
+
+Дни недели: mon,tue,wed,thu,fri,sat,sun
+Время: ЧЧ:ММ
+
+Примеры:
+• /weekly mon,wed,fri 09:00 "Утренняя зарядка"
+• /weekly sat,sun 10:00 "Выходные" "Время для себя"
+• /weekly mon 18:00 "Начало недели" "Планирование"
+
+Дни указывайте через запятую без пробелов
+""".strip()
+
+_FOCUS_MENU_TEXT = """
+🍅 **Таймер фокуса (Pomodoro)**
+
+Выберите длительность сессии:
+
+• **25 минут** - классическая техника Pomodoro
+• **15 минут** - для быстрых задач
+• **45 минут** - для глубокой работы
+• **60 минут** - для сложных проектов
+
+После сессии автоматически начнется перерыв!
+""".strip()
+
+_FOCUS_PAUSED_TEXT = """
+⏸️ **Сессия приостановлена**
+
+Время паузы не засчитывается в общую длительность.
+Используйте "Продолжить" для возобновления.
+""".strip()
+
+_FOCUS_RESUMED_TEXT = """
+▶️ **Сессия возобновлена**
+
+Продолжайте работу! Таймер снова активен.
+""".strip()
+
+_FOCUS_COMPLETED_TEXT = """
+✅ **Сессия завершена досрочно**
+
+Хорошая работа! Даже частично завершенная сессия - это прогресс.
+""".strip()
+
+_FOCUS_CANCELLED_TEXT = """
+❌ **Сессия отменена**
+
+Не расстраивайтесь! Попробуйте снова, когда будете готовы.
+""".strip()
+
+_LEVEL_HELP_TEXT = """
+🎯 **Как получить опыт**
+
+**Основные способы:**
+
+🎯 **Сессии фокуса:**
+• Завершение сессии: +10 XP
+• Длительная сессия (45+ мин): +15 XP
+• Серия сессий: +5 XP за каждую
+
+📱 **Сокращение экранного времени:**
+• День с экраном < 6 часов: +20 XP
+• День с экраном < 4 часов: +30 XP
+• Неделя с экраном < 6 часов: +100 XP
+
+📅 **Серии дней:**
+• 7 дней подряд: +50 XP
+• 30 дней подряд: +200 XP
+• 100 дней подряд: +1000 XP
+
+⏰ **Выполнение напоминаний:**
+• Каждое напоминание: +5 XP
+• Серия напоминаний: +10 XP
+
+🏆 **Достижения:**
+• Каждое достижение: +10-500 XP
+• Редкие достижения: +1000 XP
+
+**Советы:**
+• Регулярность важнее количества
+• Маленькие шаги приводят к большим результатам
+• Отслеживайте свой прогресс
+""".strip()
+
+_RECURRING_EMPTY_TEXT = """
+🔄 Повторяющиеся напоминания
+
+У вас пока нет повторяющихся напоминаний.
+
+Создать новое:
+• /daily - ежедневное напоминание
+• /weekly - еженедельное напоминание
+• /remind - быстрое напоминание с повторением
+""".strip()
+
+_CANCEL_ALL_TEMPLATE = """
+✅ Отменено {n} активных напоминаний
+
+Все ваши активные напоминания были отменены.
+""".strip()
+
+_UNKNOWN_TEXT = """
+❓ Неизвестная команда
+
+Используйте /help для просмотра доступных команд.
+""".strip()
+
+
 class TelegramBot:
     """Основной класс Telegram бота"""
     
+    __slots__ = (
+        "application",
+        "token",
+        "polling_thread",
+        "focus_timer",
+        "_user_cache",
+        "_user_locks",
+        "_settings_cache",
+        "_insights_cache",
+        "_reminders_cache",
+        "_recurring_cache",
+        "_last_refresh",
+        "_chat_queues",
+        "_chat_workers",
+        "_command_table",
+        "_focus_actions",
+        "_achievement_views",
+        "_achievement_views_cache",
+        "_last_edits",
+        "_op_handlers",
+        "_legacy_callbacks",
+        "_legacy_callback_prefixes",
+        "_stop_event",
+        "_fallback_bot",
+    )
+    
     def __init__(self):
         """Инициализация бота"""
         self.application: Optional[Application] = None
@@ -39,6 +869,58 @@ class TelegramBot:
         self.polling_thread: Optional[threading.Thread] = None
         self.focus_timer: Optional[FocusTimer] = None
         
+        # Кэш пользователей: telegram_id -> (User, время истечения)
+        self._user_cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self._user_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+        
+        # Кэш настроек: telegram_id -> (dict настроек, время истечения)
+        self._settings_cache: "OrderedDict[int, tuple]" = OrderedDict()
+        
+        # Кэш аналитики: user_id -> (insights, время истечения)
+        self._insights_cache: "OrderedDict[int, tuple]" = OrderedDict()
+        
+        # Кэш напоминаний: user_id -> ((список, статистика), время истечения)
+        self._reminders_cache: "OrderedDict[int, tuple]" = OrderedDict()
+        
+        # Кэш повторяющихся: user_id -> ((повторяющиеся, статистика), время истечения)
+        self._recurring_cache: "OrderedDict[int, tuple]" = OrderedDict()
+        
+        # Кэш экранов достижений: (user_id, экран) -> (версия уровня, (текст, клавиатура), время истечения)
+        self._achievement_views_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        
+        # Последняя правка Markdown-сообщения: (chat_id, message_id) -> (текст, подпись клавиатуры)
+        self._last_edits: "OrderedDict[tuple, tuple]" = OrderedDict()
+        
+        # Последнее обновление экрана: (telegram_id, код операции) -> время
+        self._last_refresh: Dict[tuple, float] = {}
+        
+        # Очереди обновлений по чатам: порядок внутри чата сохраняется,
+        # медленный обработчик не задерживает другие чаты
+        self._chat_queues: Dict[int, asyncio.Queue] = {}
+        self._chat_workers: Dict[int, asyncio.Task] = {}
+        
+        # Таблица команд: имя команды -> обработчик
+        self._command_table = {name: getattr(self, attr) for name, attr in _COMMAND_HANDLERS}
+        
+        # Таблица действий таймера фокуса: действие -> обработчик(query, user_id)
+        self._focus_actions = {name: getattr(self, attr) for name, attr in _FOCUS_ACTIONS}
+        
+        # Экраны достижений: действие -> рендерер(db, user_id, user_level)
+        self._achievement_views = {name: getattr(self, attr) for name, attr in _ACHIEVEMENT_VIEWS}
+        
+        # Маршрутизация inline-кнопок: коды операций и старые форматы callback_data
+        (
+            self._op_handlers,
+            self._legacy_callbacks,
+            self._legacy_callback_prefixes,
+        ) = self._build_callback_tables()
+        
+        # Устанавливается в stop(); run_polling ждет его без периодических пробуждений
+        self._stop_event = asyncio.Event()
+        
+        # Бот для отправки без запущенного Application (создается один раз, закрывается в stop())
+        self._fallback_bot: Optional[Bot] = None
+        
     async def start(self):
         """Запуск бота"""
         if not self.token:
@@ -47,7 +929,14 @@ class TelegramBot:
             
         try:
             # Создание приложения
-            self.application = Application.builder().token(self.token).build()
+            # Лимитер PTB ограничивает каждый вызов API, включая context.bot,
+            # reply_text и edit_message_text
+            self.application = (
+                Application.builder()
+                .token(self.token)
+                .rate_limiter(self._make_rate_limiter())
+                .build()
+            )
             
             # Инициализация FocusTimer
             self.focus_timer = FocusTimer(self)
@@ -66,7 +955,7 @@ class TelegramBot:
             logger.info("Telegram bot started successfully")
             
         except Exception as e:
-            logger.error("Failed to start Telegram bot", error=str(e))
+            logger.error("Failed to start Telegram bot", error=e)
             raise
     
     async def run_polling(self):
@@ -78,87 +967,130 @@ class TelegramBot:
         try:
             # Удаляем webhook и запускаем polling
             await self.application.bot.delete_webhook()
-            await self.application.updater.start_polling()
+            await self.application.updater.start_polling(
+                timeout=_POLLING_TIMEOUT,
+                poll_interval=0.0,
+                bootstrap_retries=-1,
+                drop_pending_updates=False,
+                allowed_updates=_ALLOWED_UPDATES
+            )
             
-            # Держим бота запущенным
-            while True:
-                await asyncio.sleep(1)
+            # Держим бота запущенным до вызова stop()
+            await self._stop_event.wait()
         except Exception as e:
-            logger.error("Polling error", error=str(e))
+            logger.error("Polling error", error=e)
     
     async def stop(self):
         """Остановка бота"""
+        self._stop_event.set()
+        
+        for worker in self._chat_workers.values():
+            worker.cancel()
+        self._chat_workers.clear()
+        self._chat_queues.clear()
+        
         if self.focus_timer:
             await self.focus_timer.stop()
         
+        if self._fallback_bot:
+            await self._fallback_bot.shutdown()
+            self._fallback_bot = None
+        
         if self.application:
             await self.application.stop()
             await self.application.shutdown()
             logger.info("Telegram bot stopped")
     
+    def _per_chat(self, handler):
+        """
+        Оборачивает обработчик: обновление ставится в очередь своего чата,
+        а Application сразу переходит к следующему обновлению.
+        """
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            chat = update.effective_chat
+            if chat is None:
+                await handler(update, context)
+                return
+            
+            queue = self._chat_queues.get(chat.id)
+            if queue is None:
+                queue = self._chat_queues[chat.id] = asyncio.Queue()
+            queue.put_nowait((handler, update, context))
+            
+            worker = self._chat_workers.get(chat.id)
+            if worker is None or worker.done():
+                self._chat_workers[chat.id] = asyncio.create_task(
+                    self._chat_worker(chat.id, queue)
+                )
+        
+        return wrapper
+    
+    async def _chat_worker(self, chat_id: int, queue: asyncio.Queue):
+        """Последовательно обрабатывает обновления одного чата"""
+        while True:
+            try:
+                handler, update, context = await asyncio.wait_for(
+                    queue.get(), timeout=_CHAT_WORKER_IDLE_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    # Чат простаивает - освобождаем очередь и обработчик
+                    self._chat_queues.pop(chat_id, None)
+                    self._chat_workers.pop(chat_id, None)
+                    return
+                continue
+            
+            try:
+                # Одна сессия БД на всё обновление
+                with session_scope():
+                    await handler(update, context)
+            except Exception as e:
+                logger.error("Update handler failed", chat_id=chat_id, error=e)
+    
     async def _setup_handlers(self):
         """Настройка обработчиков команд"""
         if not self.application:
             return
         
-        # Команды
-        self.application.add_handler(CommandHandler("start", self._start_command))
-        self.application.add_handler(CommandHandler("help", self._help_command))
-        self.application.add_handler(CommandHandler("test", self._test_command))
-        self.application.add_handler(CommandHandler("remind", self._remind_command))
-        self.application.add_handler(CommandHandler("reminders", self._reminders_command))
-        self.application.add_handler(CommandHandler("detox", self._detox_command))
-        self.application.add_handler(CommandHandler("focus", self._focus_command))
-        self.application.add_handler(CommandHandler("quiet", self._quiet_command))
-        self.application.add_handler(CommandHandler("content", self._content_command))
-        self.application.add_handler(CommandHandler("analytics", self._analytics_command))
-        self.application.add_handler(CommandHandler("addtime", self._addtime_command))
-        self.application.add_handler(CommandHandler("settings", self._settings_command))
-        self.application.add_handler(CommandHandler("recurring", self._recurring_command))
-        self.application.add_handler(CommandHandler("daily", self._daily_command))
-        self.application.add_handler(CommandHandler("weekly", self._weekly_command))
-        self.application.add_handler(CommandHandler("achievements", self._achievements_command))
-        self.application.add_handler(CommandHandler("level", self._level_command))
-        self.application.add_handler(CommandHandler("profile", self._profile_command))
+        # Все обработчики выполняются через очереди чатов (см. _per_chat)
+        # Все команды (включая неизвестные) - через таблицу в _dispatch_command
+        self.application.add_handler(MessageHandler(filters.COMMAND, self._per_chat(self._dispatch_command)))
         
         # Обработка callback queries (inline кнопки)
-        self.application.add_handler(CallbackQueryHandler(self._handle_callback_query))
-        
-        # Обработка неизвестных команд
-        self.application.add_handler(MessageHandler(filters.COMMAND, self._unknown_command))
+        self.application.add_handler(CallbackQueryHandler(self._per_chat(self._handle_callback_query)))
         
         # Обработка текстовых сообщений
-        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self._handle_text))
+        self.application.add_handler(MessageHandler(_TEXT_FILTER, self._per_chat(self._handle_text)))
         
         logger.info("Telegram bot handlers setup completed")
     
+    async def _dispatch_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Единый обработчик команд: один поиск в словаре вместо проверки
+        каждого CommandHandler. Команды для других ботов и неизвестные
+        команды уходят в _unknown_command.
+        """
+        message = update.effective_message
+        command, _, target = message.text[1:message.entities[0].length].partition("@")
+        
+        handler = None
+        if not target or target.lower() == context.bot.username.lower():
+            handler = self._command_table.get(command.lower())
+        
+        if handler is None:
+            await self._unknown_command(update, context)
+            return
+        
+        # Аргументы команды, как их заполнил бы CommandHandler
+        context.args = message.text.split()[1:]
+        await handler(update, context)
+    
     async def _setup_commands(self):
         """Установка команд бота"""
         if not self.application:
             return
         
-        commands = [
-            BotCommand(constants.COMMAND_START, "Запустить бота"),
-            BotCommand(constants.COMMAND_HELP, "Помощь"),
-            BotCommand("test", "Тестовая команда"),
-            BotCommand("remind", "Создать напоминание"),
-            BotCommand("reminders", "Мои напоминания"),
-            BotCommand("recurring", "Повторяющиеся напоминания"),
-            BotCommand("daily", "Ежедневные напоминания"),
-            BotCommand("weekly", "Еженедельные напоминания"),
-            BotCommand("achievements", "Достижения"),
-            BotCommand("level", "Уровень и опыт"),
-            BotCommand("profile", "Профиль"),
-            BotCommand(constants.COMMAND_DETOX, "План детокса"),
-            BotCommand(constants.COMMAND_FOCUS, "Таймер фокуса"),
-            BotCommand(constants.COMMAND_QUIET, "Тихие часы"),
-            BotCommand(constants.COMMAND_CONTENT, "Полезный контент"),
-            BotCommand(constants.COMMAND_ANALYTICS, "Аналитика"),
-            BotCommand("addtime", "Добавить время"),
-            BotCommand(constants.COMMAND_SETTINGS, "Настройки"),
-        ]
-        
-        await self.application.bot.set_my_commands(commands)
+        await self.application.bot.set_my_commands(_BOT_COMMANDS)
         logger.info("Telegram bot commands setup completed")
     
     async def _authenticate_user(self, update: Update) -> Optional[User]:
@@ -169,19 +1101,141 @@ class TelegramBot:
         if not update.effective_user:
             return None
         
-        try:
-            user = user_service.authenticate_telegram_user(update.effective_user)
+        telegram_id = update.effective_user.id
+        user = self._get_cached_user(telegram_id)
+        if user:
+            return user
+        
+        # Один запрос к БД на пользователя при холодном кэше
+        lock = self._user_locks.get(telegram_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._user_locks[telegram_id] = lock
+        
+        async with lock:
+            user = self._get_cached_user(telegram_id)
             if user:
+                return user
+            
+            try:
+                # Поиск/создание пользователя в рабочем потоке, не блокируя цикл событий
+                user = await asyncio.to_thread(
+                    user_service.authenticate_telegram_user, update.effective_user
+                )
+                if user:
+                    self._cache_user(telegram_id, user)
+                    logger.info(
+                        "User authenticated",
+                        user_id=user.id,
+                        telegram_id=user.telegram_id,
+                        username=user.username
+                    )
+                return user
+            except Exception as e:
+                logger.error("Failed to authenticate user", error=e)
+                return None
+    
+    async def _run_with_user(self, update: Update, work) -> Tuple[Optional[User], object]:
+        """
+        Аутентификация и данные команды в одном рабочем потоке и одной сессии.
+        work(db, user) выполняется в рабочем потоке; при холодном кэше пользователь
+        ищется/создается в той же сессии (user_service берет её из session_scope).
+        Возвращает (пользователь, результат work); (None, None), если аутентификация не удалась.
+        """
+        if not update.effective_user:
+            return None, None
+        
+        telegram_id = update.effective_user.id
+        user = self._get_cached_user(telegram_id)
+        if user:
+            return await asyncio.to_thread(self._run_in_session, work, user)
+        
+        lock = self._user_locks.get(telegram_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._user_locks[telegram_id] = lock
+        
+        async with lock:
+            user = self._get_cached_user(telegram_id)
+            if user:
+                return await asyncio.to_thread(self._run_in_session, work, user)
+            
+            user, result = await asyncio.to_thread(
+                self._run_in_session, work, None, update.effective_user
+            )
+            if user:
+                self._cache_user(telegram_id, user)
                 logger.info(
                     "User authenticated",
                     user_id=user.id,
                     telegram_id=user.telegram_id,
                     username=user.username
                 )
-            return user
-        except Exception as e:
-            logger.error(f"Failed to authenticate user: {e}")
+            return user, result
+    
+    @staticmethod
+    def _run_in_session(work, user: Optional[User], telegram_user=None) -> Tuple[Optional[User], object]:
+        """Тело _run_with_user (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            if user is None:
+                try:
+                    user = user_service.authenticate_telegram_user(telegram_user)
+                except Exception as e:
+                    logger.error("Failed to authenticate user", error=e)
+                    return None, None
+                if user is None:
+                    return None, None
+            return user, work(db, user)
+    
+    def _get_cached_user(self, telegram_id: int) -> Optional[User]:
+        """Получить пользователя из кэша"""
+        entry = self._user_cache.get(telegram_id)
+        if entry is None:
+            return None
+        
+        user, expires_at = entry
+        if time.monotonic() >= expires_at:
+            # Удаляем устаревшую запись
+            del self._user_cache[telegram_id]
             return None
+        
+        self._user_cache.move_to_end(telegram_id)
+        return user
+    
+    def _cache_user(self, telegram_id: int, user: User):
+        """Кэшировать пользователя"""
+        self._user_cache[telegram_id] = (user, time.monotonic() + _USER_CACHE_TTL)
+        self._user_cache.move_to_end(telegram_id)
+        if len(self._user_cache) > _USER_CACHE_MAXSIZE:
+            self._user_cache.popitem(last=False)
+    
+    def _invalidate_user_cache(self, telegram_id: Optional[int] = None):
+        """Сбросить кэш пользователя и его настроек (после изменения его данных)"""
+        if telegram_id is not None:
+            self._user_cache.pop(telegram_id, None)
+            self._settings_cache.pop(telegram_id, None)
+        else:
+            self._user_cache.clear()
+            self._settings_cache.clear()
+    
+    async def _get_user_settings(self, telegram_id: int) -> Optional[dict]:
+        """Получить настройки пользователя (из кэша или из БД в рабочем потоке)"""
+        entry = self._settings_cache.get(telegram_id)
+        if entry is not None:
+            settings_dict, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._settings_cache.move_to_end(telegram_id)
+                return settings_dict
+            del self._settings_cache[telegram_id]
+        
+        settings_dict = await asyncio.to_thread(
+            user_service.get_user_settings_by_telegram_id, telegram_id
+        )
+        if settings_dict:
+            self._settings_cache[telegram_id] = (settings_dict, time.monotonic() + _SETTINGS_CACHE_TTL)
+            if len(self._settings_cache) > _SETTINGS_CACHE_MAXSIZE:
+                self._settings_cache.popitem(last=False)
+        return settings_dict
 
     async def _start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /start"""
@@ -197,12 +1251,12 @@ class TelegramBot:
         chat_id = update.effective_chat.id
         
         # Проверяем, новый ли это пользователь (созданный менее минуты назад)
-        from datetime import datetime, timedelta
-        is_new_user = (datetime.utcnow() - user.created_at) < timedelta(minutes=1)
+        # created_at хранится как наивное UTC-время
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        is_new_user = (now - user.created_at) < _NEW_USER_WINDOW
         
         if is_new_user:
-            welcome_message = f"""
-🎉 Добро пожаловать в {settings.project_name}, {telegram_user.first_name}!
+            welcome_message = f"""🎉 Добро пожаловать в {settings.project_name}, {telegram_user.first_name}!
 
 Вы успешно зарегистрированы! Теперь я помогу вам осознанно подходить к цифровому потреблению и улучшить цифровую гигиену.
 
@@ -213,18 +1267,15 @@ class TelegramBot:
 • Предлагать полезный контент
 • Анализировать экранное время
 
-Используйте /help для получения справки по командам.
-            """
+Используйте /help для получения справки по командам."""
         else:
-            welcome_message = f"""
-👋 С возвращением, {user.full_name}!
+            welcome_message = f"""👋 С возвращением, {user.full_name}!
 
-Рад видеть вас снова. Используйте /help для просмотра доступных команд.
-            """
+Рад видеть вас снова. Используйте /help для просмотра доступных команд."""
         
         await context.bot.send_message(
             chat_id=chat_id,
-            text=welcome_message.strip()
+            text=welcome_message
         )
         
         logger.info(
@@ -237,68 +1288,23 @@ class TelegramBot:
     
     async def _help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /help"""
-        chat_id = update.effective_chat.id
-        
-        help_message = """
-📚 Доступные команды:
-
-/start - Запустить бота
-/help - Показать эту справку
-/test - Тестовая команда
-/remind - Создать напоминание
-/reminders - Мои напоминания
-/addtime - Добавить время использования
-/analytics - Аналитика экранного времени
-/detox - Управление планом детокса
-/focus - Таймер фокуса (Pomodoro)
-/quiet - Настройка тихих часов
-/content - Полезный контент
-/settings - Настройки профиля
-
-🏆 Система достижений:
-/achievements - Ваши достижения
-/level - Уровень и опыт
-/profile - Профиль пользователя
-
-💡 Советы:
-• /addtime 30 productivity - добавить 30 минут работы
-• /remind 15m Сделать перерыв - создать напоминание
-• /analytics - посмотреть статистику
-• /achievements - посмотреть достижения
-        """
-        
         await context.bot.send_message(
-            chat_id=chat_id,
-            text=help_message.strip()
+            chat_id=update.effective_chat.id,
+            text=_HELP_TEXT
         )
     
     async def _test_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /test"""
-        chat_id = update.effective_chat.id
-        
         await context.bot.send_message(
-            chat_id=chat_id,
-            text="✅ Тестовая команда работает! Бот DetoxBuddy функционирует корректно."
+            chat_id=update.effective_chat.id,
+            text=_TEST_TEXT
         )
     
     async def _detox_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /detox"""
-        chat_id = update.effective_chat.id
-        
-        message = """
-🧘‍♀️ План детокса
-
-Здесь вы сможете:
-• Создать персональный план детокса
-• Отслеживать прогресс
-• Получать рекомендации
-
-🚧 Функция в разработке
-        """
-        
         await context.bot.send_message(
-            chat_id=chat_id,
-            text=message.strip()
+            chat_id=update.effective_chat.id,
+            text=_DETOX_TEXT
         )
     
     async def _focus_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -326,49 +1332,23 @@ class TelegramBot:
             await self._show_focus_session_menu(update)
             
         except Exception as e:
-            logger.error(f"Error in focus command: {e}")
+            logger.error("Error in focus command", error=e)
             await update.message.reply_text(
                 "❌ Произошла ошибка при работе с таймером фокуса. Попробуйте позже."
             )
     
     async def _quiet_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /quiet"""
-        chat_id = update.effective_chat.id
-        
-        message = """
-🌙 Тихие часы
-
-Настройте время для:
-• Отдыха от гаджетов
-• Подготовки ко сну
-• Цифрового детокса
-
-🚧 Функция в разработке
-        """
-        
         await context.bot.send_message(
-            chat_id=chat_id,
-            text=message.strip()
+            chat_id=update.effective_chat.id,
+            text=_QUIET_TEXT
         )
     
     async def _content_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /content"""
-        chat_id = update.effective_chat.id
-        
-        message = """
-📖 Полезный контент
-
-Получайте:
-• Ежедневные статьи о цифровой гигиене
-• Рекомендации по саморазвитию
-• Позитивный контент
-
-🚧 Функция в разработке
-        """
-        
         await context.bot.send_message(
-            chat_id=chat_id,
-            text=message.strip()
+            chat_id=update.effective_chat.id,
+            text=_CONTENT_TEXT
         )
     
     async def _analytics_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -384,51 +1364,20 @@ class TelegramBot:
         chat_id = update.effective_chat.id
         
         try:
-            # Получаем аналитику
-            from detoxbuddy.core.services.screen_time_service import ScreenTimeService
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                screen_time_service = ScreenTimeService(db)
-                insights = screen_time_service.get_user_insights(user.id)
+            # Получаем аналитику (из кэша или в рабочем потоке)
+            insights = await self._get_insights_cached(user.id)
             
             # Формируем сообщение с аналитикой
             message = self._format_analytics_message(insights)
             
         except Exception as e:
-            logger.error(f"Error getting analytics: {e}")
-            message = """
-📊 Аналитика экранного времени
-
-❌ Произошла ошибка при получении данных.
-Попробуйте позже или добавьте данные о времени использования.
-
-💡 Используйте команды:
-• /addtime 30 productivity - добавить 30 минут продуктивного времени
-• /addtime 60 social - добавить 1 час в соцсетях
-• /addtime 45 entertainment - добавить 45 минут развлечений
-            """
-        
-        # Создаем inline кнопки для аналитики
-        keyboard = [
-            [
-                InlineKeyboardButton("📈 Детальный отчет", callback_data="analytics_detailed"),
-                InlineKeyboardButton("📊 Тренды", callback_data="analytics_trends")
-            ],
-            [
-                InlineKeyboardButton("🎯 Цели", callback_data="analytics_goals"),
-                InlineKeyboardButton("🏆 Достижения", callback_data="analytics_achievements")
-            ],
-            [
-                InlineKeyboardButton("⏰ Добавить время", callback_data="add_time_quick")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            logger.error("Error getting analytics", error=e)
+            message = _ANALYTICS_ERROR_TEXT
         
         await context.bot.send_message(
             chat_id=chat_id,
-            text=message.strip(),
-            reply_markup=reply_markup
+            text=message,
+            reply_markup=_ANALYTICS_KEYBOARD
         )
     
     async def _remind_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -446,24 +1395,7 @@ class TelegramBot:
         # Проверяем аргументы команды
         args = context.args
         if len(args) < 1:
-            message = """
-🔔 Создание напоминания
-
-Использование: /remind <время> <текст> [repeat]
-
-Примеры:
-• /remind 15m Сделать перерыв
-• /remind 1h Позвонить маме
-• /remind 30m Выпить воды repeat
-• /remind 2h Проверить почту repeat
-
-Время можно указать в формате:
-• 15m - 15 минут
-• 1h - 1 час
-• 2h30m - 2 часа 30 минут
-
-Добавьте "repeat" в конце для создания повторяющегося напоминания
-            """
+            message = _REMIND_USAGE_TEXT
         else:
             try:
                 # Парсим время
@@ -483,71 +1415,39 @@ class TelegramBot:
                 if delay_minutes <= 0:
                     raise ValueError("Время должно быть больше 0")
                 
-                # Создаем напоминание
-                from detoxbuddy.database.crud.reminder import reminder_crud
-                from detoxbuddy.database.database import SessionLocal
-                from detoxbuddy.database.models.reminder import ReminderType
+                # Создаем напоминание в рабочем потоке, не блокируя цикл событий
+                reminder_id = await asyncio.to_thread(
+                    self._create_reminder, user.id, text, delay_minutes, is_recurring
+                )
+                self._invalidate_reminders(user.id)
                 
-                with SessionLocal() as db:
-                    if is_recurring:
-                        # Создаем повторяющееся напоминание
-                        from datetime import datetime, timedelta
-                        start_time = datetime.now() + timedelta(minutes=delay_minutes)
-                        
-                        reminder = reminder_crud.create_recurring_reminder(
-                            db=db,
-                            user_id=user.id,
-                            title=text,
-                            message=text,
-                            reminder_type=ReminderType.CUSTOM,
-                            repeat_interval=delay_minutes,
-                            start_time=start_time
-                        )
-                        
-                        # Добавляем в планировщик
-                        from detoxbuddy.core.reminder_scheduler import add_reminder_to_scheduler
-                        add_reminder_to_scheduler(reminder)
-                        
-                        message = f"""
-✅ Повторяющееся напоминание создано!
+                if is_recurring:
+                    message = f"""✅ Повторяющееся напоминание создано!
 
 📝 Текст: {text}
 ⏰ Первое напоминание: через {self._format_time(delay_minutes)}
 🔄 Повторение: каждые {self._format_time(delay_minutes)}
-🆔 ID: {reminder.id}
+🆔 ID: {reminder_id}
 
-Используйте /recurring для управления повторяющимися напоминаниями.
-                        """
-                    else:
-                        # Создаем обычное напоминание
-                        reminder = reminder_crud.create_quick_reminder(
-                            db=db,
-                            user_id=user.id,
-                            title=text,
-                            message=text,
-                            delay_minutes=delay_minutes,
-                            reminder_type=ReminderType.CUSTOM
-                        )
-                        
-                        message = f"""
-✅ Напоминание создано!
+Используйте /recurring для управления повторяющимися напоминаниями."""
+                else:
+                    message = f"""✅ Напоминание создано!
 
 📝 Текст: {text}
 ⏰ Время: через {self._format_time(delay_minutes)}
-🆔 ID: {reminder.id}
+🆔 ID: {reminder_id}
 
-Используйте /reminders для просмотра всех напоминаний.
-                        """
+Используйте /reminders для просмотра всех напоминаний."""
                 
             except ValueError as e:
                 message = f"❌ Ошибка: {str(e)}\n\nИспользуйте /remind для получения справки."
             except Exception as e:
-                logger.error(f"Error creating reminder: {e}")
+                logger.error("Error creating reminder", error=e)
                 message = "❌ Произошла ошибка при создании напоминания. Попробуйте позже."
         
         await context.bot.send_message(
             chat_id=chat_id,
-            text=message.strip()
+            text=message
         )
     
     async def _reminders_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -563,112 +1463,262 @@ class TelegramBot:
         chat_id = update.effective_chat.id
         
         try:
-            # Получаем напоминания пользователя
-            from detoxbuddy.database.crud.reminder import reminder_crud
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                reminders = reminder_crud.get_reminders_for_telegram_bot(db, user_id=user.id, limit=10)
+            # Получаем напоминания пользователя в рабочем потоке
+            reminders, _ = await self._get_reminders_cached(user.id)
             
             if not reminders:
-                message = """
-📝 У вас пока нет напоминаний
-
-Создайте первое напоминание командой:
-/remind 15m Сделать перерыв
-                """
-                
-                # Кнопка для создания напоминания
-                keyboard = [
-                    [InlineKeyboardButton("➕ Создать напоминание", callback_data="create_reminder")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
+                message = _REMINDERS_EMPTY_TEXT
+                reply_markup = _REMINDERS_KEYBOARD_EMPTY
             else:
-                message = "📝 Ваши напоминания:\n\n"
-                
-                for reminder in reminders:
-                    # Определяем эмодзи статуса
-                    status_emoji = {
-                        "active": "🟢",
-                        "sent": "✅",
-                        "cancelled": "❌",
-                        "expired": "⏰"
-                    }.get(reminder.status.value, "🔔")
-                    
-                    # Определяем эмодзи типа
-                    type_emoji = {
-                        "daily": "📅",
-                        "weekly": "📆",
-                        "custom": "⚙️",
-                        "detox_reminder": "🧘",
-                        "focus_reminder": "🎯",
-                        "break_reminder": "☕",
-                        "quiet_hours": "🤫"
-                    }.get(reminder.reminder_type.value, "🔔")
-                    
-                    # Форматируем время
-                    scheduled_time = reminder.scheduled_time.strftime("%d.%m %H:%M")
-                    
-                    message += f"{status_emoji} {type_emoji} {reminder.title}\n"
-                    message += f"   ⏰ {scheduled_time} | ID: {reminder.id}\n"
-                    if reminder.message and reminder.message != "None":
-                        message += f"   📝 {reminder.message[:50]}{'...' if len(reminder.message) > 50 else ''}\n"
-                    message += "\n"
-                
-                # Кнопки для управления напоминаниями
-                keyboard = [
-                    [
-                        InlineKeyboardButton("➕ Создать", callback_data="create_reminder"),
-                        InlineKeyboardButton("🔄 Обновить", callback_data="refresh_reminders")
-                    ],
-                    [
-                        InlineKeyboardButton("❌ Отменить все", callback_data="cancel_all_reminders"),
-                        InlineKeyboardButton("📊 Статистика", callback_data="reminders_stats")
-                    ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
+                message = self._format_reminders(reminders)
+                reply_markup = _REMINDERS_KEYBOARD_FULL
         
         except Exception as e:
-            logger.error(f"Error getting reminders: {e}")
+            logger.error("Error getting reminders", error=e)
             message = "❌ Произошла ошибка при получении напоминаний. Попробуйте позже."
             reply_markup = None
         
         await context.bot.send_message(
             chat_id=chat_id,
-            text=message.strip(),
+            text=message,
             reply_markup=reply_markup
         )
     
+    @staticmethod
+    def _format_reminders(reminders) -> str:
+        """Текст списка напоминаний для /reminders и кнопки обновления"""
+        status_emojis = _REMINDER_STATUS_EMOJI
+        type_emojis = _REMINDER_TYPE_EMOJI
+        blocks = []
+        
+        for reminder in reminders:
+            # Каждый атрибут ORM-объекта читается один раз
+            status_emoji = status_emojis.get(reminder.status.value, "🔔")
+            type_emoji = type_emojis.get(reminder.reminder_type.value, "🔔")
+            title = reminder.title
+            reminder_id = reminder.id
+            st = reminder.scheduled_time
+            scheduled_time = f"{st.day:02d}.{st.month:02d} {st.hour:02d}:{st.minute:02d}"
+            text = reminder.message
+            
+            block = f"{status_emoji} {type_emoji} {title}\n   ⏰ {scheduled_time} | ID: {reminder_id}"
+            if text and text != "None":
+                preview = text if len(text) <= 50 else text[:50] + "..."
+                block += f"\n   📝 {preview}"
+            blocks.append(block)
+        
+        # Блоки напоминаний разделены пустой строкой
+        return "📝 Ваши напоминания:\n\n" + "\n\n".join(blocks)
+    
+    @staticmethod
+    def _format_recurring_list(recurring_reminders, total: int) -> str:
+        """
+        Текст списка повторяющихся напоминаний для /recurring и кнопки обновления.
+        recurring_reminders - первые напоминания, total - их общее число.
+        """
+        if not recurring_reminders:
+            return _RECURRING_EMPTY_TEXT
+        
+        type_emojis = _REMINDER_TYPE_EMOJI
+        # Части собираются в список и склеиваются одним join
+        parts = [f"🔄 Повторяющиеся напоминания ({total}):"]
+        append = parts.append
+        
+        for i, reminder in enumerate(recurring_reminders[:10], 1):
+            status_emoji = "✅" if reminder.is_enabled else "⏸️"
+            type_emoji = type_emojis.get(reminder.reminder_type.value, "🔔")
+            st = reminder.scheduled_time
+            append(f"\n\n{i}. {status_emoji} {type_emoji} {reminder.title}\n   ⏰ {st.hour:02d}:{st.minute:02d}")
+            
+            if reminder.is_recurring and reminder.repeat_interval:
+                append(f" (каждые {reminder.repeat_interval} мин.)")
+            elif reminder.reminder_type == ReminderType.DAILY:
+                append(" (ежедневно)")
+            elif reminder.reminder_type == ReminderType.WEEKLY:
+                append(" (еженедельно)")
+        
+        if total > 10:
+            append(f"\n\n... и еще {total - 10} напоминаний")
+        return "".join(parts)
+    
+    def _create_reminder(self, user_id: int, text: str, delay_minutes: int, is_recurring: bool) -> int:
+        """Создает напоминание (выполняется в рабочем потоке), возвращает его ID"""
+        with session_scope() as db:
+            if is_recurring:
+                # Создаем повторяющееся напоминание
+                start_time = datetime.now() + timedelta(minutes=delay_minutes)
+                
+                reminder = reminder_crud.create_recurring_reminder(
+                    db=db,
+                    user_id=user_id,
+                    title=text,
+                    message=text,
+                    reminder_type=ReminderType.CUSTOM,
+                    repeat_interval=delay_minutes,
+                    start_time=start_time
+                )
+                
+                # Добавляем в планировщик
+                add_reminder_to_scheduler(reminder)
+            else:
+                # Создаем обычное напоминание
+                reminder = reminder_crud.create_quick_reminder(
+                    db=db,
+                    user_id=user_id,
+                    title=text,
+                    message=text,
+                    delay_minutes=delay_minutes,
+                    reminder_type=ReminderType.CUSTOM
+                )
+            
+            return reminder.id
+    
+    def _fetch_reminders_overview(self, user_id: int) -> tuple:
+        """Загружает список и статистику напоминаний (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            return reminder_crud.get_list_and_stats(db, user_id=user_id, limit=10)
+    
+    async def _get_reminders_cached(self, user_id: int) -> tuple:
+        """
+        (список, статистика) напоминаний с коротким TTL: переход между
+        списком и статистикой не повторяет запросы к БД.
+        """
+        entry = self._reminders_cache.get(user_id)
+        if entry is not None:
+            overview, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._reminders_cache.move_to_end(user_id)
+                return overview
+            del self._reminders_cache[user_id]
+        
+        overview = await asyncio.to_thread(self._fetch_reminders_overview, user_id)
+        self._reminders_cache[user_id] = (overview, time.monotonic() + _REMINDERS_CACHE_TTL)
+        if len(self._reminders_cache) > _REMINDERS_CACHE_MAXSIZE:
+            self._reminders_cache.popitem(last=False)
+        return overview
+    
+    def _invalidate_reminders(self, user_id: int):
+        """Сбросить кэши напоминаний пользователя (после их изменения)"""
+        self._reminders_cache.pop(user_id, None)
+        self._recurring_cache.pop(user_id, None)
+    
+    def _fetch_recurring_overview(self, user_id: int) -> tuple:
+        """Загружает повторяющиеся напоминания и статистику (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            return reminder_crud.get_recurring_and_stats(db, user_id, limit=10)
+    
+    async def _get_recurring_cached(self, user_id: int) -> tuple:
+        """
+        (повторяющиеся, статистика) с коротким TTL: переход между списком,
+        настройками и статистикой /recurring не повторяет запросы к БД.
+        """
+        entry = self._recurring_cache.get(user_id)
+        if entry is not None:
+            overview, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._recurring_cache.move_to_end(user_id)
+                return overview
+            del self._recurring_cache[user_id]
+        
+        overview = await asyncio.to_thread(self._fetch_recurring_overview, user_id)
+        self._recurring_cache[user_id] = (overview, time.monotonic() + _REMINDERS_CACHE_TTL)
+        if len(self._recurring_cache) > _REMINDERS_CACHE_MAXSIZE:
+            self._recurring_cache.popitem(last=False)
+        return overview
+    
+    def _create_daily_reminder(self, user_id: int, title: str, message: Optional[str], reminder_time):
+        """Создает ежедневное напоминание и добавляет его в планировщик (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            reminder = reminder_crud.create_daily_reminder(
+                db=db,
+                user_id=user_id,
+                title=title,
+                message=message,
+                reminder_time=reminder_time
+            )
+            
+            # Планировщик пишет задачу в хранилище заданий (SQLite)
+            add_reminder_to_scheduler(reminder)
+            return reminder
+    
+    def _create_weekly_reminder(
+        self, user_id: int, title: str, message: Optional[str], days_mask: int, reminder_time
+    ):
+        """Создает еженедельное напоминание и добавляет его в планировщик (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            reminder = reminder_crud.create_weekly_reminder(
+                db=db,
+                user_id=user_id,
+                title=title,
+                message=message,
+                days_mask=days_mask,
+                reminder_time=reminder_time
+            )
+            
+            # Планировщик пишет задачу в хранилище заданий (SQLite)
+            add_reminder_to_scheduler(reminder)
+            return reminder
+    
+    def _fetch_focus_stats(self, user_id: int) -> tuple:
+        """Статистика фокуса за 7 дней и серия дней (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            stats = focus_session.get_user_stats(db, user_id, days=7)
+            return stats, focus_session.get_streak_days(db, user_id)
+    
+    def _cancel_all_reminders(self, user_id: int) -> int:
+        """Отменяет активные напоминания пользователя (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            return reminder_crud.cancel_all_active_reminders(db, user_id=user_id)
+    
+    def _delete_reminder(self, reminder_id: int, user_id: int) -> Optional[str]:
+        """Удаляет напоминание пользователя (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            return reminder_crud.delete_if_owned(db, id=reminder_id, user_id=user_id)
+    
+    def _add_quick_entry(self, user_id: int, quick_entry: QuickScreenTimeEntry):
+        """Записывает время использования из /addtime (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            return ScreenTimeService(db).create_quick_entry(user_id, quick_entry)
+    
+    def _fetch_insights(self, user_id: int) -> dict:
+        """Загружает аналитику экранного времени (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            return ScreenTimeService(db).get_user_insights(user_id)
+    
+    async def _get_insights_cached(self, user_id: int) -> dict:
+        """
+        Аналитика пользователя с коротким TTL: переключение вкладок
+        аналитики не пересчитывает её каждый раз.
+        """
+        entry = self._insights_cache.get(user_id)
+        if entry is not None:
+            insights, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._insights_cache.move_to_end(user_id)
+                return insights
+            del self._insights_cache[user_id]
+        
+        insights = await asyncio.to_thread(self._fetch_insights, user_id)
+        self._insights_cache[user_id] = (insights, time.monotonic() + _INSIGHTS_CACHE_TTL)
+        if len(self._insights_cache) > _INSIGHTS_CACHE_MAXSIZE:
+            self._insights_cache.popitem(last=False)
+        return insights
+    
     def _parse_time_string(self, time_str: str) -> int:
         """Парсит строку времени в минуты"""
-        time_str = time_str.lower().strip()
-        total_minutes = 0
+        match = _TIME_RE.fullmatch(time_str.strip())
+        if not match or not match.group(0):
+            raise ValueError("Неверный формат времени")
         
-        # Парсим часы
-        if 'h' in time_str:
-            parts = time_str.split('h')
-            if len(parts) == 2:
-                try:
-                    hours = int(parts[0])
-                    total_minutes += hours * 60
-                    time_str = parts[1]
-                except ValueError:
-                    raise ValueError("Неверный формат времени")
-        
-        # Парсим минуты
-        if 'm' in time_str:
-            parts = time_str.split('m')
-            if len(parts) >= 1:
-                try:
-                    minutes = int(parts[0])
-                    total_minutes += minutes
-                except ValueError:
-                    raise ValueError("Неверный формат времени")
-        
-        return total_minutes
+        hours = int(match.group(1) or 0)
+        minutes = int(match.group(2) or 0)
+        return hours * 60 + minutes
     
     def _format_time(self, minutes: int) -> str:
         """Форматирует минуты в читаемый вид"""
+        if 0 <= minutes < len(_FORMATTED_TIME):
+            return _FORMATTED_TIME[minutes]
+        
         if minutes < 60:
             return f"{minutes} мин"
         else:
@@ -692,11 +1742,10 @@ class TelegramBot:
         chat_id = update.effective_chat.id
         
         # Получаем настройки пользователя
-        settings_dict = user_service.get_user_settings_by_telegram_id(user.telegram_id)
+        settings_dict = await self._get_user_settings(user.telegram_id)
         
         if settings_dict:
-            settings_text = f"""
-⚙️ Ваши текущие настройки:
+            settings_text = f"""⚙️ Ваши текущие настройки:
 
 👤 Профиль:
 • Имя: {user.full_name}
@@ -722,35 +1771,18 @@ class TelegramBot:
 
             settings_text += "\n💡 Полная система настроек в разработке."
         else:
-            settings_text = """
-⚙️ Настройки
-
-Управляйте:
-• Профилем пользователя
-• Настройками уведомлений
-• Предпочтениями контента
-
-🚧 Функция в разработке
-            """
+            settings_text = _SETTINGS_FALLBACK_TEXT
         
         await context.bot.send_message(
             chat_id=chat_id,
-            text=settings_text.strip()
+            text=settings_text
         )
     
     async def _unknown_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка неизвестных команд"""
-        chat_id = update.effective_chat.id
-        
-        message = """
-❓ Неизвестная команда
-
-Используйте /help для просмотра доступных команд.
-        """
-        
         await context.bot.send_message(
-            chat_id=chat_id,
-            text=message.strip()
+            chat_id=update.effective_chat.id,
+            text=_UNKNOWN_TEXT
         )
     
     async def _addtime_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -768,23 +1800,7 @@ class TelegramBot:
         # Проверяем аргументы команды
         args = context.args
         if len(args) < 2:
-            message = """
-⏱️ Добавление времени использования
-
-Использование: /addtime <минуты> <тип_активности>
-
-Примеры:
-• /addtime 30 productivity - добавить 30 минут продуктивного времени
-• /addtime 60 social - добавить 1 час в соцсетях
-• /addtime 45 entertainment - добавить 45 минут развлечений
-• /addtime 20 other - добавить 20 минут другого времени
-
-Типы активности:
-• productivity - продуктивное время (работа, учеба)
-• social - социальные сети
-• entertainment - развлечения (игры, видео)
-• other - другое время
-            """
+            message = _ADDTIME_USAGE_TEXT
         else:
             try:
                 # Парсим аргументы
@@ -794,116 +1810,126 @@ class TelegramBot:
                 if minutes <= 0 or minutes > 1440:  # Максимум 24 часа
                     raise ValueError("Время должно быть от 1 до 1440 минут")
                 
-                # Проверяем тип активности
-                valid_types = ['productivity', 'social', 'entertainment', 'other']
-                if activity_type not in valid_types:
-                    raise ValueError(f"Неверный тип активности. Доступные: {', '.join(valid_types)}")
+                # Проверяем тип активности до записи в БД
+                activity_name = _ACTIVITY_NAMES.get(activity_type)
+                if activity_name is None:
+                    raise ValueError(f"Неверный тип активности. Доступные: {', '.join(_ACTIVITY_NAMES)}")
                 
                 # Добавляем время
-                from detoxbuddy.core.services.screen_time_service import ScreenTimeService
-                from detoxbuddy.database.schemas.screen_time import QuickScreenTimeEntry
-                from detoxbuddy.database.database import SessionLocal
-                
-                with SessionLocal() as db:
-                    screen_time_service = ScreenTimeService(db)
-                    quick_entry = QuickScreenTimeEntry(
-                        minutes=minutes,
-                        activity_type=activity_type
-                    )
-                    screen_time = screen_time_service.create_quick_entry(user.id, quick_entry)
+                quick_entry = QuickScreenTimeEntry(
+                    minutes=minutes,
+                    activity_type=activity_type
+                )
+                screen_time = await asyncio.to_thread(self._add_quick_entry, user.id, quick_entry)
                 
-                # Форматируем тип активности для отображения
-                activity_names = {
-                    'productivity': 'продуктивное время',
-                    'social': 'социальные сети',
-                    'entertainment': 'развлечения',
-                    'other': 'другое время'
-                }
+                # Новые данные - аналитика пользователя устарела
+                self._insights_cache.pop(user.id, None)
                 
-                message = f"""
-✅ Время добавлено!
+                entry_date = screen_time.date
+                message = f"""✅ Время добавлено!
 
-⏱️ {self._format_time(minutes)} {activity_names[activity_type]}
-📅 Дата: {screen_time.date.strftime('%d.%m.%Y')}
+⏱️ {self._format_time(minutes)} {activity_name}
+📅 Дата: {entry_date.day:02d}.{entry_date.month:02d}.{entry_date.year}
 📊 Всего за день: {self._format_time(screen_time.total_minutes)}
 
-💡 Используйте /analytics для просмотра статистики.
-                """
+💡 Используйте /analytics для просмотра статистики."""
                 
             except ValueError as e:
                 message = f"❌ Ошибка: {str(e)}\n\nИспользуйте /addtime для получения справки."
             except Exception as e:
-                logger.error(f"Error adding screen time: {e}")
+                logger.error("Error adding screen time", error=e)
                 message = "❌ Произошла ошибка при добавлении времени. Попробуйте позже."
         
         await context.bot.send_message(
             chat_id=chat_id,
-            text=message.strip()
+            text=message
         )
     
-    async def _safe_edit_message(self, query, text: str, reply_markup=None):
-        """Безопасное обновление сообщения с проверкой изменений"""
+    async def _safe_edit_message(
+        self, query, text: str, reply_markup=None, force: bool = False, already_stripped: bool = False
+    ):
+        """
+        Безопасное обновление сообщения с проверкой изменений.
+        force=True пропускает сравнение: для явного обновления, где содержимое
+        почти всегда другое, а "Message is not modified" обрабатывается ниже.
+        already_stripped=True - текст уже без крайних пробелов, strip() не нужен.
+        """
+        new_text = text if already_stripped else text.strip()
         try:
-            current_text = query.message.text
-            current_reply_markup = query.message.reply_markup
-            new_text = text.strip()
             
-            # Проверяем изменения в тексте и reply_markup
-            text_changed = current_text != new_text
-            markup_changed = self._compare_reply_markup(current_reply_markup, reply_markup)
+            if not force:
+                # Проверяем изменения в тексте и reply_markup
+                text_changed = query.message.text != new_text
+                markup_changed = self._markup_signature(query.message.reply_markup) != self._markup_signature(reply_markup)
+                
+                if not (text_changed or markup_changed):
+                    # Если содержимое не изменилось, просто отвечаем на callback
+                    await query.answer("📊 Данные актуальны")
+                    return
             
-            if text_changed or markup_changed:
-                await query.edit_message_text(
-                    text=new_text,
-                    reply_markup=reply_markup
-                )
-            else:
-                # Если содержимое не изменилось, просто отвечаем на callback
-                await query.answer("📊 Данные актуальны")
+            await query.edit_message_text(
+                text=new_text,
+                reply_markup=reply_markup
+            )
                 
         except Exception as e:
-            logger.error(f"Error editing message: {e}")
+            logger.error("Error editing message", error=e)
             # Проверяем, является ли ошибка "Message is not modified"
-            if "Message is not modified" in str(e):
+            if _is_not_modified(e):
                 await query.answer("📊 Данные актуальны")
             else:
                 # Если это другая ошибка, пытаемся отправить новое сообщение
                 try:
                     await query.message.reply_text(
-                        text=text.strip(),
+                        text=new_text,
                         reply_markup=reply_markup
                     )
                 except Exception as reply_error:
-                    logger.error(f"Error sending new message: {reply_error}")
+                    logger.error("Error sending new message", error=reply_error)
                     await query.answer("❌ Ошибка при обновлении сообщения")
     
-    def _compare_reply_markup(self, current_markup, new_markup):
-        """Сравнивает два reply_markup на предмет изменений"""
-        if current_markup is None and new_markup is None:
-            return False
-        if current_markup is None or new_markup is None:
-            return True
-        
-        # Сравниваем структуру inline_keyboard
-        current_keyboard = current_markup.inline_keyboard if hasattr(current_markup, 'inline_keyboard') else []
-        new_keyboard = new_markup.inline_keyboard if hasattr(new_markup, 'inline_keyboard') else []
-        
-        if len(current_keyboard) != len(new_keyboard):
-            return True
+    async def _edit_markdown_if_changed(self, query, text: str, reply_markup=None):
+        """
+        Правка Markdown-сообщения без лишнего запроса к Telegram.
+        query.message.text приходит без разметки и не годится для сравнения,
+        поэтому запоминаем, что отправили в это сообщение в прошлый раз.
+        """
+        message = query.message
+        key = (message.chat_id, message.message_id) if message else None
+        signature = (text, self._markup_signature(reply_markup))
+        if key is not None and self._last_edits.get(key) == signature:
+            return
         
-        for i, current_row in enumerate(current_keyboard):
-            new_row = new_keyboard[i]
-            if len(current_row) != len(new_row):
-                return True
-            
-            for j, current_button in enumerate(current_row):
-                new_button = new_row[j]
-                if (current_button.text != new_button.text or 
-                    current_button.callback_data != new_button.callback_data):
-                    return True
+        try:
+            await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="Markdown")
+        except BadRequest as e:
+            if not _is_not_modified(e):
+                raise
         
-        return False
-
+        if key is not None:
+            self._last_edits[key] = signature
+            self._last_edits.move_to_end(key)
+            if len(self._last_edits) > _LAST_EDITS_MAXSIZE:
+                self._last_edits.popitem(last=False)
+    
+    def _forget_last_edit(self, query):
+        """Сообщение изменено в обход _edit_markdown_if_changed: запомненное содержимое неактуально"""
+        if query.message:
+            self._last_edits.pop((query.message.chat_id, query.message.message_id), None)
+    
+    @staticmethod
+    def _markup_signature(markup):
+        """
+        Каноническое представление клавиатуры: кортеж строк из пар
+        (text, callback_data). Сравнение таких кортежей выполняется на уровне C.
+        """
+        if markup is None:
+            return None
+        return tuple(
+            tuple((button.text, button.callback_data) for button in row)
+            for row in getattr(markup, 'inline_keyboard', ())
+        )
+    
     def _format_analytics_message(self, insights: dict) -> str:
         """Форматирует сообщение с аналитикой"""
         today = insights.get("today", {})
@@ -912,57 +1938,76 @@ class TelegramBot:
         goals = insights.get("goals", {})
         achievements = insights.get("achievements", [])
         
-        message = "📊 Аналитика экранного времени\n\n"
-        
         # Сегодня
-        message += "📅 СЕГОДНЯ:\n"
+        parts = ["📊 Аналитика экранного времени\n\n", "📅 СЕГОДНЯ:\n"]
         if today.get("total_minutes", 0) > 0:
-            message += f"⏱️ Всего: {self._format_time(today['total_minutes'])}\n"
-            message += f"💼 Продуктивность: {today['productivity_percentage']:.1f}%\n"
-            message += f"📱 Соцсети: {today['social_media_percentage']:.1f}%\n"
-            message += f"🎮 Развлечения: {today.get('entertainment_percentage', 0):.1f}%\n"
-            message += f"📊 Другое: {today.get('other_percentage', 0):.1f}%\n"
+            parts.append(f"⏱️ Всего: {self._format_time(today['total_minutes'])}\n")
+            parts.append(f"💼 Продуктивность: {today['productivity_percentage']:.1f}%\n")
+            parts.append(f"📱 Соцсети: {today['social_media_percentage']:.1f}%\n")
+            parts.append(f"🎮 Развлечения: {today.get('entertainment_percentage', 0):.1f}%\n")
+            parts.append(f"📊 Другое: {today.get('other_percentage', 0):.1f}%\n")
         else:
-            message += "📝 Данных за сегодня пока нет\n"
+            parts.append("📝 Данных за сегодня пока нет\n")
         
-        message += "\n📈 ЭТА НЕДЕЛЯ:\n"
+        parts.append("\n📈 ЭТА НЕДЕЛЯ:\n")
         if this_week.get("total_minutes", 0) > 0:
-            message += f"⏱️ Всего: {self._format_time(this_week['total_minutes'])}\n"
-            message += f"📊 В среднем: {self._format_time(int(this_week['average_daily_minutes']))} в день\n"
-            message += f"💼 Продуктивность: {this_week['productivity_percentage']:.1f}%\n"
-            message += f"📱 Соцсети: {this_week['social_media_percentage']:.1f}%\n"
-            message += f"🎯 Соблюдение лимитов: {this_week['limit_compliance']:.1f}%\n"
+            parts.append(f"⏱️ Всего: {self._format_time(this_week['total_minutes'])}\n")
+            parts.append(f"📊 В среднем: {self._format_time(int(this_week['average_daily_minutes']))} в день\n")
+            parts.append(f"💼 Продуктивность: {this_week['productivity_percentage']:.1f}%\n")
+            parts.append(f"📱 Соцсети: {this_week['social_media_percentage']:.1f}%\n")
+            parts.append(f"🎯 Соблюдение лимитов: {this_week['limit_compliance']:.1f}%\n")
         else:
-            message += "📝 Данных за неделю пока нет\n"
+            parts.append("📝 Данных за неделю пока нет\n")
         
         # Тренды
         if trends.get("trend_direction") and trends["trend_direction"] != "недостаточно данных":
-            message += f"\n📈 ТРЕНД: {trends['trend_direction']} на {trends['trend_percentage']:.1f}%\n"
+            parts.append(f"\n📈 ТРЕНД: {trends['trend_direction']} на {trends['trend_percentage']:.1f}%\n")
         
         # Достижения
         if achievements:
-            message += "\n🏆 ДОСТИЖЕНИЯ:\n"
+            parts.append("\n🏆 ДОСТИЖЕНИЯ:\n")
             for achievement in achievements[:3]:  # Показываем только первые 3
-                message += f"{achievement['icon']} {achievement['title']}\n"
-                message += f"   {achievement['description']}\n"
+                parts.append(f"{achievement['icon']} {achievement['title']}\n")
+                parts.append(f"   {achievement['description']}\n")
         
         # Рекомендации
         if today.get("recommendations"):
-            message += "\n💡 РЕКОМЕНДАЦИИ:\n"
+            parts.append("\n💡 РЕКОМЕНДАЦИИ:\n")
             for rec in today["recommendations"][:2]:  # Показываем только первые 2
-                message += f"• {rec}\n"
+                parts.append(f"• {rec}\n")
         
-        message += "\n💡 Используйте /addtime для добавления данных о времени использования."
+        parts.append("\n💡 Используйте /addtime для добавления данных о времени использования.")
         
-        return message
+        return "".join(parts)
     
     async def _handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка callback queries от inline кнопок"""
         query = update.callback_query
-        await query.answer()  # Отвечаем на callback query
+        
+        # callback_data имеет вид "<код>[:<данные>]" и разбирается один раз
+        data = query.data or ""
+        op, sep, payload = data.partition(":")
+        if not sep and op not in self._op_handlers:
+            # Клавиатуры, отправленные до перехода на коды операций
+            op, payload = self._legacy_callbacks.get(data, (None, ""))
+            if op is None:
+                for prefix, prefix_op in self._legacy_callback_prefixes:
+                    if data.startswith(prefix):
+                        op, payload = prefix_op, data[len(prefix):]
+                        break
+        
+        # Частые нажатия "Обновить" не пересчитывают экран заново
+        if (op, payload) in _REFRESH_OPS and self._refresh_throttled(query.from_user.id, op):
+            await query.answer("📊 Данные актуальны")
+            return
+        
+        # Ответ на callback query уходит параллельно с аутентификацией;
+        # дожидаемся его до вызова обработчика, который может ответить повторно
+        answer_task = asyncio.create_task(query.answer())
         
         # Аутентификация пользователя
         user = await self._authenticate_user(update)
+        await answer_task
         if not user:
             await query.edit_message_text(
                 text="❌ Ошибка аутентификации. Попробуйте команду /start"
@@ -970,154 +2015,107 @@ class TelegramBot:
             return
         
         try:
-            # Обрабатываем различные типы callback_data
-            if query.data == "create_reminder":
-                await self._handle_create_reminder_callback(query, context)
-            elif query.data == "refresh_reminders":
-                await self._handle_refresh_reminders_callback(query, context, user)
-            elif query.data == "cancel_all_reminders":
-                await self._handle_cancel_all_reminders_callback(query, context, user)
-            elif query.data == "reminders_stats":
-                await self._handle_reminders_stats_callback(query, context, user)
-            elif query.data.startswith("delete_reminder_"):
-                reminder_id = int(query.data.split("_")[2])
-                await self._handle_delete_reminder_callback(query, context, user, reminder_id)
-            elif query.data.startswith("analytics_"):
-                await self._handle_analytics_callback(query, context, user)
-            elif query.data == "add_time_quick":
-                await self._handle_add_time_quick_callback(query, context)
-            elif query.data.startswith("recurring_"):
-                await self._handle_recurring_callback(query, context, user)
-            elif query.data.startswith("focus_"):
-                # Создаем фейковый update для focus callback
-                fake_update = type('Update', (), {'callback_query': query, 'effective_user': update.effective_user})()
-                await self._handle_focus_callback(fake_update, context)
-            elif query.data.startswith("achievements_"):
-                action = query.data.split("_", 1)[1]
-                await self._handle_achievement_callback(query, user.id, action)
-            elif query.data == "achievements_main":
-                await self._achievements_command(update, context)
-            elif query.data == "level_main":
-                await self._level_command(update, context)
-            elif query.data.startswith("level_"):
-                action = query.data.split("_", 1)[1]
-                await self._handle_level_callback(query, user.id, action)
-            elif query.data == "main_menu":
-                await self._start_command(update, context)
-            elif query.data == "focus_back":
-                await self._focus_command(update, context)
-            elif query.data == "analytics_refresh":
-                await self._analytics_command(update, context)
-            elif query.data == "recurring_refresh":
-                await self._recurring_command(update, context)
-            else:
+            handler = self._op_handlers.get(op)
+            if handler is None:
                 await query.edit_message_text(
                     text="❓ Неизвестное действие. Попробуйте еще раз."
                 )
+            else:
+                await handler(update, context, query, user, payload)
                 
         except Exception as e:
-            logger.error(f"Error handling callback query: {e}")
+            logger.error("Error handling callback query", error=e)
             await query.edit_message_text(
                 text="❌ Произошла ошибка. Попробуйте позже."
             )
     
-    async def _handle_create_reminder_callback(self, query, context):
-        """Обработка создания напоминания через кнопку"""
-        message = """
-🔔 Создание напоминания
-
-Используйте команду:
-/remind <время> <текст>
-
-Примеры:
-• /remind 15m Сделать перерыв
-• /remind 1h Позвонить маме
-• /remind 30m Выпить воды
-
-Время можно указать в формате:
-• 15m - 15 минут
-• 1h - 1 час
-• 2h30m - 2 часа 30 минут
+    def _refresh_throttled(self, telegram_id: int, op: str) -> bool:
+        """
+        True, если этот экран пользователь обновлял меньше _REFRESH_THROTTLE секунд назад.
+        Иначе запоминает время текущего обновления.
+        """
+        now = time.monotonic()
+        key = (telegram_id, op)
+        if now - self._last_refresh.get(key, float("-inf")) < _REFRESH_THROTTLE:
+            return True
+        
+        if len(self._last_refresh) >= _REFRESH_HISTORY_MAXSIZE:
+            # Удаляем устаревшие записи разом, а не при каждом нажатии
+            cutoff = now - _REFRESH_HISTORY_TTL
+            self._last_refresh = {k: t for k, t in self._last_refresh.items() if t >= cutoff}
+        
+        self._last_refresh[key] = now
+        return False
+    
+    def _build_callback_tables(self):
+        """
+        Таблицы маршрутизации callback_data для _handle_callback_query.
+        Все обработчики вызываются как handler(update, context, query, user, payload).
         """
+        ops = {
+            "menu": lambda u, c, q, user, p: self._start_command(u, c),
+            "time": lambda u, c, q, user, p: self._handle_add_time_quick_callback(q, c),
+            "rc": lambda u, c, q, user, p: self._handle_create_reminder_callback(q, c),
+            "rr": lambda u, c, q, user, p: self._handle_refresh_reminders_callback(q, c, user),
+            "rx": lambda u, c, q, user, p: self._handle_cancel_all_reminders_callback(q, c, user),
+            "rs": lambda u, c, q, user, p: self._handle_reminders_stats_callback(q, c, user),
+            "d": lambda u, c, q, user, p: self._handle_delete_reminder_callback(q, c, user, int(p)),
+            "a": lambda u, c, q, user, p: self._handle_analytics_callback(q, c, user, p),
+            "r": lambda u, c, q, user, p: self._handle_recurring_callback(q, c, user, p),
+            "f": lambda u, c, q, user, p: self._run_focus_action(q, user.id, p),
+            "ach": lambda u, c, q, user, p: self._handle_achievement_callback(q, user.id, p),
+            "lvl": lambda u, c, q, user, p: (
+                self._level_command(u, c) if p == "main" else self._handle_level_callback(q, user.id, p)
+            ),
+        }
         
-        keyboard = [
-            [InlineKeyboardButton("🔙 Назад к напоминаниям", callback_data="refresh_reminders")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Старые значения callback_data -> (код операции, данные)
+        legacy = {
+            "create_reminder": ("rc", ""),
+            "refresh_reminders": ("rr", ""),
+            "cancel_all_reminders": ("rx", ""),
+            "reminders_stats": ("rs", ""),
+            "add_time_quick": ("time", ""),
+            "main_menu": ("menu", ""),
+        }
         
+        # Префиксы не пересекаются, порядок проверки не важен
+        legacy_prefixes = (
+            ("delete_reminder_", "d"),
+            ("analytics_", "a"),
+            ("recurring_", "r"),
+            ("focus_", "f"),
+            ("achievements_", "ach"),
+            ("level_", "lvl"),
+        )
+        return ops, legacy, legacy_prefixes
+    
+    async def _handle_create_reminder_callback(self, query, context):
+        """Обработка создания напоминания через кнопку"""
         await query.edit_message_text(
-            text=message.strip(),
-            reply_markup=reply_markup
+            text=_CREATE_REMINDER_HELP_TEXT,
+            reply_markup=_BACK_TO_REMINDERS_MARKUP
         )
     
     async def _handle_refresh_reminders_callback(self, query, context, user):
         """Обновление списка напоминаний"""
         try:
-            from detoxbuddy.database.crud.reminder import reminder_crud
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                reminders = reminder_crud.get_reminders_for_telegram_bot(db, user_id=user.id, limit=10)
+            reminders, _ = await self._get_reminders_cached(user.id)
             
             if not reminders:
-                message = """
-📝 У вас пока нет напоминаний
-
-Создайте первое напоминание командой:
-/remind 15m Сделать перерыв
-                """
-                
-                keyboard = [
-                    [InlineKeyboardButton("➕ Создать напоминание", callback_data="create_reminder")]
-                ]
+                message = _REMINDERS_EMPTY_TEXT
+                reply_markup = _REMINDERS_KEYBOARD_EMPTY
             else:
-                message = "📝 Ваши напоминания:\n\n"
-                
-                for reminder in reminders:
-                    status_emoji = {
-                        "active": "🟢",
-                        "sent": "✅",
-                        "cancelled": "❌",
-                        "expired": "⏰"
-                    }.get(reminder.status.value, "🔔")
-                    
-                    type_emoji = {
-                        "daily": "📅",
-                        "weekly": "📆",
-                        "custom": "⚙️",
-                        "detox_reminder": "🧘",
-                        "focus_reminder": "🎯",
-                        "break_reminder": "☕",
-                        "quiet_hours": "🤫"
-                    }.get(reminder.reminder_type.value, "🔔")
-                    
-                    scheduled_time = reminder.scheduled_time.strftime("%d.%m %H:%M")
-                    
-                    message += f"{status_emoji} {type_emoji} {reminder.title}\n"
-                    message += f"   ⏰ {scheduled_time} | ID: {reminder.id}\n"
-                    if reminder.message and reminder.message != "None":
-                        message += f"   📝 {reminder.message[:50]}{'...' if len(reminder.message) > 50 else ''}\n"
-                    message += "\n"
-                
-                keyboard = [
-                    [
-                        InlineKeyboardButton("➕ Создать", callback_data="create_reminder"),
-                        InlineKeyboardButton("🔄 Обновить", callback_data="refresh_reminders")
-                    ],
-                    [
-                        InlineKeyboardButton("❌ Отменить все", callback_data="cancel_all_reminders"),
-                        InlineKeyboardButton("📊 Статистика", callback_data="reminders_stats")
-                    ]
-                ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
+                message = self._format_reminders(reminders)
+                reply_markup = _REMINDERS_KEYBOARD_FULL
+            
             await query.edit_message_text(
-                text=message.strip(),
+                text=message,
                 reply_markup=reply_markup
             )
             
         except Exception as e:
-            logger.error(f"Error refreshing reminders: {e}")
+            logger.error("Error refreshing reminders", error=e)
             await query.edit_message_text(
                 text="❌ Ошибка при обновлении напоминаний. Попробуйте позже."
             )
@@ -1125,30 +2123,16 @@ class TelegramBot:
     async def _handle_cancel_all_reminders_callback(self, query, context, user):
         """Отмена всех активных напоминаний"""
         try:
-            from detoxbuddy.database.crud.reminder import reminder_crud
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                cancelled_count = reminder_crud.cancel_all_active_reminders(db, user_id=user.id)
-            
-            message = f"""
-✅ Отменено {cancelled_count} активных напоминаний
-
-Все ваши активные напоминания были отменены.
-            """
-            
-            keyboard = [
-                [InlineKeyboardButton("🔙 Назад к напоминаниям", callback_data="refresh_reminders")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            cancelled_count = await asyncio.to_thread(self._cancel_all_reminders, user.id)
+            self._invalidate_reminders(user.id)
             
             await query.edit_message_text(
-                text=message.strip(),
-                reply_markup=reply_markup
+                text=_CANCEL_ALL_TEMPLATE.format(n=cancelled_count),
+                reply_markup=_BACK_TO_REMINDERS_MARKUP
             )
             
         except Exception as e:
-            logger.error(f"Error cancelling reminders: {e}")
+            logger.error("Error cancelling reminders", error=e)
             await query.edit_message_text(
                 text="❌ Ошибка при отмене напоминаний. Попробуйте позже."
             )
@@ -1156,11 +2140,7 @@ class TelegramBot:
     async def _handle_reminders_stats_callback(self, query, context, user):
         """Показать статистику напоминаний"""
         try:
-            from detoxbuddy.database.crud.reminder import reminder_crud
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                stats = reminder_crud.get_reminders_stats(db, user_id=user.id)
+            _, stats = await self._get_reminders_cached(user.id)
             
             message = f"""
 📊 Статистика напоминаний
@@ -1174,18 +2154,13 @@ class TelegramBot:
 📈 За последние 7 дней: {stats['last_7_days']}
             """
             
-            keyboard = [
-                [InlineKeyboardButton("🔙 Назад к напоминаниям", callback_data="refresh_reminders")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
                 text=message.strip(),
-                reply_markup=reply_markup
+                reply_markup=_BACK_TO_REMINDERS_MARKUP
             )
             
         except Exception as e:
-            logger.error(f"Error getting reminders stats: {e}")
+            logger.error("Error getting reminders stats", error=e)
             await query.edit_message_text(
                 text="❌ Ошибка при получении статистики. Попробуйте позже."
             )
@@ -1193,38 +2168,28 @@ class TelegramBot:
     async def _handle_delete_reminder_callback(self, query, context, user, reminder_id):
         """Удаление конкретного напоминания"""
         try:
-            from detoxbuddy.database.crud.reminder import reminder_crud
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                reminder = reminder_crud.get(db, id=reminder_id)
-                if reminder and reminder.user_id == user.id:
-                    reminder_crud.remove(db, id=reminder_id)
-                    message = f"✅ Напоминание '{reminder.title}' удалено"
-                else:
-                    message = "❌ Напоминание не найдено или у вас нет прав для его удаления"
+            title = await asyncio.to_thread(self._delete_reminder, reminder_id, user.id)
+            self._invalidate_reminders(user.id)
             
-            keyboard = [
-                [InlineKeyboardButton("🔙 Назад к напоминаниям", callback_data="refresh_reminders")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            if title is not None:
+                message = f"✅ Напоминание '{title}' удалено"
+            else:
+                message = "❌ Напоминание не найдено или у вас нет прав для его удаления"
             
             await query.edit_message_text(
                 text=message,
-                reply_markup=reply_markup
+                reply_markup=_BACK_TO_REMINDERS_MARKUP
             )
             
         except Exception as e:
-            logger.error(f"Error deleting reminder: {e}")
+            logger.error("Error deleting reminder", error=e)
             await query.edit_message_text(
                 text="❌ Ошибка при удалении напоминания. Попробуйте позже."
             )
     
-    async def _handle_analytics_callback(self, query, context, user):
+    async def _handle_analytics_callback(self, query, context, user, action: str):
         """Обработка callback queries для аналитики"""
         try:
-            action = query.data.split("_")[1]  # analytics_detailed -> detailed
-            
             if action == "detailed":
                 await self._handle_detailed_analytics_callback(query, context, user)
             elif action == "trends":
@@ -1241,7 +2206,7 @@ class TelegramBot:
                 )
                 
         except Exception as e:
-            logger.error(f"Error handling analytics callback: {e}")
+            logger.error("Error handling analytics callback", error=e)
             await query.edit_message_text(
                 text="❌ Ошибка при обработке аналитики. Попробуйте позже."
             )
@@ -1249,60 +2214,47 @@ class TelegramBot:
     async def _handle_detailed_analytics_callback(self, query, context, user):
         """Детальный отчет аналитики"""
         try:
-            from detoxbuddy.core.services.screen_time_service import ScreenTimeService
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                screen_time_service = ScreenTimeService(db)
-                insights = screen_time_service.get_user_insights(user.id)
+            insights = await self._get_insights_cached(user.id)
             
             # Формируем детальный отчет
-            message = "📊 ДЕТАЛЬНЫЙ ОТЧЕТ\n\n"
+            parts = ["📊 ДЕТАЛЬНЫЙ ОТЧЕТ\n\n"]
             
             today = insights.get("today", {})
             if today.get("total_minutes", 0) > 0:
-                message += "📅 СЕГОДНЯ:\n"
-                message += f"⏱️ Всего времени: {self._format_time(today['total_minutes'])}\n"
-                message += f"💼 Продуктивность: {today['productivity_percentage']:.1f}%\n"
-                message += f"📱 Соцсети: {today['social_media_percentage']:.1f}%\n"
-                message += f"🎮 Развлечения: {today.get('entertainment_percentage', 0):.1f}%\n"
-                message += f"📊 Другое: {today.get('other_percentage', 0):.1f}%\n\n"
+                parts.append("📅 СЕГОДНЯ:\n")
+                parts.append(f"⏱️ Всего времени: {self._format_time(today['total_minutes'])}\n")
+                parts.append(f"💼 Продуктивность: {today['productivity_percentage']:.1f}%\n")
+                parts.append(f"📱 Соцсети: {today['social_media_percentage']:.1f}%\n")
+                parts.append(f"🎮 Развлечения: {today.get('entertainment_percentage', 0):.1f}%\n")
+                parts.append(f"📊 Другое: {today.get('other_percentage', 0):.1f}%\n\n")
             
             this_week = insights.get("this_week", {})
             if this_week.get("total_minutes", 0) > 0:
-                message += "📈 ЭТА НЕДЕЛЯ:\n"
-                message += f"⏱️ Всего времени: {self._format_time(this_week['total_minutes'])}\n"
-                message += f"📊 В среднем: {self._format_time(int(this_week['average_daily_minutes']))} в день\n"
-                message += f"💼 Продуктивность: {this_week['productivity_percentage']:.1f}%\n"
-                message += f"📱 Соцсети: {this_week['social_media_percentage']:.1f}%\n"
-                message += f"🎯 Соблюдение лимитов: {this_week['limit_compliance']:.1f}%\n\n"
+                parts.append("📈 ЭТА НЕДЕЛЯ:\n")
+                parts.append(f"⏱️ Всего времени: {self._format_time(this_week['total_minutes'])}\n")
+                parts.append(f"📊 В среднем: {self._format_time(int(this_week['average_daily_minutes']))} в день\n")
+                parts.append(f"💼 Продуктивность: {this_week['productivity_percentage']:.1f}%\n")
+                parts.append(f"📱 Соцсети: {this_week['social_media_percentage']:.1f}%\n")
+                parts.append(f"🎯 Соблюдение лимитов: {this_week['limit_compliance']:.1f}%\n\n")
             
             # Добавляем рекомендации
             if today.get("recommendations"):
-                message += "💡 РЕКОМЕНДАЦИИ:\n"
+                parts.append("💡 РЕКОМЕНДАЦИИ:\n")
                 for rec in today["recommendations"][:3]:
-                    message += f"• {rec}\n"
+                    parts.append(f"• {rec}\n")
             
-            keyboard = [
-                [InlineKeyboardButton("🔙 Назад к аналитике", callback_data="analytics_refresh")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            message = "".join(parts)
             
-            await self._safe_edit_message(query, message, reply_markup)
+            await self._safe_edit_message(query, message, _BACK_TO_ANALYTICS_MARKUP)
             
         except Exception as e:
-            logger.error(f"Error getting detailed analytics: {e}")
+            logger.error("Error getting detailed analytics", error=e)
             await query.answer("❌ Ошибка при получении детального отчета. Попробуйте позже.")
     
     async def _handle_trends_analytics_callback(self, query, context, user):
         """Тренды аналитики"""
         try:
-            from detoxbuddy.core.services.screen_time_service import ScreenTimeService
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                screen_time_service = ScreenTimeService(db)
-                insights = screen_time_service.get_user_insights(user.id)
+            insights = await self._get_insights_cached(user.id)
             
             trends = insights.get("trends", {})
             
@@ -1322,15 +2274,10 @@ class TelegramBot:
             message += "• Увеличьте продуктивное время\n"
             message += "• Делайте больше перерывов\n"
             
-            keyboard = [
-                [InlineKeyboardButton("🔙 Назад к аналитике", callback_data="analytics_refresh")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await self._safe_edit_message(query, message, reply_markup)
+            await self._safe_edit_message(query, message, _BACK_TO_ANALYTICS_MARKUP)
             
         except Exception as e:
-            logger.error(f"Error getting trends analytics: {e}")
+            logger.error("Error getting trends analytics", error=e)
             await query.answer("❌ Ошибка при получении трендов. Попробуйте позже.")
     
     async def _handle_goals_analytics_callback(self, query, context, user):
@@ -1353,26 +2300,16 @@ class TelegramBot:
             message += "• Дней подряд: 7\n"
             message += "• Лучший день: вчера\n"
             
-            keyboard = [
-                [InlineKeyboardButton("🔙 Назад к аналитике", callback_data="analytics_refresh")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await self._safe_edit_message(query, message, reply_markup)
+            await self._safe_edit_message(query, message, _BACK_TO_ANALYTICS_MARKUP)
             
         except Exception as e:
-            logger.error(f"Error getting goals analytics: {e}")
+            logger.error("Error getting goals analytics", error=e)
             await query.answer("❌ Ошибка при получении целей. Попробуйте позже.")
     
     async def _handle_achievements_analytics_callback(self, query, context, user):
         """Достижения аналитики"""
         try:
-            from detoxbuddy.core.services.screen_time_service import ScreenTimeService
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                screen_time_service = ScreenTimeService(db)
-                insights = screen_time_service.get_user_insights(user.id)
+            insights = await self._get_insights_cached(user.id)
             
             achievements = insights.get("achievements", [])
             
@@ -1389,177 +2326,107 @@ class TelegramBot:
                 message += "• Соблюдайте лимиты\n"
                 message += "• Увеличивайте продуктивность\n"
             
-            keyboard = [
-                [InlineKeyboardButton("🔙 Назад к аналитике", callback_data="analytics_refresh")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await self._safe_edit_message(query, message, reply_markup)
+            await self._safe_edit_message(query, message, _BACK_TO_ANALYTICS_MARKUP)
             
         except Exception as e:
-            logger.error(f"Error getting achievements analytics: {e}")
+            logger.error("Error getting achievements analytics", error=e)
             await query.answer("❌ Ошибка при получении достижений. Попробуйте позже.")
     
     async def _handle_refresh_analytics_callback(self, query, context, user):
         """Обновление аналитики"""
         try:
-            from detoxbuddy.core.services.screen_time_service import ScreenTimeService
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                screen_time_service = ScreenTimeService(db)
-                insights = screen_time_service.get_user_insights(user.id)
+            insights = await self._get_insights_cached(user.id)
             
             # Формируем сообщение с аналитикой
             message = self._format_analytics_message(insights)
             
-            # Добавляем inline кнопки для аналитики
-            keyboard = [
-                [
-                    InlineKeyboardButton("📊 Детальный отчет", callback_data="analytics_detailed"),
-                    InlineKeyboardButton("📈 Тренды", callback_data="analytics_trends")
-                ],
-                [
-                    InlineKeyboardButton("🎯 Цели", callback_data="analytics_goals"),
-                    InlineKeyboardButton("🏆 Достижения", callback_data="analytics_achievements")
-                ],
-                [
-                    InlineKeyboardButton("➕ Добавить время", callback_data="add_time_quick"),
-                    InlineKeyboardButton("🔄 Обновить", callback_data="analytics_refresh")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            # Используем безопасное обновление сообщения
-            await self._safe_edit_message(query, message, reply_markup)
+            # Пользователь явно запросил обновление - редактируем без сравнения;
+            # клавиатура та же, что у /analytics
+            await self._safe_edit_message(
+                query, message, _ANALYTICS_KEYBOARD, force=True, already_stripped=True
+            )
             
         except Exception as e:
-            logger.error(f"Error refreshing analytics: {e}")
+            logger.error("Error refreshing analytics", error=e)
             # Проверяем, является ли ошибка "Message is not modified"
-            if "Message is not modified" in str(e):
+            if _is_not_modified(e):
                 await query.answer("📊 Данные актуальны")
             else:
                 await query.answer("❌ Ошибка при обновлении аналитики. Попробуйте позже.")
     
-    async def _handle_recurring_callback(self, query, context, user):
+    async def _handle_recurring_callback(self, query, context, user, action: str):
         """Обработка callback queries для повторяющихся напоминаний"""
         try:
-            if query.data == "recurring_daily":
+            if action == "daily":
                 await self._handle_recurring_daily_callback(query, context)
-            elif query.data == "recurring_weekly":
+            elif action == "weekly":
                 await self._handle_recurring_weekly_callback(query, context)
-            elif query.data == "recurring_settings":
+            elif action == "settings":
                 await self._handle_recurring_settings_callback(query, context, user)
-            elif query.data == "recurring_stats":
+            elif action == "stats":
                 await self._handle_recurring_stats_callback(query, context, user)
-            elif query.data == "recurring_refresh":
+            elif action == "refresh":
                 await self._handle_recurring_refresh_callback(query, context, user)
             else:
                 await query.edit_message_text(
                     text="❓ Неизвестное действие для повторяющихся напоминаний"
                 )
         except Exception as e:
-            logger.error(f"Error in recurring callback: {e}")
+            logger.error("Error in recurring callback", error=e)
             await query.edit_message_text(
                 text="❌ Ошибка при обработке запроса"
             )
     
     async def _handle_recurring_daily_callback(self, query, context):
         """Обработка кнопки ежедневных напоминаний"""
-        message = """
-📅 Ежедневные напоминания
-
-Создать ежедневное напоминание:
-/daily <время> <название> [сообщение]
-
-Примеры:
-• /daily 09:00 "Утренняя зарядка"
-• /daily 18:00 "Вечерний детокс" "Время отложить телефон"
-• /daily 22:00 "Тихие часы" "Подготовка ко сну"
-
-Время указывайте в формате ЧЧ:ММ
-        """
-        
-        keyboard = [
-            [InlineKeyboardButton("🔙 Назад", callback_data="recurring_refresh")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await query.edit_message_text(
-            text=message.strip(),
-            reply_markup=reply_markup
+            text=_RECURRING_DAILY_HELP_TEXT,
+            reply_markup=_RECURRING_BACK_MARKUP
         )
     
     async def _handle_recurring_weekly_callback(self, query, context):
         """Обработка кнопки еженедельных напоминаний"""
-        message = """
-📆 Еженедельные напоминания
-
-Создать еженедельное напоминание:
-/weekly <дни> <время> <название> [сообщение]
-
-Дни недели: mon,tue,wed,thu,fri,sat,sun
-Время: ЧЧ:ММ
-
-Примеры:
-• /weekly mon,wed,fri 09:00 "Утренняя зарядка"
-• /weekly sat,sun 10:00 "Выходные" "Время для себя"
-• /weekly mon 18:00 "Начало недели" "Планирование"
-
-Дни указывайте через запятую без пробелов
-        """
-        
-        keyboard = [
-            [InlineKeyboardButton("🔙 Назад", callback_data="recurring_refresh")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await query.edit_message_text(
-            text=message.strip(),
-            reply_markup=reply_markup
+            text=_RECURRING_WEEKLY_HELP_TEXT,
+            reply_markup=_RECURRING_BACK_MARKUP
         )
     
     async def _handle_recurring_settings_callback(self, query, context, user):
         """Обработка кнопки настроек повторяющихся напоминаний"""
         try:
-            with SessionLocal() as db:
-                recurring_reminders = reminder_crud.get_recurring_reminders(db, user.id)
-                
-                if not recurring_reminders:
-                    message = "⚙️ У вас нет повторяющихся напоминаний для настройки"
-                else:
-                    message = "⚙️ Настройки повторяющихся напоминаний:\n\n"
-                    
-                    for reminder in recurring_reminders[:5]:
-                        status = "✅ Активно" if reminder.is_enabled else "⏸️ Приостановлено"
-                        message += f"🆔 {reminder.id}: {reminder.title}\n"
-                        message += f"   Статус: {status}\n"
-                        message += f"   Приоритет: {reminder.priority}\n\n"
-                    
-                    if len(recurring_reminders) > 5:
-                        message += f"... и еще {len(recurring_reminders) - 5} напоминаний"
-                
-                keyboard = [
-                    [InlineKeyboardButton("🔙 Назад", callback_data="recurring_refresh")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
+            recurring_reminders, stats = await self._get_recurring_cached(user.id)
+            total = stats["recurring_active"]
+            
+            if not recurring_reminders:
+                message = "⚙️ У вас нет повторяющихся напоминаний для настройки"
+            else:
+                message = "⚙️ Настройки повторяющихся напоминаний:\n\n"
                 
-                await query.edit_message_text(
-                    text=message.strip(),
-                    reply_markup=reply_markup
-                )
+                for reminder in recurring_reminders[:5]:
+                    status = "✅ Активно" if reminder.is_enabled else "⏸️ Приостановлено"
+                    message += f"🆔 {reminder.id}: {reminder.title}\n"
+                    message += f"   Статус: {status}\n"
+                    message += f"   Приоритет: {reminder.priority}\n\n"
                 
+                if total > 5:
+                    message += f"... и еще {total - 5} напоминаний"
+            
+            await query.edit_message_text(
+                text=message.strip(),
+                reply_markup=_RECURRING_BACK_MARKUP
+            )
+            
         except Exception as e:
-            logger.error(f"Error in recurring settings: {e}")
+            logger.error("Error in recurring settings", error=e)
             await query.edit_message_text("❌ Ошибка при получении настроек")
     
     async def _handle_recurring_stats_callback(self, query, context, user):
         """Обработка кнопки статистики повторяющихся напоминаний"""
         try:
-            with SessionLocal() as db:
-                stats = reminder_crud.get_reminders_stats(db, user.id)
-                
-                message = f"""
+            # Статистика загружается вместе со списком /recurring (общий кэш)
+            _, stats = await self._get_recurring_cached(user.id)
+            
+            message = f"""
 📊 Статистика повторяющихся напоминаний
 
 🔄 Всего повторяющихся: {stats.get('recurring', 0)}
@@ -1568,124 +2435,45 @@ class TelegramBot:
 ❌ Отмененных: {stats.get('cancelled', 0)}
 ⏰ Истекших: {stats.get('expired', 0)}
 📅 За 7 дней: {stats.get('last_7_days', 0)}
-                """
-                
-                keyboard = [
-                    [InlineKeyboardButton("🔙 Назад", callback_data="recurring_refresh")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                await query.edit_message_text(
-                    text=message.strip(),
-                    reply_markup=reply_markup
-                )
-                
+            """
+            
+            await query.edit_message_text(
+                text=message.strip(),
+                reply_markup=_RECURRING_BACK_MARKUP
+            )
+            
         except Exception as e:
-            logger.error(f"Error in recurring stats: {e}")
+            logger.error("Error in recurring stats", error=e)
             await query.edit_message_text("❌ Ошибка при получении статистики")
     
+    async def _render_recurring(self, user_id: int) -> Tuple[str, InlineKeyboardMarkup]:
+        """Экран /recurring: текст списка и клавиатура (для команды и кнопки обновления)"""
+        # Повторяющиеся напоминания пользователя (общий кэш с кнопками /recurring)
+        recurring_reminders, stats = await self._get_recurring_cached(user_id)
+        message = self._format_recurring_list(recurring_reminders, stats["recurring_active"])
+        return message, _RECURRING_MAIN_MARKUP
+    
     async def _handle_recurring_refresh_callback(self, query, context, user):
         """Обновление списка повторяющихся напоминаний"""
         try:
-            with SessionLocal() as db:
-                recurring_reminders = reminder_crud.get_recurring_reminders(db, user.id)
-                
-                if not recurring_reminders:
-                    message = """
-🔄 Повторяющиеся напоминания
-
-У вас пока нет повторяющихся напоминаний.
-
-Создать новое:
-• /daily - ежедневное напоминание
-• /weekly - еженедельное напоминание
-• /remind - быстрое напоминание с повторением
-                    """
-                else:
-                    message = f"🔄 Повторяющиеся напоминания ({len(recurring_reminders)}):\n\n"
-                    
-                    for i, reminder in enumerate(recurring_reminders[:10], 1):
-                        status_emoji = "✅" if reminder.is_enabled else "⏸️"
-                        type_emoji = {
-                            "daily": "📅",
-                            "weekly": "📆",
-                            "custom": "⚙️",
-                            "detox_reminder": "🧘",
-                            "focus_reminder": "🎯",
-                            "break_reminder": "☕",
-                            "quiet_hours": "🤫"
-                        }.get(reminder.reminder_type.value, "🔔")
-                        
-                        message += f"{i}. {status_emoji} {type_emoji} {reminder.title}\n"
-                        message += f"   ⏰ {reminder.scheduled_time.strftime('%H:%M')}"
-                        
-                        if reminder.is_recurring and reminder.repeat_interval:
-                            message += f" (каждые {reminder.repeat_interval} мин.)"
-                        elif reminder.reminder_type == ReminderType.DAILY:
-                            message += " (ежедневно)"
-                        elif reminder.reminder_type == ReminderType.WEEKLY:
-                            message += " (еженедельно)"
-                        
-                        message += "\n\n"
-                    
-                    if len(recurring_reminders) > 10:
-                        message += f"... и еще {len(recurring_reminders) - 10} напоминаний"
-                
-                # Создаем inline кнопки
-                keyboard = [
-                    [
-                        InlineKeyboardButton("📅 Ежедневные", callback_data="recurring_daily"),
-                        InlineKeyboardButton("📆 Еженедельные", callback_data="recurring_weekly")
-                    ],
-                    [
-                        InlineKeyboardButton("⚙️ Настройки", callback_data="recurring_settings"),
-                        InlineKeyboardButton("📊 Статистика", callback_data="recurring_stats")
-                    ],
-                    [
-                        InlineKeyboardButton("🔄 Обновить", callback_data="recurring_refresh")
-                    ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                await query.edit_message_text(
-                    text=message.strip(),
-                    reply_markup=reply_markup
-                )
-                
+            message, reply_markup = await self._render_recurring(user.id)
+            
+            await query.edit_message_text(
+                text=message,
+                reply_markup=reply_markup
+            )
+            
         except Exception as e:
-            logger.error(f"Error refreshing recurring reminders: {e}")
+            logger.error("Error refreshing recurring reminders", error=e)
             await query.edit_message_text(
                 text="❌ Ошибка при обновлении списка повторяющихся напоминаний"
             )
     
     async def _handle_add_time_quick_callback(self, query, context):
         """Быстрое добавление времени"""
-        message = """
-⏱️ Быстрое добавление времени
-
-Используйте команду:
-/addtime <минуты> <тип>
-
-Примеры:
-• /addtime 30 productivity
-• /addtime 60 social
-• /addtime 45 entertainment
-
-Типы активности:
-• productivity - продуктивное время
-• social - социальные сети
-• entertainment - развлечения
-• other - другое время
-        """
-        
-        keyboard = [
-            [InlineKeyboardButton("🔙 Назад", callback_data="analytics_refresh")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await query.edit_message_text(
-            text=message.strip(),
-            reply_markup=reply_markup
+            text=_ADDTIME_QUICK_HELP_TEXT,
+            reply_markup=_ADDTIME_QUICK_MARKUP
         )
 
     async def _recurring_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1696,74 +2484,15 @@ class TelegramBot:
             return
         
         try:
-            with SessionLocal() as db:
-                # Получаем повторяющиеся напоминания пользователя
-                recurring_reminders = reminder_crud.get_recurring_reminders(db, user.id)
-                
-                if not recurring_reminders:
-                    message = """
-🔄 Повторяющиеся напоминания
-
-У вас пока нет повторяющихся напоминаний.
-
-Создать новое:
-• /daily - ежедневное напоминание
-• /weekly - еженедельное напоминание
-• /remind - быстрое напоминание с повторением
-                    """
-                else:
-                    message = f"🔄 Повторяющиеся напоминания ({len(recurring_reminders)}):\n\n"
-                    
-                    for i, reminder in enumerate(recurring_reminders[:10], 1):
-                        status_emoji = "✅" if reminder.is_enabled else "⏸️"
-                        type_emoji = {
-                            "daily": "📅",
-                            "weekly": "📆",
-                            "custom": "⚙️",
-                            "detox_reminder": "🧘",
-                            "focus_reminder": "🎯",
-                            "break_reminder": "☕",
-                            "quiet_hours": "🤫"
-                        }.get(reminder.reminder_type.value, "🔔")
-                        
-                        message += f"{i}. {status_emoji} {type_emoji} {reminder.title}\n"
-                        message += f"   ⏰ {reminder.scheduled_time.strftime('%H:%M')}"
-                        
-                        if reminder.is_recurring and reminder.repeat_interval:
-                            message += f" (каждые {reminder.repeat_interval} мин.)"
-                        elif reminder.reminder_type == ReminderType.DAILY:
-                            message += " (ежедневно)"
-                        elif reminder.reminder_type == ReminderType.WEEKLY:
-                            message += " (еженедельно)"
-                        
-                        message += "\n\n"
-                    
-                    if len(recurring_reminders) > 10:
-                        message += f"... и еще {len(recurring_reminders) - 10} напоминаний"
-                
-                # Создаем inline кнопки
-                keyboard = [
-                    [
-                        InlineKeyboardButton("📅 Ежедневные", callback_data="recurring_daily"),
-                        InlineKeyboardButton("📆 Еженедельные", callback_data="recurring_weekly")
-                    ],
-                    [
-                        InlineKeyboardButton("⚙️ Настройки", callback_data="recurring_settings"),
-                        InlineKeyboardButton("📊 Статистика", callback_data="recurring_stats")
-                    ],
-                    [
-                        InlineKeyboardButton("🔄 Обновить", callback_data="recurring_refresh")
-                    ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                await update.message.reply_text(
-                    text=message.strip(),
-                    reply_markup=reply_markup
-                )
-                
+            message, reply_markup = await self._render_recurring(user.id)
+            
+            await update.message.reply_text(
+                text=message,
+                reply_markup=reply_markup
+            )
+            
         except Exception as e:
-            logger.error(f"Error in recurring command: {e}")
+            logger.error("Error in recurring command", error=e)
             await update.message.reply_text("❌ Ошибка при получении повторяющихся напоминаний")
 
     async def _daily_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1776,20 +2505,7 @@ class TelegramBot:
         # Проверяем, есть ли аргументы
         args = context.args
         if len(args) < 2:
-            message = """
-📅 Создание ежедневного напоминания
-
-Использование:
-/daily <время> <название> [сообщение]
-
-Примеры:
-• /daily 09:00 "Утренняя зарядка"
-• /daily 18:00 "Вечерний детокс" "Время отложить телефон"
-• /daily 22:00 "Тихие часы" "Подготовка ко сну"
-
-Время указывайте в формате ЧЧ:ММ
-            """
-            await update.message.reply_text(message.strip())
+            await update.message.reply_text(_DAILY_USAGE_TEXT)
             return
         
         try:
@@ -1798,29 +2514,19 @@ class TelegramBot:
             message = " ".join(args[2:]) if len(args) > 2 else None
             
             # Парсим время
-            from datetime import time
-            try:
-                hour, minute = map(int, time_str.split(':'))
-                reminder_time = time(hour, minute)
-            except ValueError:
+            time_match = _CLOCK_TIME_RE.fullmatch(time_str)
+            if not time_match:
                 await update.message.reply_text("❌ Неверный формат времени. Используйте ЧЧ:ММ")
                 return
+            reminder_time = dt_time(int(time_match.group(1)), int(time_match.group(2)))
             
-            with SessionLocal() as db:
-                # Создаем ежедневное напоминание
-                reminder = reminder_crud.create_daily_reminder(
-                    db=db,
-                    user_id=user.id,
-                    title=title,
-                    message=message,
-                    reminder_time=reminder_time
-                )
-                
-                # Добавляем в планировщик
-                from detoxbuddy.core.reminder_scheduler import add_reminder_to_scheduler
-                add_reminder_to_scheduler(reminder)
-                
-                success_message = f"""
+            # Создаем ежедневное напоминание и ставим его в планировщик в рабочем потоке
+            reminder = await asyncio.to_thread(
+                self._create_daily_reminder, user.id, title, message, reminder_time
+            )
+            self._invalidate_reminders(user.id)
+            
+            success_message = f"""
 ✅ Ежедневное напоминание создано!
 
 📅 Название: {reminder.title}
@@ -1828,12 +2534,12 @@ class TelegramBot:
 🆔 ID: {reminder.id}
 
 Напоминание будет приходить каждый день в указанное время.
-                """
-                
-                await update.message.reply_text(success_message.strip())
-                
+            """
+            
+            await update.message.reply_text(success_message.strip())
+            
         except Exception as e:
-            logger.error(f"Error creating daily reminder: {e}")
+            logger.error("Error creating daily reminder", error=e)
             await update.message.reply_text("❌ Ошибка при создании ежедневного напоминания")
 
     async def _weekly_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1846,23 +2552,7 @@ class TelegramBot:
         # Проверяем, есть ли аргументы
         args = context.args
         if len(args) < 3:
-            message = """
-📆 Создание еженедельного напоминания
-
-Использование:
-/weekly <дни> <время> <название> [сообщение]
-
-Дни недели: mon,tue,wed,thu,fri,sat,sun
-Время: ЧЧ:ММ
-
-Примеры:
-• /weekly mon,wed,fri 09:00 "Утренняя зарядка"
-• /weekly sat,sun 10:00 "Выходные" "Время для себя"
-• /weekly mon 18:00 "Начало недели" "Планирование"
-
-Дни указывайте через запятую без пробелов
-            """
-            await update.message.reply_text(message.strip())
+            await update.message.reply_text(_WEEKLY_USAGE_TEXT)
             return
         
         try:
@@ -1871,35 +2561,34 @@ class TelegramBot:
             title = args[2]
             message = " ".join(args[3:]) if len(args) > 3 else None
             
-            # Парсим дни недели
-            days_of_week = [day.strip().lower() for day in days_str.split(',')]
+            # Парсим дни недели в битовую маску за один проход
+            days_mask = 0
+            for day in days_str.split(','):
+                bit = _WEEKDAY_BITS.get(day.strip().lower())
+                if bit is None:
+                    await update.message.reply_text(
+                        f"❌ Неизвестный день недели: {day}. Используйте mon,tue,wed,thu,fri,sat,sun"
+                    )
+                    return
+                days_mask |= bit
             
             # Парсим время
-            from datetime import time
-            try:
-                hour, minute = map(int, time_str.split(':'))
-                reminder_time = time(hour, minute)
-            except ValueError:
+            time_match = _CLOCK_TIME_RE.fullmatch(time_str)
+            if not time_match:
                 await update.message.reply_text("❌ Неверный формат времени. Используйте ЧЧ:ММ")
                 return
+            reminder_time = dt_time(int(time_match.group(1)), int(time_match.group(2)))
             
-            with SessionLocal() as db:
-                # Создаем еженедельное напоминание
-                reminder = reminder_crud.create_weekly_reminder(
-                    db=db,
-                    user_id=user.id,
-                    title=title,
-                    message=message,
-                    days_of_week=days_of_week,
-                    reminder_time=reminder_time
-                )
-                
-                # Добавляем в планировщик
-                from detoxbuddy.core.reminder_scheduler import add_reminder_to_scheduler
-                add_reminder_to_scheduler(reminder)
-                
-                days_display = ", ".join(days_of_week).upper()
-                success_message = f"""
+            # Создаем еженедельное напоминание и ставим его в планировщик в рабочем потоке
+            reminder = await asyncio.to_thread(
+                self._create_weekly_reminder, user.id, title, message, days_mask, reminder_time
+            )
+            self._invalidate_reminders(user.id)
+            
+            days_display = ", ".join(
+                code for i, code in enumerate(WEEKDAY_CODES) if days_mask >> i & 1
+            ).upper()
+            success_message = f"""
 ✅ Еженедельное напоминание создано!
 
 📆 Название: {reminder.title}
@@ -1908,12 +2597,12 @@ class TelegramBot:
 🆔 ID: {reminder.id}
 
 Напоминание будет приходить в указанные дни недели.
-                """
-                
-                await update.message.reply_text(success_message.strip())
-                
+            """
+            
+            await update.message.reply_text(success_message.strip())
+            
         except Exception as e:
-            logger.error(f"Error creating weekly reminder: {e}")
+            logger.error("Error creating weekly reminder", error=e)
             await update.message.reply_text("❌ Ошибка при создании еженедельного напоминания")
 
     async def _handle_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1922,7 +2611,7 @@ class TelegramBot:
         text = update.message.text
         
         # Простая обработка текста (можно расширить)
-        if "привет" in text.lower() or "hello" in text.lower():
+        if _GREETING_RE.search(text):
             await context.bot.send_message(
                 chat_id=chat_id,
                 text="Привет! 👋 Используйте /help для получения справки."
@@ -1935,86 +2624,60 @@ class TelegramBot:
 
     # Методы для прямого использования (без контекста)
     
+    async def _get_bot(self) -> Bot:
+        """
+        Бот для прямых вызовов API: бот Application, а без него -
+        резервный экземпляр, который инициализируется один раз и переиспользуется
+        (без нового HTTP-клиента и TLS-рукопожатия на каждый вызов).
+        """
+        if self.application and self.application.bot:
+            return self.application.bot
+        
+        if self._fallback_bot is None:
+            bot = ExtBot(token=self.token, rate_limiter=self._make_rate_limiter())
+            await bot.initialize()
+            self._fallback_bot = bot
+        return self._fallback_bot
+    
+    @staticmethod
+    def _make_rate_limiter() -> AIORateLimiter:
+        """Лимитер исходящих вызовов API с лимитами Telegram"""
+        return AIORateLimiter(
+            overall_max_rate=_SEND_MAX_RATE,
+            group_max_rate=_SEND_GROUP_MAX_RATE,
+            max_retries=_SEND_MAX_RETRIES,
+        )
+    
     async def get_me(self):
         """Получает информацию о боте"""
-        if not self.application or not self.application.bot:
-            # Создаем временный экземпляр бота для получения информации
-            from telegram import Bot
-            temp_bot = Bot(token=self.token)
-            async with temp_bot:
-                return await temp_bot.get_me()
-        return await self.application.bot.get_me()
+        bot = await self._get_bot()
+        return await bot.get_me()
     
     async def send_message(self, chat_id: int, text: str, parse_mode: str = None, **kwargs):
         """Отправляет сообщение в указанный чат с проверкой статуса чата"""
         try:
-            if not self.application or not self.application.bot:
-                # Создаем временный экземпляр бота для отправки сообщения
-                from telegram import Bot
-                temp_bot = Bot(token=self.token)
-                async with temp_bot:
-                    return await temp_bot.send_message(
-                        chat_id=chat_id,
-                        text=text,
-                        parse_mode=parse_mode,
-                        **kwargs
-                    )
-            return await self.application.bot.send_message(
-                chat_id=chat_id,
-                text=text,
-                parse_mode=parse_mode,
-                **kwargs
-            )
+            bot = await self._get_bot()
+            return await bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode, **kwargs)
         except Exception as e:
             error_msg = str(e).lower()
             if "chat not found" in error_msg or "bot was blocked" in error_msg:
-                logger.warning(f"User {chat_id} blocked bot or chat not found: {e}")
+                logger.warning("User blocked bot or chat not found", chat_id=chat_id, error=e)
                 # Можно добавить логику для деактивации пользователя
                 return None
             elif "forbidden" in error_msg:
-                logger.warning(f"Bot forbidden to send message to user {chat_id}: {e}")
+                logger.warning("Bot forbidden to send message to user", chat_id=chat_id, error=e)
                 return None
             else:
-                logger.error(f"Error sending message to user {chat_id}: {e}")
+                logger.error("Error sending message to user", chat_id=chat_id, error=e)
                 raise
 
     # Методы для работы с таймером фокуса
     
     async def _show_focus_session_menu(self, update: Update):
         """Показать меню выбора длительности сессии фокуса"""
-        keyboard = [
-            [
-                InlineKeyboardButton("🍅 25 мин (стандарт)", callback_data="focus_25"),
-                InlineKeyboardButton("⏰ 15 мин (короткая)", callback_data="focus_15")
-            ],
-            [
-                InlineKeyboardButton("⏱️ 45 мин (длинная)", callback_data="focus_45"),
-                InlineKeyboardButton("🎯 60 мин (марафон)", callback_data="focus_60")
-            ],
-            [
-                InlineKeyboardButton("📊 Статистика", callback_data="focus_stats"),
-                InlineKeyboardButton("❌ Отмена", callback_data="focus_cancel")
-            ]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        message = """
-🍅 **Таймер фокуса (Pomodoro)**
-
-Выберите длительность сессии:
-
-• **25 минут** - классическая техника Pomodoro
-• **15 минут** - для быстрых задач
-• **45 минут** - для глубокой работы
-• **60 минут** - для сложных проектов
-
-После сессии автоматически начнется перерыв!
-        """
-        
         await update.message.reply_text(
-            message.strip(),
-            reply_markup=reply_markup,
+            _FOCUS_MENU_TEXT,
+            reply_markup=_FOCUS_MENU_MARKUP,
             parse_mode="Markdown"
         )
     
@@ -2033,19 +2696,6 @@ class TelegramBot:
             title = "🌴 Длинный перерыв"
             status_emoji = "🌴"
         
-        keyboard = [
-            [
-                InlineKeyboardButton("⏸️ Пауза", callback_data="focus_pause"),
-                InlineKeyboardButton("▶️ Продолжить", callback_data="focus_resume")
-            ],
-            [
-                InlineKeyboardButton("⏹️ Завершить", callback_data="focus_complete"),
-                InlineKeyboardButton("❌ Отменить", callback_data="focus_cancel")
-            ]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         message = f"""
 {title}
 
@@ -2057,55 +2707,24 @@ class TelegramBot:
         
         await update.message.reply_text(
             message.strip(),
-            reply_markup=reply_markup,
+            reply_markup=_FOCUS_CONTROLS_MARKUP,
             parse_mode="Markdown"
         )
     
-    async def _handle_focus_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработка callback запросов для таймера фокуса"""
-        query = update.callback_query
-        await query.answer()
-        
-        # Аутентификация пользователя
-        user = await self._authenticate_user(update)
-        if not user:
-            await query.edit_message_text("❌ Ошибка аутентификации")
-            return
-        
-        data = query.data
-        user_id = user.id
-        
+    async def _run_focus_action(self, query, user_id: int, action: str):
+        """Выполняет действие таймера фокуса (25, pause, resume, complete, cancel, stats)"""
         try:
-            if data.startswith("focus_"):
-                action = data.split("_")[1]
+            if action.isdigit():
+                # Запуск новой сессии
+                await self._start_focus_session(query, user_id, int(action))
+                return
+            
+            handler = self._focus_actions.get(action)
+            if handler:
+                await handler(query, user_id)
                 
-                if action.isdigit():
-                    # Запуск новой сессии
-                    duration = int(action)
-                    await self._start_focus_session(query, user_id, duration)
-                    
-                elif action == "pause":
-                    # Пауза сессии
-                    await self._pause_focus_session(query, user_id)
-                    
-                elif action == "resume":
-                    # Возобновление сессии
-                    await self._resume_focus_session(query, user_id)
-                    
-                elif action == "complete":
-                    # Завершение сессии
-                    await self._complete_focus_session(query, user_id)
-                    
-                elif action == "cancel":
-                    # Отмена сессии
-                    await self._cancel_focus_session(query, user_id)
-                    
-                elif action == "stats":
-                    # Показать статистику
-                    await self._show_focus_stats(query, user_id)
-                    
         except Exception as e:
-            logger.error(f"Error handling focus callback: {e}")
+            logger.error("Error handling focus callback", error=e)
             await query.edit_message_text("❌ Произошла ошибка при обработке запроса")
     
     async def _start_focus_session(self, query, user_id: int, duration: int):
@@ -2126,21 +2745,9 @@ class TelegramBot:
 Сосредоточьтесь на задаче! 💪
             """
             
-            keyboard = [
-                [
-                    InlineKeyboardButton("⏸️ Пауза", callback_data="focus_pause"),
-                    InlineKeyboardButton("⏹️ Завершить", callback_data="focus_complete")
-                ],
-                [
-                    InlineKeyboardButton("❌ Отменить", callback_data="focus_cancel")
-                ]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
                 message.strip(),
-                reply_markup=reply_markup,
+                reply_markup=_FOCUS_RUNNING_MARKUP,
                 parse_mode="Markdown"
             )
         else:
@@ -2154,28 +2761,9 @@ class TelegramBot:
         
         success = self.focus_timer.pause_session(user_id)
         if success:
-            message = """
-⏸️ **Сессия приостановлена**
-
-Время паузы не засчитывается в общую длительность.
-Используйте "Продолжить" для возобновления.
-            """
-            
-            keyboard = [
-                [
-                    InlineKeyboardButton("▶️ Продолжить", callback_data="focus_resume"),
-                    InlineKeyboardButton("⏹️ Завершить", callback_data="focus_complete")
-                ],
-                [
-                    InlineKeyboardButton("❌ Отменить", callback_data="focus_cancel")
-                ]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
-                message.strip(),
-                reply_markup=reply_markup,
+                _FOCUS_PAUSED_TEXT,
+                reply_markup=_FOCUS_PAUSED_MARKUP,
                 parse_mode="Markdown"
             )
         else:
@@ -2189,27 +2777,9 @@ class TelegramBot:
         
         success = self.focus_timer.resume_session(user_id)
         if success:
-            message = """
-▶️ **Сессия возобновлена**
-
-Продолжайте работу! Таймер снова активен.
-            """
-            
-            keyboard = [
-                [
-                    InlineKeyboardButton("⏸️ Пауза", callback_data="focus_pause"),
-                    InlineKeyboardButton("⏹️ Завершить", callback_data="focus_complete")
-                ],
-                [
-                    InlineKeyboardButton("❌ Отменить", callback_data="focus_cancel")
-                ]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
-                message.strip(),
-                reply_markup=reply_markup,
+                _FOCUS_RESUMED_TEXT,
+                reply_markup=_FOCUS_RUNNING_MARKUP,
                 parse_mode="Markdown"
             )
         else:
@@ -2223,14 +2793,8 @@ class TelegramBot:
         
         success = self.focus_timer.cancel_session(user_id)
         if success:
-            message = """
-✅ **Сессия завершена досрочно**
-
-Хорошая работа! Даже частично завершенная сессия - это прогресс.
-            """
-            
             await query.edit_message_text(
-                message.strip(),
+                _FOCUS_COMPLETED_TEXT,
                 parse_mode="Markdown"
             )
         else:
@@ -2244,14 +2808,8 @@ class TelegramBot:
         
         success = self.focus_timer.cancel_session(user_id)
         if success:
-            message = """
-❌ **Сессия отменена**
-
-Не расстраивайтесь! Попробуйте снова, когда будете готовы.
-            """
-            
             await query.edit_message_text(
-                message.strip(),
+                _FOCUS_CANCELLED_TEXT,
                 parse_mode="Markdown"
             )
         else:
@@ -2260,12 +2818,7 @@ class TelegramBot:
     async def _show_focus_stats(self, query, user_id: int):
         """Показать статистику фокуса"""
         try:
-            from detoxbuddy.database.database import SessionLocal
-            from detoxbuddy.database.crud.focus_session import focus_session
-            
-            with SessionLocal() as db:
-                stats = focus_session.get_user_stats(db, user_id, days=7)
-                streak = focus_session.get_streak_days(db, user_id)
+            stats, streak = await asyncio.to_thread(self._fetch_focus_stats, user_id)
             
             message = f"""
 📊 **Статистика фокуса (7 дней)**
@@ -2279,135 +2832,113 @@ class TelegramBot:
 Отличная работа! 💪
             """
             
-            keyboard = [
-                [
-                    InlineKeyboardButton("🍅 Начать сессию", callback_data="focus_25"),
-                    InlineKeyboardButton("📊 Подробнее", callback_data="focus_detailed_stats")
-                ],
-                [
-                    InlineKeyboardButton("🔙 Назад", callback_data="focus_back")
-                ]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
                 message.strip(),
-                reply_markup=reply_markup,
+                reply_markup=_FOCUS_STATS_MARKUP,
                 parse_mode="Markdown"
             )
             
         except Exception as e:
-            logger.error(f"Error showing focus stats: {e}")
+            logger.error("Error showing focus stats", error=e)
             await query.edit_message_text("❌ Ошибка при получении статистики")
 
     # Методы для работы с достижениями
     async def _achievements_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /achievements"""
-        user = await self._authenticate_user(update)
-        if not user:
-            await update.message.reply_text("❌ Произошла ошибка при аутентификации.")
-            return
-        
         try:
-            from detoxbuddy.database.database import SessionLocal
+            user, rendered = await self._run_with_user(update, self._build_achievements_overview)
+            if not user:
+                await update.message.reply_text("❌ Произошла ошибка при аутентификации.")
+                return
+            if rendered is None:
+                await update.message.reply_text("❌ Достижения не найдены в базе данных.")
+                return
             
-            with SessionLocal() as db:
-                # Проверяем и инициализируем достижения для пользователя
-                all_achievements = achievement_service.achievement_crud.get_all_active(db)
-                if not all_achievements:
-                    await update.message.reply_text("❌ Достижения не найдены в базе данных.")
-                    return
-                
-                # Проверяем все достижения пользователя
-                completed_achievements = achievement_service.check_all_achievements(db, user.id)
-                
-                # Получаем обновленные данные
-                user_achievements = user_achievement_crud.get_user_achievements(db, user.id)
-                completed_achievements = user_achievement_crud.get_completed_achievements(db, user.id)
-                recent_achievements = user_achievement_crud.get_recent_achievements(db, user.id, days=7)
-                
-                # Получаем уровень пользователя
-                user_level = user_level_crud.get_user_level(db, user.id)
-                if not user_level:
-                    user_level = user_level_crud.create_user_level(db, user.id)
+            text, reply_markup = rendered
+            await update.message.reply_text(
+                text,
+                reply_markup=reply_markup,
+                parse_mode="Markdown"
+            )
                 
-                # Формируем сообщение
-                message = f"""
-🏆 **Достижения {user.full_name}**
+        except Exception as e:
+            logger.error("Error in achievements command", error=e)
+            await update.message.reply_text("❌ Ошибка при получении достижений")
+
+    def _build_achievements_overview(self, db, user: User) -> Optional[Tuple[str, InlineKeyboardMarkup]]:
+        """Экран /achievements (выполняется в рабочем потоке); None, если достижений нет в БД"""
+        # Прогресс уже посчитан событиями (сессии фокуса, напоминания, экранное время),
+        # здесь только чтение; полный пересчет - задача recheck_achievements
+        all_achievements = achievement_service.achievement_crud.get_all_active(db)
+        if not all_achievements:
+            return None
+        
+        # Недавние достижения: сортировка и LIMIT на стороне БД
+        recent_achievements = user_achievement_crud.get_recent_achievements(
+            db, user.id, days=7, limit=3
+        )
+        
+        # Получаем уровень пользователя
+        user_level = user_level_crud.get_or_create(db, user.id)
+        
+        # Формируем сообщение
+        parts = [f"""
+🏆 **Достижения {_md_escape(user.full_name)}**
 
 📊 **Статистика:**
-• Завершено: {len(completed_achievements)} из {len(all_achievements)}
+• Завершено: {user_level.achievements_count} из {len(all_achievements)}
 • Уровень: {user_level.level}
 • Опыт: {user_level.experience}/{user_level.experience_to_next_level} XP
 • Серия дней: {user_level.streak_days} дней
 
 🎯 **Недавние достижения:**
-"""
-                
-                if recent_achievements:
-                    for ua in recent_achievements[:3]:  # Показываем только 3 последних
-                        achievement = ua.achievement
-                        message += f"• {achievement.badge_icon} {achievement.name}\n"
-                else:
-                    message += "Пока нет достижений. Продолжайте работать! 💪\n"
-                
-                message += "\nВыберите действие:"
-                
-                # Создаем inline кнопки
-                keyboard = [
-                    [
-                        InlineKeyboardButton("📋 Все достижения", callback_data="achievements_all"),
-                        InlineKeyboardButton("🎯 Прогресс", callback_data="achievements_progress")
-                    ],
-                    [
-                        InlineKeyboardButton("🏅 Недавние", callback_data="achievements_recent"),
-                        InlineKeyboardButton("📈 Статистика", callback_data="achievements_stats")
-                    ],
-                    [
-                        InlineKeyboardButton("🔙 Назад", callback_data="main_menu")
-                    ]
-                ]
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                await update.message.reply_text(
-                    message.strip(),
-                    reply_markup=reply_markup,
-                    parse_mode="Markdown"
-                )
-                
-        except Exception as e:
-            logger.error(f"Error in achievements command: {e}")
-            await update.message.reply_text("❌ Ошибка при получении достижений")
+"""]
+        
+        if recent_achievements:
+            for ua in recent_achievements:  # Только 3 последних
+                achievement = ua.achievement
+                parts.append(f"• {achievement.badge_icon} {_md_escape(achievement.name)}\n")
+        else:
+            parts.append("Пока нет достижений. Продолжайте работать! 💪\n")
+        
+        parts.append("\nВыберите действие:")
+        message = "".join(parts)
+        
+        return message.strip(), _ACHIEVEMENTS_MENU_MARKUP
 
     async def _level_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /level"""
-        user = await self._authenticate_user(update)
-        if not user:
-            await update.message.reply_text("❌ Произошла ошибка при аутентификации.")
-            return
-        
         try:
-            from detoxbuddy.database.database import SessionLocal
+            user, rendered = await self._run_with_user(update, self._build_level_overview)
+            if not user:
+                await update.message.reply_text("❌ Произошла ошибка при аутентификации.")
+                return
             
-            with SessionLocal() as db:
-                # Получаем уровень пользователя
-                user_level = user_level_crud.get_user_level(db, user.id)
-                if not user_level:
-                    user_level = user_level_crud.create_user_level(db, user.id)
-                
-                # Вычисляем прогресс до следующего уровня
-                progress = user_level.progress_to_next_level
-                progress_bar_length = 10
-                filled_length = int(progress * progress_bar_length)
-                progress_bar = "█" * filled_length + "░" * (progress_bar_length - filled_length)
+            text, reply_markup = rendered
+            await update.message.reply_text(
+                text,
+                reply_markup=reply_markup,
+                parse_mode="Markdown"
+            )
                 
-                # Формируем сообщение
-                message = f"""
+        except Exception as e:
+            logger.error("Error in level command", error=e)
+            await update.message.reply_text("❌ Ошибка при получении уровня")
+
+    def _build_level_overview(self, db, user: User) -> Tuple[str, InlineKeyboardMarkup]:
+        """Экран /level (выполняется в рабочем потоке)"""
+        # Получаем уровень пользователя
+        user_level = user_level_crud.get_or_create(db, user.id)
+        
+        # Вычисляем прогресс до следующего уровня
+        progress = user_level.progress_to_next_level
+        progress_bar = _progress_bar(progress)
+        
+        # Формируем сообщение
+        message = f"""
 📊 **Уровень и опыт**
 
-👤 **{user.full_name}**
+👤 **{_md_escape(user.full_name)}**
 🏆 Уровень: {user_level.level}
 ⭐ Опыт: {user_level.experience}/{user_level.experience_to_next_level} XP
 📈 Общий опыт: {user_level.total_experience} XP
@@ -2418,327 +2949,234 @@ class TelegramBot:
 {progress_bar} {progress:.1%}
 
 """
-                
-                # Добавляем мотивационное сообщение
-                if progress >= 0.8:
-                    message += "🎉 Почти новый уровень! Продолжайте в том же духе!"
-                elif progress >= 0.5:
-                    message += "💪 Отличный прогресс! Вы на полпути к новому уровню!"
-                else:
-                    message += "🚀 Начинайте свой путь к новому уровню!"
-                
-                # Создаем inline кнопки
-                keyboard = [
-                    [
-                        InlineKeyboardButton("🏆 Достижения", callback_data="achievements_all"),
-                        InlineKeyboardButton("📈 Статистика", callback_data="level_stats")
-                    ],
-                    [
-                        InlineKeyboardButton("🎯 Как получить опыт", callback_data="level_help"),
-                        InlineKeyboardButton("🔙 Назад", callback_data="main_menu")
-                    ]
-                ]
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                await update.message.reply_text(
-                    message.strip(),
-                    reply_markup=reply_markup,
-                    parse_mode="Markdown"
-                )
-                
-        except Exception as e:
-            logger.error(f"Error in level command: {e}")
-            await update.message.reply_text("❌ Ошибка при получении уровня")
+        
+        # Добавляем мотивационное сообщение
+        if progress >= 0.8:
+            message += "🎉 Почти новый уровень! Продолжайте в том же духе!"
+        elif progress >= 0.5:
+            message += "💪 Отличный прогресс! Вы на полпути к новому уровню!"
+        else:
+            message += "🚀 Начинайте свой путь к новому уровню!"
+        
+        return message.strip(), _LEVEL_MENU_MARKUP
 
     async def _profile_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /profile"""
-        user = await self._authenticate_user(update)
-        if not user:
-            await update.message.reply_text("❌ Произошла ошибка при аутентификации.")
-            return
-        
         try:
-            from detoxbuddy.database.database import SessionLocal
-            from detoxbuddy.database.crud.focus_session import focus_session
-            from detoxbuddy.database.crud.screen_time import screen_time_crud
-            
-            with SessionLocal() as db:
-                # Получаем данные пользователя
-                user_level = user_level_crud.get_user_level(db, user.id)
-                if not user_level:
-                    user_level = user_level_crud.create_user_level(db, user.id)
-                
-                # Получаем статистику
-                focus_stats = focus_session.get_user_stats(db, user.id, days=30)
-                screen_time_stats = screen_time_crud.get_user_stats(db, user.id, days=30)
-                completed_achievements = user_achievement_crud.get_completed_achievements(db, user.id)
+            user, rendered = await self._run_with_user(update, self._build_profile)
+            if not user:
+                await update.message.reply_text("❌ Произошла ошибка при аутентификации.")
+                return
+            
+            text, reply_markup = rendered
+            await update.message.reply_text(
+                text,
+                reply_markup=reply_markup,
+                parse_mode="Markdown"
+            )
                 
-                # Формируем сообщение
-                message = f"""
+        except Exception as e:
+            logger.error("Error in profile command", error=e)
+            await update.message.reply_text("❌ Ошибка при получении профиля")
+
+    def _build_profile(self, db, user: User) -> Tuple[str, InlineKeyboardMarkup]:
+        """Экран /profile (выполняется в рабочем потоке)"""
+        # Уровень, статистика за 30 дней и последнее достижение - одним запросом
+        profile = user_level_crud.get_profile_snapshot(db, user.id, days=30)
+        if profile.level is None:
+            user_level_crud.get_or_create(db, user.id)
+            profile = user_level_crud.get_profile_snapshot(db, user.id, days=30)
+        
+        # Формируем сообщение
+        message = f"""
 👤 **Профиль пользователя**
 
 **Основная информация:**
-• Имя: {user.full_name}
+• Имя: {_md_escape(user.full_name)}
 • Статус: {'🌟 Премиум' if user.is_premium else '👤 Обычный'}
 • Дата регистрации: {user.created_at.strftime('%d.%m.%Y')}
 • Последняя активность: {user.last_activity.strftime('%d.%m.%Y %H:%M') if user.last_activity else 'Неизвестно'}
 
 **Уровень и прогресс:**
-• Уровень: {user_level.level}
-• Опыт: {user_level.experience}/{user_level.experience_to_next_level} XP
-• Достижений: {len(completed_achievements)}
-• Серия дней: {user_level.streak_days} дней
+• Уровень: {profile.level}
+• Опыт: {profile.experience}/{profile.experience_to_next_level} XP
+• Достижений: {profile.achievements_count}
+• Серия дней: {profile.streak_days} дней
 
 **Статистика за 30 дней:**
-• Сессий фокуса: {focus_stats['total_sessions']}
-• Время фокуса: {focus_stats['total_focus_time_minutes']} мин
-• Среднее экранное время: {screen_time_stats.get('avg_duration_minutes', 0):.1f} мин/день
+• Сессий фокуса: {profile.focus_sessions}
+• Время фокуса: {profile.focus_minutes} мин
+• Среднее экранное время: {profile.avg_screen_minutes:.1f} мин/день
 
 **Достижения:**
-• Завершено: {len(completed_achievements)} достижений
-• Последнее: {completed_achievements[0].achievement.name if completed_achievements else 'Нет'}
+• Завершено: {profile.achievements_count} достижений
+• Последнее: {_md_escape(profile.last_achievement) or 'Нет'}
 """
-                
-                # Создаем inline кнопки
-                keyboard = [
-                    [
-                        InlineKeyboardButton("🏆 Достижения", callback_data="achievements_all"),
-                        InlineKeyboardButton("📊 Аналитика", callback_data="analytics_main")
-                    ],
-                    [
-                        InlineKeyboardButton("⚙️ Настройки", callback_data="settings_main"),
-                        InlineKeyboardButton("📈 Статистика", callback_data="profile_stats")
-                    ],
-                    [
-                        InlineKeyboardButton("🔙 Назад", callback_data="main_menu")
-                    ]
-                ]
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                await update.message.reply_text(
-                    message.strip(),
-                    reply_markup=reply_markup,
-                    parse_mode="Markdown"
-                )
-                
-        except Exception as e:
-            logger.error(f"Error in profile command: {e}")
-            await update.message.reply_text("❌ Ошибка при получении профиля")
+        
+        return message.strip(), _PROFILE_MENU_MARKUP
 
     async def _handle_achievement_callback(self, query, user_id: int, action: str):
         """Обработка callback запросов для достижений"""
+        render = self._achievement_views.get(action)
+        if render is None:
+            self._forget_last_edit(query)
+            await query.edit_message_text("❌ Неизвестное действие")
+            return
+        
         try:
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                if action == "all":
-                    await self._show_all_achievements(query, user_id, db)
-                elif action == "progress":
-                    await self._show_achievement_progress(query, user_id, db)
-                elif action == "recent":
-                    await self._show_recent_achievements(query, user_id, db)
-                elif action == "stats":
-                    await self._show_achievement_stats(query, user_id, db)
-                else:
-                    await query.edit_message_text("❌ Неизвестное действие")
+            version, rendered, cached = await asyncio.to_thread(
+                self._load_achievement_view, user_id, action, render
+            )
+            if not cached:
+                key = (user_id, action)
+                self._achievement_views_cache[key] = (
+                    version, rendered, time.monotonic() + _ACHIEVEMENT_VIEWS_CACHE_TTL
+                )
+                self._achievement_views_cache.move_to_end(key)
+                if len(self._achievement_views_cache) > _ACHIEVEMENT_VIEWS_CACHE_MAXSIZE:
+                    self._achievement_views_cache.popitem(last=False)
+            
+            text, reply_markup = rendered
+            await self._edit_markdown_if_changed(query, text, reply_markup)
                     
         except Exception as e:
-            logger.error(f"Error in achievement callback: {e}")
+            logger.error("Error in achievement callback", error=e)
+            self._forget_last_edit(query)
             await query.edit_message_text("❌ Ошибка при обработке запроса")
+    
+    def _load_achievement_view(self, user_id: int, view: str, render) -> tuple:
+        """
+        Экран достижений: (версия, (текст, клавиатура), взят_ли_из_кэша) (выполняется в рабочем потоке).
+        Запись кэша действительна до истечения TTL, пока не изменились ни уровень пользователя
+        (updated_at), ни прогресс его достижений (increment_progress не трогает UserLevel).
+        Кэш здесь только читается; запись делает _handle_achievement_callback в цикле событий.
+        """
+        with session_scope() as db:
+            user_level = user_level_crud.get_user_level(db, user_id)
+            version = (
+                user_level.updated_at if user_level else None,
+                user_achievement_crud.get_progress_version(db, user_id),
+            )
+            
+            entry = self._achievement_views_cache.get((user_id, view))
+            if entry is not None:
+                cached_version, rendered, expires_at = entry
+                if cached_version == version and time.monotonic() < expires_at:
+                    return version, rendered, True
+            
+            return version, render(db, user_id, user_level), False
 
-    def _format_achievement_progress(self, ua, achievement):
+    @staticmethod
+    def _format_achievement_progress(ua, achievement):
         """Форматирует прогресс достижения с учетом перевыполнения"""
-        if ua.is_completed:
-            if ua.current_progress > achievement.condition_value:
-                # Перевыполнено
-                overachievement = ua.current_progress - achievement.condition_value
-                overachievement_percent = (ua.current_progress / achievement.condition_value) * 100
-                return f"✅ {achievement.badge_icon} {achievement.name} ({ua.current_progress}/{achievement.condition_value} +{overachievement})"
-            else:
-                # Выполнено точно
-                return f"✅ {achievement.badge_icon} {achievement.name} ({ua.current_progress}/{achievement.condition_value})"
-        else:
-            # В процессе
-            progress_percent = (ua.current_progress / achievement.condition_value) * 100
-            return f"⏳ {achievement.badge_icon} {achievement.name} ({ua.current_progress}/{achievement.condition_value})"
+        progress = ua.current_progress
+        target = achievement.condition_value
+        state = (progress > target) + 1 if ua.is_completed else 0
+        return _ACHIEVEMENT_PROGRESS_TEMPLATES[state].format(
+            icon=achievement.badge_icon,
+            name=_md_escape(achievement.name),
+            progress=progress,
+            target=target,
+            over=progress - target,
+        )
 
-    async def _show_all_achievements(self, query, user_id: int, db):
+    def _render_all_achievements(self, db, user_id: int, user_level) -> Tuple[str, InlineKeyboardMarkup]:
         """Показать все достижения пользователя"""
-        user_achievements = user_achievement_crud.get_user_achievements(db, user_id)
-        completed_achievements = user_achievement_crud.get_completed_achievements(db, user_id)
+        user_achievements, completed_achievements = user_achievement_crud.get_full_snapshot(db, user_id)
         
-        message = f"""
+        parts = [f"""
 🏆 **Все достижения**
 
 📊 **Прогресс:** {len(completed_achievements)}/{len(user_achievements)} завершено
 
-"""
+"""]
         
         # Группируем достижения по типам
         achievement_types = {}
         for ua in user_achievements:
-            achievement = ua.achievement
-            if achievement.type.value not in achievement_types:
-                achievement_types[achievement.type.value] = []
-            achievement_types[achievement.type.value].append(ua)
+            achievement_types.setdefault(ua.achievement.type, []).append(ua)
         
         # Показываем достижения по типам
-        for type_name, achievements in achievement_types.items():
-            type_emoji = {
-                "focus_sessions": "🎯",
-                "screen_time_reduction": "📱", 
-                "streak_days": "📅",
-                "reminders_completed": "⏰",
-                "first_time": "👋",
-                "milestone": "🏅"
-            }.get(type_name, "📋")
-            
-            # Преобразуем название типа в читаемый формат
-            type_display_name = {
-                "focus_sessions": "Focus Sessions",
-                "screen_time_reduction": "Screen Time Reduction", 
-                "streak_days": "Streak Days",
-                "reminders_completed": "Reminders Completed",
-                "first_time": "First Time",
-                "milestone": "Milestone"
-            }.get(type_name, type_name.replace('_', ' ').title())
-            
-            message += f"\n{type_emoji} **{type_display_name}:**\n"
+        for achievement_type, achievements in achievement_types.items():
+            type_emoji, type_display_name, _ = _ACHIEVEMENT_TYPE_META[achievement_type]
+            
+            parts.append(f"\n{type_emoji} **{type_display_name}:**\n")
             
             for ua in achievements:  # Показываем все достижения
                 achievement = ua.achievement
                 formatted_progress = self._format_achievement_progress(ua, achievement)
-                message += f"• {formatted_progress}\n"
+                parts.append(f"• {formatted_progress}\n")
         
-        keyboard = [
-            [
-                InlineKeyboardButton("🎯 Прогресс", callback_data="achievements_progress"),
-                InlineKeyboardButton("🏅 Недавние", callback_data="achievements_recent")
-            ],
-            [
-                InlineKeyboardButton("🔙 Назад", callback_data="achievements_main")
-            ]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            message.strip(),
-            reply_markup=reply_markup,
-            parse_mode="Markdown"
-        )
+        message = "".join(parts)
+        return message.strip(), _ACH_ALL_MARKUP
 
-    async def _show_achievement_progress(self, query, user_id: int, db):
+    def _render_achievement_progress(self, db, user_id: int, user_level) -> Tuple[str, InlineKeyboardMarkup]:
         """Показать прогресс по достижениям"""
-        user_achievements = user_achievement_crud.get_user_achievements(db, user_id)
-        
-        message = """
+        parts = ["""
 🎯 **Прогресс по достижениям**
 
-"""
+"""]
         
-        # Показываем ближайшие к завершению достижения
-        in_progress = [ua for ua in user_achievements if not ua.is_completed]
-        in_progress.sort(key=lambda x: x.achievement.condition_value - x.current_progress)
+        # Ближайшие к завершению достижения (сортировка и LIMIT в БД)
+        in_progress = user_achievement_crud.get_closest_to_completion(db, user_id, limit=5)
         
         if in_progress:
-            message += "**Ближайшие к завершению:**\n\n"
-            for ua in in_progress[:5]:
+            parts.append("**Ближайшие к завершению:**\n\n")
+            for ua in in_progress:
                 achievement = ua.achievement
                 progress_percent = (ua.current_progress / achievement.condition_value) * 100
-                progress_bar_length = 10
-                filled_length = int((ua.current_progress / achievement.condition_value) * progress_bar_length)
-                progress_bar = "█" * filled_length + "░" * (progress_bar_length - filled_length)
+                progress_bar = _progress_bar(ua.current_progress / achievement.condition_value)
                 
-                message += f"{achievement.badge_icon} **{achievement.name}**\n"
-                message += f"└ {progress_bar} {progress_percent:.1f}% ({ua.current_progress}/{achievement.condition_value})\n\n"
+                parts.append(f"{achievement.badge_icon} **{_md_escape(achievement.name)}**\n")
+                parts.append(f"└ {progress_bar} {progress_percent:.1f}% ({ua.current_progress}/{achievement.condition_value})\n\n")
         else:
-            message += "🎉 Все достижения завершены! Вы молодец!\n\n"
+            parts.append("🎉 Все достижения завершены! Вы молодец!\n\n")
         
         # Показываем перевыполненные достижения
-        overachieved = [ua for ua in user_achievements if ua.is_completed and ua.current_progress > ua.achievement.condition_value]
+        overachieved = user_achievement_crud.get_overachieved(db, user_id, limit=3)
         if overachieved:
-            message += "**🏆 Перевыполненные достижения:**\n\n"
-            for ua in overachieved[:3]:
+            parts.append("**🏆 Перевыполненные достижения:**\n\n")
+            for ua in overachieved:
                 achievement = ua.achievement
                 overachievement = ua.current_progress - achievement.condition_value
                 overachievement_percent = (ua.current_progress / achievement.condition_value) * 100
-                message += f"✅ {achievement.badge_icon} **{achievement.name}**\n"
-                message += f"└ {ua.current_progress}/{achievement.condition_value} (+{overachievement}, {overachievement_percent:.0f}%)\n\n"
+                parts.append(f"✅ {achievement.badge_icon} **{_md_escape(achievement.name)}**\n")
+                parts.append(f"└ {ua.current_progress}/{achievement.condition_value} (+{overachievement}, {overachievement_percent:.0f}%)\n\n")
         
-        keyboard = [
-            [
-                InlineKeyboardButton("🏆 Все достижения", callback_data="achievements_all"),
-                InlineKeyboardButton("📊 Статистика", callback_data="achievements_stats")
-            ],
-            [
-                InlineKeyboardButton("🔙 Назад", callback_data="achievements_main")
-            ]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            message.strip(),
-            reply_markup=reply_markup,
-            parse_mode="Markdown"
-        )
+        message = "".join(parts)
+        return message.strip(), _ACH_PROGRESS_MARKUP
 
-    async def _show_recent_achievements(self, query, user_id: int, db):
+    def _render_recent_achievements(self, db, user_id: int, user_level) -> Tuple[str, InlineKeyboardMarkup]:
         """Показать недавние достижения"""
-        recent_achievements = user_achievement_crud.get_recent_achievements(db, user_id, days=30)
+        recent_achievements = user_achievement_crud.get_recent_achievements(db, user_id, days=30, limit=10)
         
-        message = """
+        parts = ["""
 🏅 **Недавние достижения**
 
-"""
+"""]
         
         if recent_achievements:
-            for ua in recent_achievements[:10]:
+            for ua in recent_achievements:
                 achievement = ua.achievement
-                date_str = ua.completed_at.strftime('%d.%m.%Y')
-                message += f"• {achievement.badge_icon} **{achievement.name}** ({date_str})\n"
-                message += f"  └ {achievement.description}\n\n"
+                completed_at = ua.completed_at
+                date_str = f"{completed_at.day:02d}.{completed_at.month:02d}.{completed_at.year}"
+                parts.append(f"• {achievement.badge_icon} **{_md_escape(achievement.name)}** ({date_str})\n")
+                parts.append(f"  └ {_md_escape(achievement.description)}\n\n")
         else:
-            message += "Пока нет недавних достижений. Продолжайте работать! 💪\n\n"
-        
-        keyboard = [
-            [
-                InlineKeyboardButton("🏆 Все достижения", callback_data="achievements_all"),
-                InlineKeyboardButton("🎯 Прогресс", callback_data="achievements_progress")
-            ],
-            [
-                InlineKeyboardButton("🔙 Назад", callback_data="achievements_main")
-            ]
-        ]
+            parts.append("Пока нет недавних достижений. Продолжайте работать! 💪\n\n")
         
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            message.strip(),
-            reply_markup=reply_markup,
-            parse_mode="Markdown"
-        )
+        message = "".join(parts)
+        return message.strip(), _ACH_BROWSE_MARKUP
 
-    async def _show_achievement_stats(self, query, user_id: int, db):
+    def _render_achievement_stats(self, db, user_id: int, user_level) -> Tuple[str, InlineKeyboardMarkup]:
         """Показать статистику достижений"""
-        user_achievements = user_achievement_crud.get_user_achievements(db, user_id)
-        completed_achievements = user_achievement_crud.get_completed_achievements(db, user_id)
-        user_level = user_level_crud.get_user_level(db, user_id)
+        user_achievements, completed_achievements = user_achievement_crud.get_full_snapshot(db, user_id)
         
-        # Группируем по типам
-        type_stats = {}
-        for ua in user_achievements:
-            type_name = ua.achievement.type.value
-            if type_name not in type_stats:
-                type_stats[type_name] = {"total": 0, "completed": 0}
-            type_stats[type_name]["total"] += 1
-            if ua.is_completed:
-                type_stats[type_name]["completed"] += 1
+        # Считаем по типам: всего и завершено
+        type_totals = Counter(ua.achievement.type for ua in user_achievements)
+        type_completed = Counter(ua.achievement.type for ua in completed_achievements)
         
-        message = f"""
+        parts = [f"""
 📊 **Статистика достижений**
 
 **Общая статистика:**
@@ -2749,65 +3187,46 @@ class TelegramBot:
 • Общий опыт: {user_level.total_experience if user_level else 0} XP
 
 **По категориям:**
-"""
-        
-        type_names = {
-            "focus_sessions": "🎯 Сессии фокуса",
-            "screen_time_reduction": "📱 Сокращение экранного времени",
-            "streak_days": "📅 Серии дней",
-            "reminders_completed": "⏰ Выполненные напоминания",
-            "first_time": "👋 Первые шаги",
-            "milestone": "🏅 Достижения"
-        }
-        
-        for type_name, stats in type_stats.items():
-            display_name = type_names.get(type_name, type_name.replace('_', ' ').title())
-            completion_rate = (stats["completed"] / stats["total"] * 100) if stats["total"] > 0 else 0
-            message += f"• {display_name}: {stats['completed']}/{stats['total']} ({completion_rate:.1f}%)\n"
-        
-        keyboard = [
-            [
-                InlineKeyboardButton("🏆 Все достижения", callback_data="achievements_all"),
-                InlineKeyboardButton("🎯 Прогресс", callback_data="achievements_progress")
-            ],
-            [
-                InlineKeyboardButton("🔙 Назад", callback_data="achievements_main")
-            ]
-        ]
+"""]
         
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        for achievement_type, total in type_totals.items():
+            display_name = _ACHIEVEMENT_TYPE_META[achievement_type][2]
+            done = type_completed[achievement_type]
+            completion_rate = done / total * 100
+            parts.append(f"• {display_name}: {done}/{total} ({completion_rate:.1f}%)\n")
         
-        await query.edit_message_text(
-            message.strip(),
-            reply_markup=reply_markup,
-            parse_mode="Markdown"
-        )
+        message = "".join(parts)
+        return message.strip(), _ACH_BROWSE_MARKUP
 
     async def _handle_level_callback(self, query, user_id: int, action: str):
         """Обработка callback запросов для уровня"""
         try:
-            from detoxbuddy.database.database import SessionLocal
-            
-            with SessionLocal() as db:
-                if action == "stats":
-                    await self._show_level_stats(query, user_id, db)
-                elif action == "help":
-                    await self._show_level_help(query)
-                else:
-                    await query.edit_message_text("❌ Неизвестное действие")
-                    
+            if action == "stats":
+                await self._show_level_stats(query, user_id)
+            elif action == "help":
+                await self._show_level_help(query)
+            else:
+                self._forget_last_edit(query)
+                await query.edit_message_text("❌ Неизвестное действие")
+                
         except Exception as e:
-            logger.error(f"Error in level callback: {e}")
+            logger.error("Error in level callback", error=e)
+            self._forget_last_edit(query)
             await query.edit_message_text("❌ Ошибка при обработке запроса")
 
-    async def _show_level_stats(self, query, user_id: int, db):
+    async def _show_level_stats(self, query, user_id: int):
         """Показать статистику уровня"""
-        user_level = user_level_crud.get_user_level(db, user_id)
-        if not user_level:
-            user_level = user_level_crud.create_user_level(db, user_id)
-        
-        # Получаем статистику по достижениям
-        completed_achievements = user_achievement_crud.get_completed_achievements(db, user_id)
+        text = await asyncio.to_thread(self._build_level_stats, user_id)
+        await self._edit_markdown_if_changed(query, text, _LEVEL_STATS_MARKUP)
+    
+    @staticmethod
+    def _build_level_stats(user_id: int) -> str:
+        """Текст статистики уровня (выполняется в рабочем потоке)"""
+        with session_scope() as db:
+            # Строка с готовыми значениями; объект создается только для нового пользователя
+            user_level = user_level_crud.get_level_summary(db, user_id)
+            if not user_level:
+                user_level = user_level_crud.get_or_create(db, user_id)
         
         message = f"""
 📈 **Статистика уровня**
@@ -2819,83 +3238,17 @@ class TelegramBot:
 • Прогресс: {user_level.progress_to_next_level:.1%}
 
 **Достижения:**
-• Завершено: {len(completed_achievements)} достижений
+• Завершено: {user_level.achievements_count} достижений
 • Серия дней: {user_level.streak_days} дней
 • Максимальная серия: {user_level.max_streak_days} дней
 
 **Следующий уровень:**
 • Требуется: {user_level.experience_to_next_level} XP
-• Осталось: {user_level.experience_to_next_level - user_level.experience} XP
+• Осталось: {user_level.experience_remaining} XP
         """
         
-        keyboard = [
-            [
-                InlineKeyboardButton("🏆 Достижения", callback_data="achievements_all"),
-                InlineKeyboardButton("🎯 Прогресс", callback_data="achievements_progress")
-            ],
-            [
-                InlineKeyboardButton("🔙 Назад", callback_data="level_main")
-            ]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            message.strip(),
-            reply_markup=reply_markup,
-            parse_mode="Markdown"
-        )
+        return message.strip()
 
     async def _show_level_help(self, query):
         """Показать справку по получению опыта"""
-        message = """
-🎯 **Как получить опыт**
-
-**Основные способы:**
-
-🎯 **Сессии фокуса:**
-• Завершение сессии: +10 XP
-• Длительная сессия (45+ мин): +15 XP
-• Серия сессий: +5 XP за каждую
-
-📱 **Сокращение экранного времени:**
-• День с экраном < 6 часов: +20 XP
-• День с экраном < 4 часов: +30 XP
-• Неделя с экраном < 6 часов: +100 XP
-
-📅 **Серии дней:**
-• 7 дней подряд: +50 XP
-• 30 дней подряд: +200 XP
-• 100 дней подряд: +1000 XP
-
-⏰ **Выполнение напоминаний:**
-• Каждое напоминание: +5 XP
-• Серия напоминаний: +10 XP
-
-🏆 **Достижения:**
-• Каждое достижение: +10-500 XP
-• Редкие достижения: +1000 XP
-
-**Советы:**
-• Регулярность важнее количества
-• Маленькие шаги приводят к большим результатам
-• Отслеживайте свой прогресс
-        """
-        
-        keyboard = [
-            [
-                InlineKeyboardButton("🏆 Достижения", callback_data="achievements_all"),
-                InlineKeyboardButton("📊 Статистика", callback_data="level_stats")
-            ],
-            [
-                InlineKeyboardButton("🔙 Назад", callback_data="level_main")
-            ]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            message.strip(),
-            reply_markup=reply_markup,
-            parse_mode="Markdown"
-        )
+        await self._edit_markdown_if_changed(query, _LEVEL_HELP_TEXT, _LEVEL_HELP_MARKUP)
@@ -0,0 +1,37 @@
+"""
+@file: conftest.py
+@description: Общие фикстуры тестов: изолированная SQLite-база в памяти
+@dependencies: pytest, sqlalchemy, models
+@created: 2026-10-16
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from detoxbuddy.database.models import Base, User
+
+
+@pytest.fixture
+def db():
+    """Сессия к чистой SQLite-базе в памяти (одно соединение на тест)"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    # Как в SessionLocal: после commit атрибуты читаются без повторного SELECT
+    with Session(engine, autoflush=False, expire_on_commit=False) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def user(db):
+    """Пользователь Telegram"""
+    user = User(telegram_id=100500, first_name="Test")
+    db.add(user)
+    db.commit()
+    return user
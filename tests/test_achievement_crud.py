@@ -0,0 +1,223 @@
+"""
+@file: test_achievement_crud.py
+@description: Тесты CRUD уровня и событийного прогресса достижений на SQLite
+@dependencies: pytest, sqlalchemy, crud.achievement
+@created: 2026-10-16
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from detoxbuddy.database.crud.achievement import (
+    achievement_service,
+    user_achievement_crud,
+    user_level_crud,
+)
+from detoxbuddy.database.models import (
+    Achievement,
+    AchievementType,
+    Reminder,
+    ReminderStatus,
+    ReminderType,
+    UserAchievement,
+    UserLevel,
+)
+
+
+def _count_levels(db, user_id):
+    return db.scalar(select(func.count(UserLevel.id)).where(UserLevel.user_id == user_id))
+
+
+def _add_achievement(db, condition_value, achievement_type=AchievementType.REMINDERS_COMPLETED):
+    achievement = Achievement(
+        name=f"Цель {condition_value}",
+        description="Тестовое достижение",
+        type=achievement_type,
+        condition_value=condition_value,
+        points=10,
+    )
+    db.add(achievement)
+    db.commit()
+    return achievement
+
+
+def _track(db, user, achievement, progress=0):
+    user_achievement = UserAchievement(
+        user_id=user.id, achievement_id=achievement.id, current_progress=progress
+    )
+    db.add(user_achievement)
+    db.commit()
+    return user_achievement
+
+
+class TestGetOrCreate:
+    def test_creates_missing_level(self, db, user):
+        user_level = user_level_crud.get_or_create(db, user.id)
+
+        assert user_level.user_id == user.id
+        assert user_level.level == 1
+        assert user_level.experience == 0
+        assert _count_levels(db, user.id) == 1
+
+    def test_returns_existing_level(self, db, user):
+        existing = UserLevel(user_id=user.id, level=3, experience=50)
+        db.add(existing)
+        db.commit()
+
+        user_level = user_level_crud.get_or_create(db, user.id)
+
+        assert user_level.id == existing.id
+        assert user_level.level == 3
+        assert user_level.experience == 50
+        assert _count_levels(db, user.id) == 1
+
+    def test_repeated_calls_do_not_duplicate(self, db, user):
+        first = user_level_crud.get_or_create(db, user.id)
+        second = user_level_crud.get_or_create(db, user.id)
+
+        assert first.id == second.id
+        assert _count_levels(db, user.id) == 1
+
+    def test_conflicting_insert_returns_existing_row(self, db, user, monkeypatch):
+        # Строку вставил параллельный запрос между SELECT и INSERT
+        existing = UserLevel(user_id=user.id, level=2)
+        db.add(existing)
+        db.commit()
+        original = user_level_crud.get_user_level
+        calls = []
+
+        def get_user_level(db, user_id):
+            # Первый SELECT "не видит" строку, повторный после INSERT - видит
+            calls.append(user_id)
+            return None if len(calls) == 1 else original(db, user_id)
+
+        monkeypatch.setattr(user_level_crud, "get_user_level", get_user_level)
+
+        user_level = user_level_crud.get_or_create(db, user.id)
+
+        assert len(calls) == 2
+        assert user_level.id == existing.id
+        assert user_level.level == 2
+        assert _count_levels(db, user.id) == 1
+
+
+class TestIncrementProgress:
+    def test_completes_achievement_on_target(self, db, user):
+        achievement = _add_achievement(db, condition_value=2)
+        user_achievement = _track(db, user, achievement, progress=1)
+
+        newly_completed = user_achievement_crud.increment_progress(
+            db, user.id, AchievementType.REMINDERS_COMPLETED
+        )
+
+        assert [ua.id for ua in newly_completed] == [user_achievement.id]
+        db.refresh(user_achievement)
+        assert user_achievement.current_progress == 2
+        assert user_achievement.is_completed
+        assert user_achievement.completed_at is not None
+
+    def test_completed_achievement_is_not_returned_again(self, db, user):
+        achievement = _add_achievement(db, condition_value=1)
+        user_achievement = _track(db, user, achievement)
+
+        first = user_achievement_crud.increment_progress(db, user.id, AchievementType.REMINDERS_COMPLETED)
+        second = user_achievement_crud.increment_progress(db, user.id, AchievementType.REMINDERS_COMPLETED)
+
+        assert len(first) == 1
+        assert second == []
+        db.refresh(user_achievement)
+        assert user_achievement.current_progress == 2
+
+    def test_delta_and_other_types(self, db, user):
+        reminders = _add_achievement(db, condition_value=10)
+        focus = _add_achievement(db, condition_value=10, achievement_type=AchievementType.FOCUS_SESSIONS)
+        reminders_progress = _track(db, user, reminders, progress=4)
+        focus_progress = _track(db, user, focus, progress=4)
+
+        newly_completed = user_achievement_crud.increment_progress(
+            db, user.id, AchievementType.REMINDERS_COMPLETED, delta=3
+        )
+
+        assert newly_completed == []
+        db.refresh(reminders_progress)
+        db.refresh(focus_progress)
+        assert reminders_progress.current_progress == 7
+        assert focus_progress.current_progress == 4
+
+    def test_returns_none_without_progress_rows(self, db, user):
+        tracked = _add_achievement(db, condition_value=5)
+        _add_achievement(db, condition_value=10)
+        user_achievement = _track(db, user, tracked, progress=1)
+
+        result = user_achievement_crud.increment_progress(
+            db, user.id, AchievementType.REMINDERS_COMPLETED
+        )
+
+        # Не все записи прогресса есть: ничего не меняется, нужен пересчет
+        assert result is None
+        db.refresh(user_achievement)
+        assert user_achievement.current_progress == 1
+
+    def test_service_falls_back_to_recheck(self, db, user):
+        achievement = _add_achievement(db, condition_value=2)
+        for index in range(2):
+            db.add(Reminder(
+                user_id=user.id,
+                title=f"Напоминание {index}",
+                reminder_type=ReminderType.CUSTOM,
+                status=ReminderStatus.SENT,
+                sent_count=1,
+                scheduled_time=datetime.utcnow(),
+            ))
+        db.commit()
+
+        newly_completed = achievement_service.record_reminder_sent(db, user.id)
+
+        # Записи прогресса не было: прогресс пересчитан по отправленным напоминаниям
+        assert [ua.achievement_id for ua in newly_completed] == [achievement.id]
+        assert newly_completed[0].current_progress == 2
+        assert user_level_crud.get_user_level(db, user.id).achievements_count == 1
+
+    def test_recheck_keeps_recurring_progress(self, db, user):
+        achievement = _add_achievement(db, condition_value=5)
+        user_achievement = _track(db, user, achievement)
+        # Повторяющееся напоминание отправлено дважды и снова ждет в расписании
+        db.add(Reminder(
+            user_id=user.id,
+            title="Выпить воды",
+            reminder_type=ReminderType.CUSTOM,
+            status=ReminderStatus.ACTIVE,
+            is_recurring=True,
+            repeat_interval=60,
+            sent_count=2,
+            scheduled_time=datetime.utcnow(),
+        ))
+        db.commit()
+        for _ in range(2):
+            achievement_service.record_reminder_sent(db, user.id)
+
+        achievement_service.check_all_achievements(db, user.id)
+
+        db.refresh(user_achievement)
+        assert user_achievement.current_progress == 2
+        assert not user_achievement.is_completed
+
+
+class TestUpdateProgress:
+    def test_does_not_lower_progress(self, db, user):
+        achievement = _add_achievement(db, condition_value=10)
+        _track(db, user, achievement, progress=6)
+
+        user_achievement = user_achievement_crud.update_progress(db, user.id, achievement.id, 3)
+
+        assert user_achievement.current_progress == 6
+
+    def test_raises_progress_and_completes(self, db, user):
+        achievement = _add_achievement(db, condition_value=10)
+        _track(db, user, achievement, progress=6)
+
+        user_achievement = user_achievement_crud.update_progress(db, user.id, achievement.id, 10)
+
+        assert user_achievement.current_progress == 10
+        assert user_achievement.is_completed
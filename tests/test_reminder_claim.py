@@ -0,0 +1,120 @@
+"""
+@file: test_reminder_claim.py
+@description: Тесты атомарного захвата напоминаний claim_due_reminders на SQLite
+@dependencies: pytest, sqlalchemy, celery, python-telegram-bot, reminder_tasks
+@created: 2026-10-16
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from detoxbuddy.core import reminder_queue
+from detoxbuddy.database.models import Reminder, ReminderStatus, ReminderType
+
+# Модуль задач импортирует Celery и бота Telegram при загрузке
+pytest.importorskip("celery")
+pytest.importorskip("telegram")
+from detoxbuddy.tasks.reminder_tasks import claim_due_reminders  # noqa: E402
+
+NOW = datetime(2026, 10, 16, 12, 0)
+
+
+@pytest.fixture
+def add_reminder(db, user):
+    """Создает напоминание пользователя; по умолчанию - активное и уже наступившее"""
+    def _add(**fields):
+        values = {
+            "user_id": user.id,
+            "title": "Пора отдохнуть",
+            "reminder_type": ReminderType.BREAK_REMINDER,
+            "scheduled_time": NOW - timedelta(minutes=1),
+        }
+        values.update(fields)
+        reminder = Reminder(**values)
+        db.add(reminder)
+        db.commit()
+        return reminder
+    return _add
+
+
+def _reload(db, reminder):
+    # UPDATE в claim_due_reminders не синхронизирует объекты сессии
+    db.refresh(reminder)
+    return reminder
+
+
+def test_claims_due_reminder(db, add_reminder):
+    reminder = add_reminder()
+
+    claimed = claim_due_reminders(db, now=NOW)
+
+    assert [row.id for row in claimed] == [reminder.id]
+    _reload(db, reminder)
+    assert reminder.status == ReminderStatus.SENT
+    assert reminder.sent_at == NOW
+    assert reminder.sent_count == 1
+
+
+def test_skips_future_disabled_and_inactive(db, add_reminder):
+    add_reminder(scheduled_time=NOW + timedelta(minutes=1))
+    add_reminder(is_enabled=False)
+    add_reminder(status=ReminderStatus.CANCELLED)
+
+    assert claim_due_reminders(db, now=NOW) == []
+
+
+def test_filters_expired_reminders(db, add_reminder):
+    expired = add_reminder(expires_at=NOW)
+    open_ended = add_reminder(expires_at=None)
+    not_expired = add_reminder(expires_at=NOW + timedelta(hours=1))
+
+    claimed_ids = {row.id for row in claim_due_reminders(db, now=NOW)}
+
+    assert claimed_ids == {open_ended.id, not_expired.id}
+    assert _reload(db, expired).status == ReminderStatus.ACTIVE
+
+
+def test_filters_reminders_over_max_send_count(db, add_reminder):
+    exhausted = add_reminder(max_send_count=2, sent_count=2)
+    unlimited = add_reminder(max_send_count=None, sent_count=5)
+    last_send = add_reminder(max_send_count=2, sent_count=1)
+
+    claimed_ids = {row.id for row in claim_due_reminders(db, now=NOW)}
+
+    assert claimed_ids == {unlimited.id, last_send.id}
+    exhausted = _reload(db, exhausted)
+    assert exhausted.status == ReminderStatus.ACTIVE
+    assert exhausted.sent_count == 2
+    assert _reload(db, last_send).sent_count == 2
+
+
+def test_reschedules_recurring_reminder(db, add_reminder):
+    recurring = add_reminder(is_recurring=True, repeat_interval=30)
+    one_off = add_reminder()
+
+    claimed = claim_due_reminders(db, now=NOW)
+
+    assert {row.id for row in claimed} == {recurring.id, one_off.id}
+    next_time = NOW + timedelta(minutes=30)
+    recurring = _reload(db, recurring)
+    assert recurring.status == ReminderStatus.ACTIVE
+    assert recurring.scheduled_time == next_time
+    assert recurring.sent_count == 1
+    assert recurring.sent_at == NOW
+    assert _reload(db, one_off).status == ReminderStatus.SENT
+    # Пакетный UPDATE не вызывает событий ORM: очередь пополняется явно до коммита
+    assert db.info[reminder_queue._PENDING_KEY] == {recurring.id: next_time}
+
+
+def test_respects_ids_and_limit(db, add_reminder):
+    oldest = add_reminder(scheduled_time=NOW - timedelta(minutes=3))
+    middle = add_reminder(scheduled_time=NOW - timedelta(minutes=2))
+    newest = add_reminder(scheduled_time=NOW - timedelta(minutes=1))
+
+    by_ids = claim_due_reminders(db, now=NOW, ids=[newest.id])
+    by_limit = claim_due_reminders(db, now=NOW, limit=1)
+
+    assert [row.id for row in by_ids] == [newest.id]
+    assert [row.id for row in by_limit] == [oldest.id]
+    assert _reload(db, middle).status == ReminderStatus.ACTIVE